@@ -1,21 +1,35 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
 import pathlib
+import time
 import numpy as np
-from PIL import Image
-from sklearn.linear_model import LinearRegression, Ridge, Lasso
-from sklearn.ensemble import RandomForestRegressor
+
+import app_assets
+import app_data
+import app_imports
+
+# Heavy dependencies are imported by the first section that uses them, so the text
+# sections never load matplotlib or sklearn (app_models) - see app_imports
+plt = app_imports.lazy("matplotlib.pyplot")
+app_models = app_imports.lazy("app_models")
+app_images = app_imports.lazy("app_images")
+aq_cube = app_imports.lazy("aq_cube")
+app_panel = app_imports.lazy("app_panel")
+app_paths = app_imports.lazy("app_paths")
+app_forests = app_imports.lazy("app_forests")
+app_validation = app_imports.lazy("app_validation")
+
+# Start of this script run (see record_timing)
+_run_started = time.perf_counter()
 
 # Set page configuration
 st.set_page_config(page_title="EV Impact on Air Quality", layout="centered")
 
 
 # Inject audio player and JS into the page
-st.markdown("""
-<audio id="nav-sound" src="https://www.soundjay.com/button/beep-07.mp3" preload="auto"></audio>
+# The beep is embedded from the local copy (app_assets) instead of loaded from soundjay.com
+st.markdown(f'<audio id="nav-sound" src="{app_assets.audio_src("nav_beep")}" preload="auto"></audio>' + """
 <script>
 window.playNavSound = function() {
     const audio = document.getElementById('nav-sound');
@@ -32,39 +46,63 @@ window.playNavSound = function() {
 def play_sound():
     st.markdown("<script>window.playNavSound()</script>", unsafe_allow_html=True)
 
-def switch_section(new_section):
-    st.session_state["section"] = new_section
-
-import pathlib
-
-# Load processed data
-@st.cache_data
-def load_data():
-    # Use pathlib to construct the file path
-    data_dir = pathlib.Path(__file__).parent.parent / "data" / "processed"
-    aq_data_path = data_dir / "AQ_annual_averages.csv"
-    vehicle_data_path = data_dir / "combined_vehicle_data.csv" # Using the same vehicle data as Custom Regression Builder
-
-    # Check if the files exist
-    if not aq_data_path.exists():
-        st.error(f"Air quality data file not found: {aq_data_path}")
-        # st.stop() # Consider returning an empty DataFrame or None for more graceful handling if needed elsewhere
-        return pd.DataFrame() 
-    if not vehicle_data_path.exists():
-        st.error(f"Vehicle data file not found: {vehicle_data_path}")
-        # st.stop()
-        return pd.DataFrame()
-
-    # Load the CSV files
-    aq_df = pd.read_csv(aq_data_path)
-    vehicle_df = pd.read_csv(vehicle_data_path)
-
-    # Perform the merge on 'Country' and 'Year'
-    # This ensures 'Pollutant' from aq_df and fleet data from vehicle_df are combined
-    merged_data = pd.merge(aq_df, vehicle_df, on=['Country', 'Year'], how='left')
-    return merged_data
-
-data = load_data()
+# Navigation callback for the sidebar and all section buttons. Callbacks run before the
+# next script run, so a click executes the script once (no st.rerun() after the fact)
+def switch_section(new_section=None):
+    if new_section is not None:
+        st.session_state["section"] = new_section
+    st.session_state["play_nav_sound"] = True
+
+# Interaction timings: the last runs of the page and of the fragment panels, in ms
+def record_timing(label, started):
+    timings = st.session_state.setdefault("timings", [])
+    timings.append((label, round((time.perf_counter() - started) * 1000, 1)))
+    del timings[:-20]
+
+# st.stop() ends the run before the page timing at the bottom of the script, so record it first
+def stop_page():
+    record_timing(f"page: {st.session_state['section']}", _run_started)
+    st.stop()
+
+# GIFs are served from the local, size-capped copies (see app_assets); only media that
+# were never fetched with `python src/app_assets.py` still come from giphy
+def show_animation(name, caption):
+    path = app_assets.animation(name)
+    if path is None:
+        st.image(app_assets.url(name), caption=caption, use_container_width=True)
+    elif path.suffix == ".mp4":
+        st.video(str(path), autoplay=True, loop=True, muted=True)
+        st.caption(caption)
+    else:
+        st.image(str(path), caption=caption, use_container_width=True)
+
+# Gallery figures are sent as resized, compressed renditions cached in memory (app_images);
+# the full-resolution PNG is only read and sent when the user asks for it
+def show_figure(path, caption, use_container_width=True):
+    st.image(app_images.rendition(path), caption=caption, use_container_width=use_container_width,
+             output_format=app_images.FORMAT)
+    if st.toggle("🔍 Full resolution", key=f"full_resolution_{path}"):
+        st.image(app_images.original(path), caption=caption)
+
+# Out-of-sample metrics of a model configuration under the validation scheme chosen here
+# (app_validation: folds computed once per data selection, results cached per model)
+def show_validation(pollutant, target, model_type, params=None, countries=None, features=("AF_fleet",),
+                    fixed_effects=True, key="validation"):
+    scheme = st.selectbox("Out-of-sample validation", list(app_validation.SCHEMES),
+                          format_func=app_validation.SCHEMES.get, key=key)
+    with st.spinner("Evaluating folds..."):
+        validation = app_validation.cross_validate(pollutant, target, model_type, params, countries, features,
+                                                   fixed_effects, scheme)
+    if validation is None:
+        st.caption("Not enough countries or years in this selection for this validation scheme.")
+        return
+    col_r2, col_rmse, col_mae = st.columns(3)
+    col_r2.metric("Out-of-sample R²", f"{validation.r2:.3f}")
+    col_rmse.metric("Out-of-sample RMSE", f"{validation.rmse:.2f}")
+    col_mae.metric("Out-of-sample MAE", f"{validation.mae:.2f}")
+    st.caption(f"{validation.n_folds} folds, {validation.n_predictions} held-out predictions"
+               + (" (without country fixed effects, which cannot be estimated for a held-out country)"
+                  if scheme == "loco" and fixed_effects else ""))
 
 # Sidebar for navigation
 st.sidebar.title("Navigation")
@@ -78,76 +116,57 @@ section_names = [
     "Air Quality Predictor", "Custom Regression Builder",
     "Literature Review", "Discussion", "Conclusions"
 ]
-selected = st.sidebar.radio(
-    "Go to",
-    section_names,
-    index=section_names.index(st.session_state["section"]) if "section" in st.session_state else 0,
-    key="sidebar_section"
-)
+# The radio is bound to st.session_state["section"], so the buttons' switch_section() moves it too
+st.sidebar.radio("Go to", section_names, key="section", on_change=switch_section)
+
+if st.session_state.pop("play_nav_sound", False):
+    play_sound()
 
-# Update session state based on sidebar
-if selected != st.session_state["section"]:
-    play_sound()  # <-- Play sound before rerun
-    st.session_state["section"] = selected
-    st.rerun()
+with st.sidebar.expander("⏱️ Interaction timings"):
+    timings = st.session_state.get("timings", [])
+    if timings:
+        st.table(pd.DataFrame(timings[::-1], columns=["Run", "ms"]))
+    else:
+        st.caption("No interactions timed yet.")
+
+# Startup report: heavy modules imported so far by this server process and how long each took
+with st.sidebar.expander("⏱️ Import times"):
+    import_times = app_imports.report()
+    if import_times:
+        st.table(pd.DataFrame(import_times, columns=["Module", "Seconds"]).round(3))
+    else:
+        st.caption("No heavy modules imported yet.")
 
 
 # Use section for routing
 section = st.session_state["section"]
 
-if "section" not in st.session_state:
-    st.session_state.section = "Dashboard"
-
 if section == "Dashboard":
     st.title("Welcome to the EV Impact Dashboard 🚗🌍")
     st.write("Navigate to different sections using the buttons below:")
 
     col = st.columns(1)[0]
     with col:
-        if st.button("📘 Introduction"):
-            play_sound()
-            st.session_state["section"] = "Introduction"
-            st.rerun()
-        if st.button("📊 EDA"):
-            play_sound()
-            st.session_state["section"] = "EDA"
-            st.rerun()
-        if st.button("📈 Analysis"):
-            play_sound()
-            st.session_state["section"] = "Analysis"
-            st.rerun()
-        if st.button("🧪 Air Quality Predictor"):
-            play_sound()
-            st.session_state["section"] = "Air Quality Predictor"
-            st.rerun()
-        if st.button("💻 Custom Regression Builder"):
-            play_sound()
-            st.session_state["section"] = "Custom Regression Builder"
-            st.rerun()
-        if st.button("📚 Literature Review"):
-            play_sound()
-            st.session_state["section"] = "Literature Review"
-            st.rerun()
-        if st.button("🗣️ Discussion"):
-            play_sound()
-            st.session_state["section"] = "Discussion"
-            st.rerun()
-        if st.button("🔚 Conclusions"):
-            play_sound()
-            st.session_state["section"] = "Conclusions"
-            st.rerun()
+        st.button("📘 Introduction", on_click=switch_section, args=("Introduction",))
+        st.button("📊 EDA", on_click=switch_section, args=("EDA",))
+        st.button("📈 Analysis", on_click=switch_section, args=("Analysis",))
+        st.button("🧪 Air Quality Predictor", on_click=switch_section, args=("Air Quality Predictor",))
+        st.button("💻 Custom Regression Builder", on_click=switch_section, args=("Custom Regression Builder",))
+        st.button("📚 Literature Review", on_click=switch_section, args=("Literature Review",))
+        st.button("🗣️ Discussion", on_click=switch_section, args=("Discussion",))
+        st.button("🔚 Conclusions", on_click=switch_section, args=("Conclusions",))
 
     # add a small text asking whether the user is ready!
     st.write("Are you ready to explore the impact of electric vehicles on air quality? 🚀")
 
-    st.image("https://media.giphy.com/media/v1.Y2lkPTc5MGI3NjExdWplZjlvYzUzNG5vNmsxcnQwb3AzNW5ycm44dTl5NzRpdjUxcGZ2aiZlcD12MV9naWZzX3NlYXJjaCZjdD1n/AoHEeIi9AzzwLlEmfb/giphy.gif", caption="The road to cleaner air is a journey worth taking!", use_container_width =True)
+    show_animation("road_to_cleaner_air", caption="The road to cleaner air is a journey worth taking!")
 
 
 elif section == "Introduction":
     st.title("Electric Vehicles and Air Quality Analysis 🚗🌍")
     
     # Add a fun introductory GIF or image
-    st.image("https://media.giphy.com/media/3o7abKhOpu0NwenH3O/giphy.gif", caption="Driving into a cleaner future!", use_container_width =True)
+    show_animation("driving_cleaner_future", caption="Driving into a cleaner future!")
 
     st.write("""
     Welcome to the **Electric Vehicle (EV) Impact Dashboard**! 🌱🚗  
@@ -247,12 +266,10 @@ elif section == "Introduction":
     st.write("To support this rationale, we compiled key attributes across the selected countries:")
 
     # Display the CSV file as a table
-    import pandas as pd
-
-    csv_path = "figures/EDA/ev_country_comparison.csv"
+    csv_path = app_data.path("ev_comparison")
 
-    if os.path.exists(csv_path):
-        ev_comparison_df = pd.read_csv(csv_path)
+    if csv_path.exists():
+        ev_comparison_df = app_data.table("ev_comparison")
         st.write("### EV Adoption, Geography, Policy, and Air Quality Regulation in Selected Countries")
         st.dataframe(ev_comparison_df, use_container_width=True)
     else:
@@ -272,19 +289,13 @@ elif section == "Introduction":
     """)
 
     # Add a motivational GIF or image
-    st.image("https://media.giphy.com/media/v1.Y2lkPTc5MGI3NjExY2NuaTdsZXA3OHpnNmZkdzFibTlud2hxMmlxNXd0dzB3YXNpdmN4aCZlcD12MV9naWZzX3NlYXJjaCZjdD1n/VIfE4DE7vY49i/giphy.gif", caption="Together, we can drive change!", use_container_width =True)
+    show_animation("drive_change", caption="Together, we can drive change!")
 
     col1, col2, col3 = st.columns([1, 5, 1])
     with col1:
-        if st.button("⬅️ Previous"):
-            play_sound()
-            st.session_state["section"] = "Dashboard"
-            st.rerun()
+        st.button("⬅️ Previous", on_click=switch_section, args=("Dashboard",))
     with col3:
-        if st.button("Next ➡️"):
-            play_sound()
-            st.session_state["section"] = "EDA"
-            st.rerun()
+        st.button("Next ➡️", on_click=switch_section, args=("EDA",))
 
 
 elif section == "EDA":
@@ -384,7 +395,7 @@ elif section == "EDA":
 
     for caption, path, insight in eda_figures:
         if os.path.exists(path):
-            st.image(path, caption=caption, use_container_width =True)
+            show_figure(path, caption)
             st.markdown(f"**Insight:** {insight}")
         else:
             st.warning(f"Figure not found: {path}")
@@ -402,6 +413,46 @@ elif section == "EDA":
     st.subheader("🌫️ Air Quality Trends and Patterns")
     st.write("This section explores trends in pollutant levels across time and space, using data from national monitoring stations. Patterns in key metrics (CO₂, NO₂, PM) provide insight into evolving air quality amid the shift toward alternative fuel vehicles.")
 
+    # --- Interactive EDA: any view computed from the pre-aggregated hourly cube (aq_cube) ---
+    if not aq_cube.CUBE_PATH.exists():
+        st.caption("Run `python src/aq_cube.py` to enable the interactive air quality explorer.")
+    elif st.toggle("🔎 Interactive mode: build your own air quality view", key="eda_interactive"):
+        cube = aq_cube.load_cube()
+        eda_view = st.selectbox("View", ["Hourly pattern", "Seasonal pattern", "Weekday × hour", "Annual trend"], key="eda_view")
+        all_pollutants = list(cube["Notation"].cat.categories)
+        all_countries = list(cube["Country"].cat.categories)
+        eda_pollutants = st.multiselect("Pollutants", all_pollutants, default=all_pollutants[:1], key="eda_pollutants")
+        eda_countries = st.multiselect("Countries", all_countries, default=all_countries, key="eda_countries")
+        year_min, year_max = int(cube["Year"].min()), int(cube["Year"].max())
+        eda_years = st.slider("Years", year_min, year_max, (year_min, year_max), key="eda_years")
+        eda_days = st.radio("Days", ["All days", "Weekdays", "Weekends"], horizontal=True, key="eda_days")
+        day_filter = {"All days": None, "Weekdays": [0, 1, 2, 3, 4], "Weekends": [5, 6]}[eda_days]
+        filters = dict(countries=eda_countries, pollutants=eda_pollutants,
+                       years=range(eda_years[0], eda_years[1] + 1), days=day_filter)
+
+        if not eda_pollutants or not eda_countries:
+            st.info("Select at least one pollutant and one country.")
+        elif eda_view == "Weekday × hour":
+            # One heatmap per pollutant, averaged over the selected countries
+            day_names = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+            for eda_pollutant in eda_pollutants:
+                result = aq_cube.view(["DayOfWeek", "Hour"], **{**filters, "pollutants": [eda_pollutant]})
+                grid = result.pivot(index="DayOfWeek", columns="Hour", values="Value")
+                fig, ax = plt.subplots(figsize=(10, 3.5))
+                image = ax.imshow(grid.to_numpy(), aspect="auto", cmap="viridis")
+                ax.set_yticks(range(len(grid.index)), [day_names[d] for d in grid.index])
+                ax.set_xticks(range(len(grid.columns)), grid.columns)
+                ax.set_xlabel("Hour (start of measurement)")
+                ax.set_title(f"{eda_pollutant}: mean by weekday and hour")
+                fig.colorbar(image, ax=ax)
+                st.pyplot(fig)
+        else:
+            x_key = {"Hourly pattern": "Hour", "Seasonal pattern": "Month", "Annual trend": "Year"}[eda_view]
+            result = aq_cube.view(["Notation", "Country", x_key], **filters)
+            result["Series"] = result["Notation"].astype(str) + " – " + result["Country"].astype(str)
+            st.line_chart(result.pivot(index=x_key, columns="Series", values="Value"))
+        st.caption(f"Computed from {len(cube):,} pre-aggregated cells instead of the hourly rows.")
+
     aq_figures = [
         ("CO2 Levels (Full Week Daytime) Over Years by Country", "figures/EDA/aq_avg_annual_co2_per_country.png",
         "🔹 CO₂ levels are generally increasing in AT, DK, and CH, while NO and SE show flatter or even declining trends. Norway’s persistently low CO₂ supports the impact of its clean grid."),
@@ -444,7 +495,7 @@ elif section == "EDA":
 
     for caption, path, insight in aq_figures:
         if os.path.exists(path):
-            st.image(path, caption=caption, use_container_width=True)
+            show_figure(path, caption)
             st.markdown(f"**Insight:** {insight}")
         else:
             st.warning(f"Figure not found: {path}")
@@ -462,15 +513,9 @@ elif section == "EDA":
 
     col1, col2, col3 = st.columns([1, 5, 1])
     with col1:
-        if st.button("⬅️ Previous"):
-            play_sound()            
-            st.session_state["section"] = "Introduction"
-            st.rerun()
+        st.button("⬅️ Previous", on_click=switch_section, args=("Introduction",))
     with col3:
-        if st.button("Next ➡️"):
-            play_sound()
-            st.session_state["section"] = "Analysis"
-            st.rerun()
+        st.button("Next ➡️", on_click=switch_section, args=("Analysis",))
 
 
 elif section == "Analysis":
@@ -498,19 +543,17 @@ elif section == "Analysis":
     """)
 
     # Load best/worst results
-    import pandas as pd
-    import pathlib
-    best_results_path = pathlib.Path(__file__).parent.parent / "results" / "best_model_per_pollutant_target.csv"
+    best_results_path = app_data.path("best_results")
     if not best_results_path.exists():
         st.error(f"File not found: {best_results_path}")
-        st.stop()
-    best_results = pd.read_csv(best_results_path)    
+        stop_page()
+    best_results = app_data.table("best_results")
 
-    worst_results_path = pathlib.Path(__file__).parent.parent / "results" / "worst_model_per_pollutant_target.csv"
+    worst_results_path = app_data.path("worst_results")
     if not worst_results_path.exists():
         st.error(f"File not found: {worst_results_path}")
-        st.stop()
-    worst_results = pd.read_csv(worst_results_path)  
+        stop_page()
+    worst_results = app_data.table("worst_results")
     
 
     st.subheader("🏆 Top 10 Best Performing Models")
@@ -521,6 +564,15 @@ elif section == "Analysis":
     st.write("And here are the combos where the models struggled—maybe the relationship just isn't there, or the data is too noisy!")
     st.dataframe(worst_results.head(10).style.background_gradient(cmap="Reds"))
 
+    st.subheader("📐 Fixed-Effects OLS: Effect of the AF Fleet Share")
+    st.write("For the linear models, here is the estimated change in each air quality metric per percentage point of alternative fuel vehicles in the fleet, with country fixed effects, its standard error and p-value (all countries, all years).")
+    missing_paths = [app_data.path(name) for name in ("aq_annual", "vehicle") if not app_data.path(name).exists()]
+    if missing_paths:
+        st.warning(f"File not found: {', '.join(str(path) for path in missing_paths)}")
+    else:
+        panel_table = app_panel.coefficient_table(app_panel.get_panel())
+        st.dataframe(panel_table.style.format({"Coef": "{:.3f}", "SE": "{:.3f}", "t": "{:.2f}", "p_value": "{:.4f}", "R2": "{:.3f}"}))
+
     st.markdown("---")
     st.subheader("💡 Did You Know?")
 
@@ -551,7 +603,7 @@ elif section == "Analysis":
         analysis_dir = BASE_DIR / "figures" / "analysis"
         image_path = analysis_dir / f"{pollutant_name}_AnnualAvg_fullweek_RushHour_regression_country_fixed_effects_model_colored.png"
         if image_path.exists():
-            st.image(str(image_path), caption=f"Regression results for {pollutant_name}")
+            show_figure(image_path, f"Regression results for {pollutant_name}", use_container_width=False)
         else:
             st.warning(f"Figure not found for {pollutant_name}")
         st.markdown("\n".join([f"- {pt}" for pt in bullet_points]))
@@ -610,61 +662,29 @@ elif section == "Analysis":
 
     col1, col2, col3 = st.columns([1, 5, 1])
     with col1:
-        if st.button("⬅️ Previous"):
-            play_sound()
-            st.session_state["section"] = "EDA"
-            st.rerun()
+        st.button("⬅️ Previous", on_click=switch_section, args=("EDA",))
     with col3:
-        if st.button("Next ➡️"):
-            play_sound()
-            st.session_state["section"] = "Literature Review"
-            st.rerun()
+        st.button("Next ➡️", on_click=switch_section, args=("Literature Review",))
 
 
 elif section == "Air Quality Predictor":
-    @st.cache_resource
-    def train_model(df_train, feature_col, target_col, model_name_to_train, country_dummy_cols):
-        models = {
-            "LinearRegression": LinearRegression(), # OLS
-            "Ridge": Ridge(alpha=1.0),
-            "Lasso": Lasso(alpha=0.1),
-            "RandomForest": RandomForestRegressor(n_estimators=100, random_state=42)
-        }
-        
-        # Ensure feature_col is a list, even if it's a single feature
-        if isinstance(feature_col, str):
-            feature_col = [feature_col]
-            
-        X_df = df_train[feature_col + country_dummy_cols]
-        y_series = df_train[target_col]
-        
-        # Create mask for valid data
-        mask_train = (~X_df.isnull().any(axis=1)) & (~y_series.isnull())
-        
-        X_train_np = X_df[mask_train].values
-        y_train_np = y_series[mask_train].values
-        
-        if X_train_np.shape[0] == 0: # No data to train on
-            st.warning("No valid data available for training with the current selections.")
-            # Return a dummy model or handle appropriately
-            return models[model_name_to_train], X_train_np, y_train_np, mask_train 
-
-        model_instance = models[model_name_to_train]
-        model_instance.fit(X_train_np, y_train_np)
-        return model_instance, X_train_np, y_train_np, mask_train
-
     st.title("🔬 Air Quality Predictor")
     st.markdown("""
     Experiment with different models to predict pollutant levels based on Alternative Fuel (AF) vehicle fleet percentage. 
     You can view predictions for individual countries or use a model trained on all countries with fixed effects (Austria as baseline).
     """)
 
-    data = load_data() # Assuming this loads your base dataset
+    # Merged AQ + vehicle data, cached per process by app_data and only re-read when the files change
+    missing_paths = [app_data.path(name) for name in ("aq_annual", "vehicle") if not app_data.path(name).exists()]
+    for missing_path in missing_paths:
+        st.error(f"Data file not found: {missing_path}")
+    if missing_paths:
+        stop_page()
+    data = app_data.aq_vehicle()
     # Assuming best_results is loaded globally or passed appropriately
     # For this example, let's ensure it's available. If it's loaded in main(), pass it or load here.
     # if 'best_results' not in globals(): # Simplified check
-    results_path = pathlib.Path(__file__).parent.parent / "results"
-    best_results = pd.read_csv(results_path / "best_model_per_pollutant_target.csv")
+    best_results = app_data.table("best_results")
 
     # --- User Selections ---
     pollutants_available = sorted(best_results['Pollutant'].unique())
@@ -673,7 +693,7 @@ elif section == "Air Quality Predictor":
     targets_available = sorted(best_results[best_results['Pollutant'] == pollutant]['Target'].unique())
     if not targets_available: # Fallback if no targets for pollutant
         st.warning(f"No target variables found for pollutant {pollutant} in best_results.csv. Please check data.")
-        st.stop()
+        stop_page()
     target = st.selectbox("2. Select Target Variable (e.g., Annual Average)", targets_available, key="predictor_target")
 
     use_all_countries = st.checkbox("🌍 Use model trained on all countries' data (with fixed effects, AT as baseline)", key="predictor_use_all")
@@ -729,119 +749,110 @@ elif section == "Air Quality Predictor":
         # If country_for_plot_context is the baseline (e.g., AT), selected_country_dummy_for_input will be None
     else:
         st.warning("No countries available for the selected pollutant.")
-        st.stop()
-
-    # --- AF Fleet Slider ---
-    af_fleet_min = 0.0
-    af_fleet_max = 100.0
-    # Use mean of the specific pollutant's data if available, else a general default
-    default_af_fleet = df_prepared['AF_fleet'].mean() if not df_prepared['AF_fleet'].empty else 20.0
-    af_fleet_percentage = st.slider("5. Select Alternative Fuel (AF) Fleet Percentage (%) for Prediction", af_fleet_min, af_fleet_max, default_af_fleet, key="predictor_af_slider")
-
-    # --- Model Training & Evaluation ---
-    trained_model, X_trained_np, y_trained_np, training_mask = train_model(df_prepared, "AF_fleet", target, actual_model_to_run, country_cols)
-
-    if X_trained_np.shape[0] > 0:
-        current_model_r2 = trained_model.score(X_trained_np, y_trained_np)
-        st.markdown(f"##### Performance of **{actual_model_to_run}** (Your Current Selection):")
-        st.metric(label="Training R² on current data subset", value=f"{current_model_r2:.3f}")
-    else:
-        st.warning("Model could not be trained due to lack of valid data for current selections.")
-        st.stop()
-
-    # --- Prediction ---
-    # X_trained_np columns: AF_fleet, then country dummies in order of country_cols
-    num_features_model_expects = 1 + len(country_cols) 
-    input_vec = np.zeros((1, num_features_model_expects))
-    input_vec[0, 0] = af_fleet_percentage  # AF_fleet is the first feature
-
-    if not use_all_countries: # Prediction for a specific country
-        if selected_country_dummy_for_input: # A non-baseline country is selected
-            try:
-                dummy_idx = country_cols.index(selected_country_dummy_for_input)
-                input_vec[0, 1 + dummy_idx] = 1 # +1 because AF_fleet is at index 0
-            except ValueError:
-                 st.error(f"Error: Dummy column {selected_country_dummy_for_input} not found. This should not happen.")
-        # Else (baseline country like AT is selected for view), all dummies remain 0, which is correct.
-    # Else (use_all_countries is True):
-    #   The prediction will be for the baseline country (AT) by default, as all dummies are 0.
-    #   If user selected a different country in "country_for_plot_context", we can set its dummy for the point prediction.
-    elif use_all_countries and selected_country_dummy_for_input: # if a specific country context is chosen even with all_countries model
-        try:
-            dummy_idx = country_cols.index(selected_country_dummy_for_input)
-            input_vec[0, 1 + dummy_idx] = 1
-        except ValueError:
-            pass # Keep as baseline if dummy not found
+        stop_page()
+
+    # The AF slider, prediction and plot form a fragment: moving the slider reruns only this
+    # panel, not the whole page (the selections above are passed in)
+    @st.fragment
+    def predictor_panel(pollutant, target, actual_model_to_run, use_all_countries, df_prepared, country_cols,
+                        available_countries_for_pollutant, selected_country_for_view, selected_country_dummy_for_input):
+        panel_started = time.perf_counter()
+
+        # --- AF Fleet Slider ---
+        af_fleet_min = 0.0
+        af_fleet_max = 100.0
+        # Use mean of the specific pollutant's data if available, else a general default
+        default_af_fleet = df_prepared['AF_fleet'].mean()
+        if pd.isna(default_af_fleet):  # no AF_fleet values in this selection
+            default_af_fleet = 20.0
+        # Steps of the prediction surface grid, so every slider position is an exact lookup
+        default_af_fleet = round(round(float(default_af_fleet) / app_models.SURFACE_STEP) * app_models.SURFACE_STEP, 6)
+        af_fleet_percentage = st.slider("5. Select Alternative Fuel (AF) Fleet Percentage (%) for Prediction", af_fleet_min, af_fleet_max, default_af_fleet, step=app_models.SURFACE_STEP, key="predictor_af_slider")
+
+        # --- Model Training & Evaluation ---
+        # Models come from the shared registry (app_models), keyed on the selections, not on the DataFrame
+        fitted = app_models.get_model(pollutant, target, actual_model_to_run, countries=available_countries_for_pollutant)
+        X_trained_np = fitted.X
+
+        if X_trained_np.shape[0] > 0:
+            current_model_r2 = fitted.r2
+            st.markdown(f"##### Performance of **{actual_model_to_run}** (Your Current Selection):")
+            st.metric(label="Training R² on current data subset", value=f"{current_model_r2:.3f}")
+            show_validation(pollutant, target, actual_model_to_run, countries=available_countries_for_pollutant,
+                            key="predictor_validation")
+            if actual_model_to_run == "LinearRegression":
+                # Standard error and p-value of the AF_fleet coefficient from the closed-form panel fit
+                panel_fit = app_panel.get_panel([pollutant], countries=available_countries_for_pollutant)[(pollutant, target)]
+                st.caption(f"AF_fleet coefficient: {panel_fit.coef[0]:.3f} (SE {panel_fit.se[0]:.3f}, p = {panel_fit.p_value[0]:.4f})")
+        else:
+            st.warning("Model could not be trained due to lack of valid data for current selections.")
+            return
 
-    predicted_value = trained_model.predict(input_vec)[0]
-    predicted_value = max(predicted_value, 0) # Clip at 0
+        # --- Prediction ---
+        # Looked up in the model's prediction surface (predictions over the AF_fleet grid for every
+        # country, computed once per model by app_models) instead of calling predict on every rerun.
+        # The selected country's dummy is set, or none for the baseline country (e.g. AT).
+        surface = app_models.get_surface(pollutant, target, actual_model_to_run, countries=available_countries_for_pollutant)
+        input_dummy = selected_country_dummy_for_input if selected_country_dummy_for_input in country_cols else None
 
-    st.success(f"Predicted **{target}** for **{selected_country_for_view if selected_country_for_view else 'Baseline Country (e.g. AT)'}** at {af_fleet_percentage:.1f}% AF Fleet: **{predicted_value:.2f}**")
+        predicted_value = float(app_models.surface_predict(surface, af_fleet_percentage, input_dummy))
+        predicted_value = max(predicted_value, 0) # Clip at 0
 
-    # --- Plotting ---
-    fig, ax = plt.subplots(figsize=(8, 5))
-    
-    # Prediction line (trend for the selected country context)
-    af_fleet_range_plot = np.linspace(df_prepared['AF_fleet'].min(), df_prepared['AF_fleet'].max(), 100)
-    X_plot_trend = np.zeros((100, num_features_model_expects))
-    X_plot_trend[:, 0] = af_fleet_range_plot
+        st.success(f"Predicted **{target}** for **{selected_country_for_view if selected_country_for_view else 'Baseline Country (e.g. AT)'}** at {af_fleet_percentage:.1f}% AF Fleet: **{predicted_value:.2f}**")
+
+        # --- Plotting ---
+        fig, ax = plt.subplots(figsize=(8, 5))
     
-    # Set country dummy for the trend line based on selected_country_dummy_for_input
-    # This makes the trend line specific to the country selected in "country_for_plot_context"
-    if selected_country_dummy_for_input:
-        try:
-            dummy_idx_plot = country_cols.index(selected_country_dummy_for_input)
-            X_plot_trend[:, 1 + dummy_idx_plot] = 1
-        except ValueError:
-            pass # Plot baseline trend if dummy not found
-            
-    y_pred_plot_trend = trained_model.predict(X_plot_trend)
-    y_pred_plot_trend = np.clip(y_pred_plot_trend, 0, None)
-    ax.plot(af_fleet_range_plot, y_pred_plot_trend, label=f"Predicted Trend ({selected_country_for_view if selected_country_for_view else 'Baseline'})", color='blue', linestyle='--')
-
-    # Scatter actual data points
-    df_plot_actuals = df_prepared[training_mask] # Use only data points that were valid for training
-
-    if not use_all_countries: # Show data only for the selected country
-        if selected_country_dummy_for_input: # Non-baseline country
-            country_actual_mask = df_plot_actuals[selected_country_dummy_for_input] == 1
-        else: # Baseline country (e.g., AT)
-            country_actual_mask = df_plot_actuals[country_cols].sum(axis=1) == 0
-        ax.scatter(df_plot_actuals.loc[country_actual_mask, "AF_fleet"], df_plot_actuals.loc[country_actual_mask, target], color='orange', alpha=0.6, label=f"Actual Data ({selected_country_for_view})")
-    else: # Show all data points (from all countries included in training)
-        ax.scatter(df_plot_actuals["AF_fleet"], df_plot_actuals[target], color='gray', alpha=0.4, label="Actual Data (All Countries in Model)")
-        # Optionally, highlight data for the country selected for context
-        if selected_country_for_view:
-            if selected_country_dummy_for_input: # Non-baseline
-                 country_context_mask = df_plot_actuals[selected_country_dummy_for_input] == 1
-            else: # Baseline
-                 country_context_mask = df_plot_actuals[country_cols].sum(axis=1) == 0
-            ax.scatter(df_plot_actuals.loc[country_context_mask, "AF_fleet"], df_plot_actuals.loc[country_context_mask, target], color='red', alpha=0.7, label=f"Actual Data ({selected_country_for_view})", s=50)
-
-
-    # Highlight the specific prediction point
-    ax.scatter([af_fleet_percentage], [predicted_value], color='red', s=100, edgecolor='black', zorder=5, label=f"Prediction for {selected_country_for_view if selected_country_for_view else 'Baseline'}")
-    ax.annotate(f"{predicted_value:.2f}", (af_fleet_percentage, predicted_value), textcoords="offset points", xytext=(0,10), ha='center', color='red', fontsize=9, fontweight='bold')
-
-    ax.set_xlabel("Alternative Fuel (AF) Fleet Percentage (%)")
-    ax.set_ylabel(f"{pollutant} - {target}")
-    ax.set_title(f"Prediction: {actual_model_to_run} Model")
-    ax.legend()
-    ax.grid(True, linestyle=':', alpha=0.7)
-    st.pyplot(fig)
+        # Prediction line (trend for the selected country context, same dummy as the point prediction)
+        af_fleet_range_plot = np.linspace(df_prepared['AF_fleet'].min(), df_prepared['AF_fleet'].max(), 100)
+        y_pred_plot_trend = app_models.surface_predict(surface, af_fleet_range_plot, input_dummy)
+        y_pred_plot_trend = np.clip(y_pred_plot_trend, 0, None)
+        ax.plot(af_fleet_range_plot, y_pred_plot_trend, label=f"Predicted Trend ({selected_country_for_view if selected_country_for_view else 'Baseline'})", color='blue', linestyle='--')
+
+        # Scatter actual data points
+        df_plot_actuals = df_prepared.loc[fitted.index] # Use only data points that were valid for training
+
+        if not use_all_countries: # Show data only for the selected country
+            if selected_country_dummy_for_input: # Non-baseline country
+                country_actual_mask = df_plot_actuals[selected_country_dummy_for_input] == 1
+            else: # Baseline country (e.g., AT)
+                country_actual_mask = df_plot_actuals[country_cols].sum(axis=1) == 0
+            ax.scatter(df_plot_actuals.loc[country_actual_mask, "AF_fleet"], df_plot_actuals.loc[country_actual_mask, target], color='orange', alpha=0.6, label=f"Actual Data ({selected_country_for_view})")
+        else: # Show all data points (from all countries included in training)
+            ax.scatter(df_plot_actuals["AF_fleet"], df_plot_actuals[target], color='gray', alpha=0.4, label="Actual Data (All Countries in Model)")
+            # Optionally, highlight data for the country selected for context
+            if selected_country_for_view:
+                if selected_country_dummy_for_input: # Non-baseline
+                     country_context_mask = df_plot_actuals[selected_country_dummy_for_input] == 1
+                else: # Baseline
+                     country_context_mask = df_plot_actuals[country_cols].sum(axis=1) == 0
+                ax.scatter(df_plot_actuals.loc[country_context_mask, "AF_fleet"], df_plot_actuals.loc[country_context_mask, target], color='red', alpha=0.7, label=f"Actual Data ({selected_country_for_view})", s=50)
+
+
+        # Highlight the specific prediction point
+        ax.scatter([af_fleet_percentage], [predicted_value], color='red', s=100, edgecolor='black', zorder=5, label=f"Prediction for {selected_country_for_view if selected_country_for_view else 'Baseline'}")
+        ax.annotate(f"{predicted_value:.2f}", (af_fleet_percentage, predicted_value), textcoords="offset points", xytext=(0,10), ha='center', color='red', fontsize=9, fontweight='bold')
+
+        ax.set_xlabel("Alternative Fuel (AF) Fleet Percentage (%)")
+        ax.set_ylabel(f"{pollutant} - {target}")
+        ax.set_title(f"Prediction: {actual_model_to_run} Model")
+        ax.legend()
+        ax.grid(True, linestyle=':', alpha=0.7)
+        st.pyplot(fig)
+
+        st.caption(f"Panel updated in {(time.perf_counter() - panel_started) * 1000:.0f} ms")
+        record_timing("panel: Air Quality Predictor", panel_started)
+
+    predictor_panel(pollutant, target, actual_model_to_run, use_all_countries, df_prepared, country_cols,
+                    available_countries_for_pollutant, selected_country_for_view, selected_country_dummy_for_input)
 
 
 
     col1, col2, col3 = st.columns([1, 5, 1])
     with col1:
-        if st.button("⬅️ Previous"):
-            st.session_state["section"] = "Literature Review"
-            st.rerun()
+        st.button("⬅️ Previous", on_click=switch_section, args=("Literature Review",))
     with col3:
-        if st.button("Next ➡️"):
-            play_sound()
-            st.session_state["section"] = "Custom Regression Builder"
-            st.rerun()
+        st.button("Next ➡️", on_click=switch_section, args=("Custom Regression Builder",))
 
 
 elif section == "Custom Regression Builder":
@@ -851,18 +862,8 @@ elif section == "Custom Regression Builder":
         "This approach helps control for unobserved country-level differences and improves the reliability of OLS, Ridge, and Lasso models."
     )
 
-    import pathlib
-    import pandas as pd
-    import numpy as np
-    import matplotlib.pyplot as plt
-    from sklearn.linear_model import LinearRegression, Ridge, Lasso
-    from sklearn.ensemble import RandomForestRegressor
-
-    # Robust data import (relative to project root)
-    DATA_DIR = pathlib.Path(__file__).parent.parent / "data" / "processed"
-    aq = pd.read_csv(DATA_DIR / "AQ_annual_averages.csv")
-    vehicle = pd.read_csv(DATA_DIR / "combined_vehicle_data.csv")
-    data = aq.merge(vehicle, on=['Country', 'Year'], how='left')
+    # AQ x vehicle merge from the shared data layer (read once per process)
+    data = app_data.aq_vehicle()
 
     # --- User selects pollutant and which AnnualAvg_ column to use ---
     pollutants = sorted(data['Pollutant'].dropna().unique())
@@ -887,76 +888,124 @@ elif section == "Custom Regression Builder":
         default=["AF_fleet"]
     )
 
-    # Model selection
-    model_type = st.selectbox("Select model type", ["Linear Regression", "Ridge", "Lasso", "Random Forest"])
-    if model_type == "Ridge":
-        alpha = st.slider("Ridge alpha", 0.01, 10.0, 1.0)
-    if model_type == "Lasso":
-        alpha = st.slider("Lasso alpha", 0.01, 10.0, 0.1)
-    if model_type == "Random Forest":
-        n_estimators = st.slider("Number of trees", 10, 200, 100, step=10)
-
-    # Filter data
-    df = df[df['Country'].isin(selected_countries)].dropna(subset=[y_col] + x_vars + ["Country"])
-
-    # Add country fixed effects (AT as baseline)
-    if "AT" in df['Country'].unique():
-        df = pd.get_dummies(df, columns=['Country'], drop_first=True)
-        country_dummies = [col for col in df.columns if col.startswith("Country_")]
-    else:
-        # If AT not present, use first country alphabetically as baseline
-        df = pd.get_dummies(df, columns=['Country'], drop_first=True)
-        country_dummies = [col for col in df.columns if col.startswith("Country_")]
+    # Model choice, fit and plot form a fragment: changing the model or its hyperparameters
+    # reruns only this panel, not the whole page (the data selections above are passed in)
+    @st.fragment
+    def builder_panel(df, pollutant, y_col, selected_countries, x_vars):
+        panel_started = time.perf_counter()
+
+        # Model selection
+        model_type = st.selectbox("Select model type", ["Linear Regression", "Ridge", "Lasso", "Random Forest"])
+        if model_type == "Ridge":
+            alpha = st.slider("Ridge alpha", 0.01, 10.0, 1.0)
+        if model_type == "Lasso":
+            alpha = st.slider("Lasso alpha", 0.01, 10.0, 0.1)
+        if model_type == "Random Forest":
+            n_estimators = st.slider("Number of trees", 10, 200, 100, step=10)
+
+        # Filter data
+        df = df[df['Country'].isin(selected_countries)].dropna(subset=[y_col] + x_vars + ["Country"])
+
+        if len(df) > 5 and x_vars:
+            # Model fitting through the shared registry (app_models); country fixed effects
+            # (AT, or else the first country alphabetically, as baseline) only for OLS, Ridge, Lasso
+            model_names = {"Linear Regression": "LinearRegression", "Ridge": "Ridge", "Lasso": "Lasso", "Random Forest": "RandomForest"}
+            if model_type in ["Ridge", "Lasso"]:
+                # Read off the selection's regularization path (app_paths, computed once per selection)
+                # instead of refitting for every position of the alpha slider
+                reg_path = app_paths.get_path(pollutant, y_col, model_type, selected_countries, x_vars)
+                coef, intercept = app_paths.coef_at(reg_path, alpha)
+                y, y_pred = reg_path.y, app_paths.predict(reg_path, reg_path.X, alpha)
+                st.write(f"**R²:** {app_paths.r2_at(reg_path, alpha):.3f}")
+                st.write("**Coefficients:**")
+                st.json(dict(zip(reg_path.features, coef.tolist())))
+                st.write("**Intercept:**", intercept)
+            else:
+                if model_type == "Random Forest":
+                    # Grown incrementally per selection (app_forests): more trees only fit the new ones,
+                    # fewer trees reuse the first ones of the existing forest
+                    fitted = app_forests.get_forest(pollutant, y_col, n_estimators, selected_countries, x_vars)
+                else:
+                    fitted = app_models.get_model(pollutant, y_col, model_names[model_type],
+                                                  countries=selected_countries, features=x_vars)
+                model, y = fitted.model, fitted.y
+                y_pred = model.predict(fitted.X)
+                r2 = fitted.r2
+                st.write(f"**R²:** {r2:.3f}")
+                if model_type == "Linear Regression":
+                    # Coefficients with standard errors and p-values from the closed-form panel fit
+                    panel_fit = app_panel.get_panel([pollutant], [y_col], x_vars, selected_countries)[(pollutant, y_col)]
+                    st.write("**Coefficients:**")
+                    st.dataframe(pd.DataFrame({"Coef": panel_fit.coef, "SE": panel_fit.se, "t": panel_fit.t,
+                                               "p_value": panel_fit.p_value}, index=panel_fit.features))
+                if hasattr(model, "intercept_"):
+                    st.write("**Intercept:**", model.intercept_)
+            # Out-of-sample metrics of the same configuration
+            params = {}
+            if model_type in ["Ridge", "Lasso"]:
+                params = {"alpha": alpha}
+            elif model_type == "Random Forest":
+                params = {"n_estimators": n_estimators}
+            show_validation(pollutant, y_col, model_names[model_type], params, selected_countries, x_vars,
+                            fixed_effects=model_type != "Random Forest", key="builder_validation")
+            # Plot actual vs predicted
+            fig, ax = plt.subplots()
+            ax.scatter(y, y_pred, alpha=0.7)
+            ax.plot([y.min(), y.max()], [y.min(), y.max()], "r--")
+            ax.set_xlabel("Actual")
+            ax.set_ylabel("Predicted")
+            ax.set_title(f"Actual vs Predicted for {pollutant} ({y_col})")
+            st.pyplot(fig)
+            if model_type in ["Ridge", "Lasso"]:
+                # Coefficient paths and cross-validated error over the slider's alpha range, from the same path
+                fig, (ax_coef, ax_cv) = plt.subplots(1, 2, figsize=(11, 4))
+                for name, coefs in zip(reg_path.features, reg_path.coefs):
+                    if name.startswith("Country_"):
+                        ax_coef.plot(reg_path.alphas, coefs, color="lightgray", linewidth=0.8)
+                    else:
+                        ax_coef.plot(reg_path.alphas, coefs, label=name)
+                ax_coef.axvline(alpha, color="red", linestyle="--")
+                ax_coef.set_xscale("log")
+                ax_coef.set_xlabel("alpha")
+                ax_coef.set_ylabel("Coefficient")
+                ax_coef.set_title("Coefficient path (country effects in gray)")
+                ax_coef.legend()
+                cv_label = "leave-one-out" if model_type == "Ridge" else f"{app_paths.CV_FOLDS}-fold"
+                ax_cv.plot(reg_path.alphas, reg_path.cv_mse)
+                ax_cv.axvline(alpha, color="red", linestyle="--", label=f"alpha = {alpha:.2f}")
+                ax_cv.axvline(app_paths.best_alpha(reg_path), color="green", linestyle=":",
+                              label=f"lowest CV error (alpha = {app_paths.best_alpha(reg_path):.2f})")
+                ax_cv.set_xscale("log")
+                ax_cv.set_xlabel("alpha")
+                ax_cv.set_ylabel("Mean squared error")
+                ax_cv.set_title(f"Cross-validated error ({cv_label})")
+                ax_cv.legend()
+                fig.tight_layout()
+                st.pyplot(fig)
+            if model_type == "Random Forest":
+                # Out-of-bag R² over the trees grown so far for this selection
+                tree_counts, oob_r2 = app_forests.oob_curve(pollutant, y_col, selected_countries, x_vars)
+                fig, ax = plt.subplots(figsize=(8, 3.5))
+                ax.plot(tree_counts, oob_r2)
+                ax.axvline(n_estimators, color="red", linestyle="--", label=f"{n_estimators} trees")
+                ax.set_xlabel("Number of trees")
+                ax.set_ylabel("Out-of-bag R²")
+                ax.set_title("Out-of-bag R² by number of trees")
+                ax.legend()
+                st.pyplot(fig)
+        else:
+            st.info("Select at least one X variable and enough data.")
 
-    # Only add country dummies for OLS, Ridge, Lasso
-    if model_type in ["Linear Regression", "Ridge", "Lasso"]:
-        X = df[x_vars + country_dummies]
-    else:
-        X = df[x_vars]
-    y = df[y_col]
-
-    if len(df) > 5 and x_vars:
-        # Model fitting
-        if model_type == "Linear Regression":
-            model = LinearRegression()
-        elif model_type == "Ridge":
-            model = Ridge(alpha=alpha)
-        elif model_type == "Lasso":
-            model = Lasso(alpha=alpha)
-        elif model_type == "Random Forest":
-            model = RandomForestRegressor(n_estimators=n_estimators, random_state=42)
-        model.fit(X, y)
-        y_pred = model.predict(X)
-        r2 = model.score(X, y)
-        st.write(f"**R²:** {r2:.3f}")
-        if hasattr(model, "coef_"):
-            st.write("**Coefficients:**")
-            coef_dict = dict(zip(X.columns, model.coef_))
-            st.json(coef_dict)
-        if hasattr(model, "intercept_"):
-            st.write("**Intercept:**", model.intercept_)
-        # Plot actual vs predicted
-        fig, ax = plt.subplots()
-        ax.scatter(y, y_pred, alpha=0.7)
-        ax.plot([y.min(), y.max()], [y.min(), y.max()], "r--")
-        ax.set_xlabel("Actual")
-        ax.set_ylabel("Predicted")
-        ax.set_title(f"Actual vs Predicted for {pollutant} ({y_col})")
-        st.pyplot(fig)
-    else:
-        st.info("Select at least one X variable and enough data.")
+        st.caption(f"Panel updated in {(time.perf_counter() - panel_started) * 1000:.0f} ms")
+        record_timing("panel: Custom Regression Builder", panel_started)
+
+    builder_panel(df, pollutant, y_col, selected_countries, x_vars)
 
     col1, col2, col3 = st.columns([1, 5, 1])
     with col1:
-        if st.button("⬅️ Previous"):
-            play_sound()
-            st.session_state["section"] = "Air Quality Predictor"
-            st.rerun()
+        st.button("⬅️ Previous", on_click=switch_section, args=("Air Quality Predictor",))
     with col3:
-        if st.button("Next ➡️"):
-            play_sound()
-            st.session_state["section"] = "Discussion"
-            st.rerun()
+        st.button("Next ➡️", on_click=switch_section, args=("Discussion",))
 
 elif section == "Literature Review":
     st.title("Literature Review")
@@ -1020,15 +1069,9 @@ elif section == "Literature Review":
 
     col1, col2, col3 = st.columns([1, 5, 1])
     with col1:
-        if st.button("⬅️ Previous"):
-            play_sound()
-            st.session_state["section"] = "Analysis"
-            st.rerun()
+        st.button("⬅️ Previous", on_click=switch_section, args=("Analysis",))
     with col3:
-        if st.button("Next ➡️"):
-            play_sound()
-            st.session_state["section"] = "Air Quality Predictor"
-            st.rerun()
+        st.button("Next ➡️", on_click=switch_section, args=("Air Quality Predictor",))
 
 
 elif section == "Discussion":
@@ -1056,7 +1099,7 @@ elif section == "Discussion":
     - **EVs**: The production of EV batteries requires the extraction of rare earth elements and minerals like lithium, cobalt, and nickel. Mining these materials can lead to deforestation, water contamination, and human rights concerns in mining regions.
     """)
 
-    st.image("https://media.giphy.com/media/v1.Y2lkPTc5MGI3NjExdXQxbTBmMTRsOGtxM2ZxbGFoc2dkanY5aWM4YnFrMXNzdGM2djRuMiZlcD12MV9naWZzX3NlYXJjaCZjdD1n/282FVV3gOTojMwgcDm/giphy.gif", caption="Mining for EV batteries: A hidden environmental cost?", use_container_width =True)
+    show_animation("battery_mining", caption="Mining for EV batteries: A hidden environmental cost?")
 
 
     st.subheader("What We Didn't Measure")
@@ -1073,19 +1116,13 @@ elif section == "Discussion":
 
 
     # Add a motivational GIF or image
-    st.image("https://media.giphy.com/media/v1.Y2lkPTc5MGI3NjExdWloOWNlazZ6eDVzaG91M2F4YTRxaDd4enhlZnBiMXQxaHI2d2M5dCZlcD12MV9naWZzX3NlYXJjaCZjdD1n/Vfhj19PusenfO/giphy.gif", caption="The road to cleaner air is a journey worth taking!", use_container_width =True)
+    show_animation("road_journey", caption="The road to cleaner air is a journey worth taking!")
 
     col1, col2, col3 = st.columns([1, 5, 1])
     with col1:
-        if st.button("⬅️ Previous"):
-            play_sound()
-            st.session_state["section"] = "Custom Regression Builder"
-            st.rerun()
+        st.button("⬅️ Previous", on_click=switch_section, args=("Custom Regression Builder",))
     with col3:
-        if st.button("Next ➡️"):
-            play_sound()
-            st.session_state["section"] = "Conclusions"
-            st.rerun()
+        st.button("Next ➡️", on_click=switch_section, args=("Conclusions",))
 
 
 elif section == "Conclusions":
@@ -1103,7 +1140,7 @@ elif section == "Conclusions":
     - **Correlation ≠ causation**: Our models reveal patterns, but we cannot say definitively that EVs caused these changes—structural and behavioral factors remain critical.
     """)
 
-    st.image("https://media.giphy.com/media/xTiTnHXbRoaZ1B1Mo8/giphy.gif", caption="The road ahead: data-powered and cleaner 🌱", use_container_width=True)
+    show_animation("road_ahead", caption="The road ahead: data-powered and cleaner 🌱")
 
     st.subheader("🚀 Next Actionable Moves")
     st.markdown("""
@@ -1128,11 +1165,11 @@ elif section == "Conclusions":
     These lessons will serve us well in future data science projects, both academic and professional!    
     """)
 
-    st.image("https://media.giphy.com/media/v1.Y2lkPTc5MGI3NjExYmgwa3RmcDgzbXQ3MTMwNmxxNTF6Z2I0NmZrbzhmMDEya3d4cHp4MCZlcD12MV9naWZzX3NlYXJjaCZjdD1n/5C472t1RGNuq4/giphy.gif", caption="Alas, we move forward!", use_container_width=True)
+    show_animation("move_forward", caption="Alas, we move forward!")
 
     col1, col2, col3 = st.columns([1, 5, 1])
     with col1:
-        if st.button("⬅️ Previous"):
-            play_sound()
-            st.session_state["section"] = "Discussion"
-            st.rerun()
\ No newline at end of file
+        st.button("⬅️ Previous", on_click=switch_section, args=("Discussion",))
+
+# Duration of this full script run, listed in the sidebar from the next run on
+record_timing(f"page: {section}", _run_started)
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import sklearn
+
+import app_data
+
+# On-disk store of pre-trained models for the Streamlit app.
+# `python src/app_artifacts.py` fits every pollutant x AnnualAvg target x model
+# type the app offers with default settings (see build_specs) and writes each as a
+# compressed joblib file with a JSON sidecar (R², feature order, hyperparameters,
+# data fingerprint, versions) and its prediction surface as a plain .npy file
+# (see app_models.prediction_surface). The model registry (app_models) loads a single
+# artifact when a configuration is first requested and only fits live if there
+# is no artifact or it is stale (other data, sklearn version or format version).
+
+ARTIFACT_DIR = app_data.BASE_DIR / "models"
+ARTIFACT_VERSION = 1
+
+
+def artifact_name(key):
+    # The data fingerprint (last element of the key) is not part of the name but
+    # checked against the metadata, so a rebuild overwrites the old artifact
+    return hashlib.sha1(repr(key[:-1]).encode()).hexdigest()[:16]
+
+
+def save_artifact(key, fitted, artifact_dir=ARTIFACT_DIR, surface=None, **extra):
+    """Write a fitted model (app_models.FittedModel), its metadata and optionally its prediction surface."""
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+    name = artifact_name(key)
+    pollutant, target, model_type, params, countries, features, fixed_effects, data = key
+    meta = {
+        "version": ARTIFACT_VERSION,
+        "sklearn": sklearn.__version__,
+        "pollutant": pollutant,
+        "target": target,
+        "model_type": model_type,
+        "params": dict(params),
+        "countries": list(countries) if countries is not None else None,
+        "fixed_effects": fixed_effects,
+        "features": fitted.features,
+        "data": list(data),
+        "r2": fitted.r2,
+        "n_samples": len(fitted.y),
+        "surface_step": None,
+        **extra,
+    }
+    if surface is not None:
+        # Uncompressed so it can be memory-mapped
+        np.save(artifact_dir / f"{name}.surface.npy", surface.values)
+        meta["surface_step"] = float(surface.grid[1] - surface.grid[0])
+    joblib.dump(fitted.model, artifact_dir / f"{name}.joblib", compress=3)
+    (artifact_dir / f"{name}.json").write_text(json.dumps(meta, indent=1))
+    return name
+
+
+def _metadata(key, artifact_dir):
+    # Metadata of the artifact for this key, None if missing or stale
+    meta_path = artifact_dir / f"{artifact_name(key)}.json"
+    if not meta_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text())
+    if (meta["version"] != ARTIFACT_VERSION or meta["sklearn"] != sklearn.__version__
+            or meta["data"] != list(key[-1])):
+        return None
+    return meta
+
+
+def load_artifact(key, artifact_dir=ARTIFACT_DIR):
+    """(model, metadata) for this key, or None if there is no up-to-date artifact."""
+    meta = _metadata(key, artifact_dir)
+    if meta is None:
+        return None
+    return joblib.load(artifact_dir / f"{artifact_name(key)}.joblib"), meta
+
+
+def load_surface(key, step, artifact_dir=ARTIFACT_DIR):
+    """Memory-mapped prediction surface values for this key and grid step, or None."""
+    meta = _metadata(key, artifact_dir)
+    if meta is None or meta.get("surface_step") is None or not np.isclose(meta["surface_step"], step):
+        return None
+    return np.load(artifact_dir / f"{artifact_name(key)}.surface.npy", mmap_mode="r")
+
+
+def build_specs(per_country=True):
+    """
+    Every configuration the app asks for with its default settings, as get_model arguments.
+
+    All countries with country fixed effects (Predictor, Regression Builder) and, for the
+    Builder's Random Forest, without; with per_country also each single country on its
+    own (Builder with one country selected, fixed effects off for Random Forest).
+    """
+    data = app_data.aq_vehicle()
+    targets = [col for col in data.columns if col.startswith("AnnualAvg_")]
+    model_types = ["LinearRegression", "Ridge", "Lasso", "RandomForest"]
+    specs = []
+    for pollutant in sorted(data["Pollutant"].dropna().unique()):
+        # Same country set as the Predictor uses for this pollutant
+        countries = sorted(data.loc[data["Pollutant"] == pollutant, "Country"].dropna().unique())
+        for target in targets:
+            for model_type in model_types:
+                specs.append((pollutant, target, model_type, countries, True))
+            specs.append((pollutant, target, "RandomForest", countries, False))
+            if per_country:
+                for country in countries:
+                    for model_type in model_types:
+                        specs.append((pollutant, target, model_type, [country], model_type != "RandomForest"))
+    return specs
+
+
+def _build_task(spec, artifact_dir):
+    import app_models
+
+    pollutant, target, model_type, countries, fixed_effects = spec
+    key = app_models.model_key(pollutant, target, model_type, countries=countries, fixed_effects=fixed_effects)
+    t0 = time.perf_counter()
+    fitted = app_models.fit_model(pollutant, target, model_type, countries=countries, fixed_effects=fixed_effects)
+    if len(fitted.y) == 0:
+        return None
+    fit_seconds = round(time.perf_counter() - t0, 3)
+    return save_artifact(key, fitted, artifact_dir, app_models.prediction_surface(fitted), fit_seconds=fit_seconds)
+
+
+def build_all(artifact_dir=ARTIFACT_DIR, per_country=True, workers=1):
+    """Fit and store every configuration from build_specs on `workers` processes. Returns the artifact names."""
+    specs = build_specs(per_country)
+    if workers <= 1:
+        names = [_build_task(spec, artifact_dir) for spec in specs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            names = list(pool.map(_build_task, specs, [artifact_dir] * len(specs), chunksize=8))
+    return [name for name in names if name is not None]
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import pathlib
+
+    parser = argparse.ArgumentParser(description="Pre-train the app's models and store them as artifacts.")
+    parser.add_argument("--output", default=str(ARTIFACT_DIR), help="Artifact directory")
+    parser.add_argument("--no-per-country", action="store_true", help="Only build the all-countries models")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    args = parser.parse_args()
+
+    built = build_all(pathlib.Path(args.output), per_country=not args.no_per_country, workers=args.workers)
+    print(f"Wrote {len(built)} model artifacts to {args.output}")
@@ -0,0 +1,161 @@
+import base64
+import io
+import json
+import pathlib
+import shutil
+import subprocess
+import urllib.parse
+import urllib.request
+import warnings
+
+import app_data
+
+# Local copies of the app's remote media (giphy GIFs, navigation beep).
+# assets/manifest.json lists every remote file the app shows, under a short name.
+# `python src/app_assets.py` downloads each one once into assets/media/ and
+# writes size-capped versions of the animations: a GIF at most MAX_WIDTH wide
+# and MAX_ANIMATION_BYTES large (frames are dropped if resizing is not enough),
+# plus an MP4 when ffmpeg is available. The app then serves everything from
+# disk, so page loads no longer wait on (or time out against) external CDNs;
+# media that were never fetched fall back to their remote URL.
+
+ASSETS_DIR = app_data.BASE_DIR / "assets"
+MANIFEST_PATH = ASSETS_DIR / "manifest.json"
+MEDIA_DIR = ASSETS_DIR / "media"
+
+MAX_WIDTH = 480  # pixels
+MAX_ANIMATION_BYTES = 1_500_000
+USER_AGENT = "Mozilla/5.0 (DSML asset bundler)"
+
+_data_uris = {}  # (path, mtime) -> data URI
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """{name: {"url": ..., "type": "animation" | "audio"}}"""
+    return json.loads(pathlib.Path(path).read_text())
+
+
+def url(name, manifest_path=MANIFEST_PATH):
+    return load_manifest(manifest_path)[name]["url"]
+
+
+def _download_path(name, entry, media_dir):
+    suffix = pathlib.PurePosixPath(urllib.parse.urlparse(entry["url"]).path).suffix
+    return media_dir / f"{name}{suffix}"
+
+
+def fetch(name, entry, media_dir=MEDIA_DIR, refresh=False, timeout=30):
+    """Download one manifest entry unless it is already on disk. Returns the local path."""
+    target = _download_path(name, entry, media_dir)
+    if target.exists() and not refresh:
+        return target
+    media_dir.mkdir(parents=True, exist_ok=True)
+    request = urllib.request.Request(entry["url"], headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        data = response.read()
+    tmp = target.with_suffix(target.suffix + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(target)
+    return target
+
+
+def cap_gif(source, target, max_width=MAX_WIDTH, max_bytes=MAX_ANIMATION_BYTES):
+    """
+    Write `source` (an animated GIF) to `target` at most max_width wide and max_bytes large.
+
+    Tries the full frame rate at decreasing widths first, then every 2nd and 4th frame
+    (with the durations summed so the animation keeps its speed). Returns the size in bytes.
+    Raises ValueError, without writing `target`, if no combination fits in max_bytes.
+    """
+    # Only needed when bundling, not for serving the files
+    from PIL import Image, ImageSequence
+
+    with Image.open(source) as image:
+        frames = [frame.convert("RGBA") for frame in ImageSequence.Iterator(image)]
+        durations = [frame.info.get("duration", 100) for frame in ImageSequence.Iterator(image)]
+    widths = sorted({min(width, max_width, frames[0].width) for width in (max_width, 360, 240)}, reverse=True)
+    for step, width in [(step, width) for step in (1, 2, 4) for width in widths]:
+        size = (width, max(1, round(frames[0].height * width / frames[0].width)))
+        kept = [frame.resize(size, Image.LANCZOS) for frame in frames[::step]]
+        kept_durations = [sum(durations[i:i + step]) for i in range(0, len(frames), step)]
+        out = io.BytesIO()
+        kept[0].save(out, "GIF", save_all=True, append_images=kept[1:], duration=kept_durations,
+                     loop=0, optimize=True, disposal=2)
+        data = out.getvalue()
+        if len(data) <= max_bytes:
+            target.write_bytes(data)
+            return len(data)
+    raise ValueError(f"{source} is {len(data)} bytes at {width}px and every {step}th frame, "
+                     f"still above the {max_bytes} byte cap")
+
+
+def to_mp4(source, target, max_width=MAX_WIDTH):
+    """Transcode an animation to H.264 MP4 with ffmpeg. Returns False if ffmpeg is not installed."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return False
+    subprocess.run([
+        ffmpeg, "-y", "-loglevel", "error", "-i", str(source), "-movflags", "faststart", "-pix_fmt", "yuv420p",
+        "-vf", f"scale='min({max_width},iw)':-2", "-an", str(target),
+    ], check=True)
+    return True
+
+
+def bundle(manifest_path=MANIFEST_PATH, media_dir=MEDIA_DIR, refresh=False):
+    """Fetch every manifest entry and write the capped animation versions. Returns {name: {file: bytes}}."""
+    sizes = {}
+    for name, entry in load_manifest(manifest_path).items():
+        source = fetch(name, entry, media_dir, refresh)
+        files = [source]
+        if entry["type"] == "animation":
+            capped = media_dir / f"{name}.capped.gif"
+            if refresh or not capped.exists():
+                try:
+                    cap_gif(source, capped)
+                except ValueError as error:
+                    # animation() then serves the MP4 or the original GIF instead
+                    warnings.warn(f"No capped GIF for {name}: {error}")
+                    capped.unlink(missing_ok=True)
+            if capped.exists():
+                files.append(capped)
+            mp4 = media_dir / f"{name}.mp4"
+            if (refresh or not mp4.exists()) and not to_mp4(source, mp4):
+                mp4 = None
+            if mp4 is not None:
+                files.append(mp4)
+        sizes[name] = {path.name: path.stat().st_size for path in files}
+    return sizes
+
+
+def animation(name, media_dir=MEDIA_DIR):
+    """Best local version of an animation (MP4, capped GIF, original GIF) or None if it was never fetched."""
+    for candidate in (f"{name}.mp4", f"{name}.capped.gif", f"{name}.gif"):
+        if (media_dir / candidate).exists():
+            return media_dir / candidate
+    return None
+
+
+def audio_src(name, media_dir=MEDIA_DIR, manifest_path=MANIFEST_PATH):
+    """`src` for an <audio> tag: the local file as a data URI, or the remote URL if it was never fetched."""
+    entry = load_manifest(manifest_path)[name]
+    path = _download_path(name, entry, media_dir)
+    if not path.exists():
+        return entry["url"]
+    key = (path, path.stat().st_mtime_ns)
+    if key not in _data_uris:
+        mimetype = "audio/mpeg" if path.suffix == ".mp3" else f"audio/{path.suffix.lstrip('.')}"
+        _data_uris[key] = f"data:{mimetype};base64,{base64.b64encode(path.read_bytes()).decode()}"
+    return _data_uris[key]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Download the app's remote media once and write size-capped versions.")
+    parser.add_argument("--manifest", default=str(MANIFEST_PATH), help="Asset manifest (JSON)")
+    parser.add_argument("--output", default=str(MEDIA_DIR), help="Folder for the local media")
+    parser.add_argument("--refresh", action="store_true", help="Download and transcode again even if present")
+    args = parser.parse_args()
+
+    for name, files in bundle(pathlib.Path(args.manifest), pathlib.Path(args.output), args.refresh).items():
+        print(f"{name}: " + ", ".join(f"{file} {size / 1e3:.0f} kB" for file, size in files.items()))
@@ -0,0 +1,112 @@
+import hashlib
+import pathlib
+import threading
+
+import pandas as pd
+
+# Data access layer for the Streamlit app.
+# Every section gets its tables from here instead of calling pd.read_csv itself.
+# Each table (and the AQ x vehicle merge) is read once per server process and
+# kept until its file changes: on every access only os.stat is called, and the
+# file is only hashed (and re-read if the content differs) when size or mtime
+# changed. Callers get their own copy, so their changes never reach the cached
+# frame: a shallow one where pandas' copy-on-write is on (always from pandas 3),
+# a deep one otherwise (pandas 2.x defaults, e.g. the python=3.10 environment.yml).
+
+BASE_DIR = pathlib.Path(__file__).parent.parent  # DSML/
+PROCESSED_DIR = BASE_DIR / "data" / "processed"
+RESULTS_DIR = BASE_DIR / "results"
+FIGURES_DIR = BASE_DIR / "figures"
+
+TABLES = {
+    "aq_annual": PROCESSED_DIR / "AQ_annual_averages.csv",
+    "vehicle": PROCESSED_DIR / "combined_vehicle_data.csv",
+    "best_results": RESULTS_DIR / "best_model_per_pollutant_target.csv",
+    "worst_results": RESULTS_DIR / "worst_model_per_pollutant_target.csv",
+    "model_results": RESULTS_DIR / "model_results_summary.csv",
+    "ev_comparison": FIGURES_DIR / "EDA" / "ev_country_comparison.csv",
+}
+
+_lock = threading.RLock()
+_files = {}  # path -> {"stat": (size, mtime), "hash": sha256, "frame": DataFrame}
+_derived = {}  # name -> (input hashes, DataFrame)
+_stats = {"reads": 0, "hits": 0}
+
+
+def _copy_on_write():
+    return int(pd.__version__.split(".")[0]) >= 3 or pd.options.mode.copy_on_write is True
+
+
+def _copy(frame):
+    # Without copy-on-write a shallow copy shares its arrays with the cache, so
+    # df.loc[...] = ... or fillna(inplace=True) would change every later read
+    return frame.copy(deep=not _copy_on_write())
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load(path):
+    # Returns the cached entry for path, re-reading the file only if its content changed
+    path = pathlib.Path(path)
+    stat = path.stat()
+    key = (stat.st_size, stat.st_mtime_ns)
+    entry = _files.get(path)
+    if entry is not None and entry["stat"] == key:
+        _stats["hits"] += 1
+        return entry
+    digest = _file_hash(path)
+    if entry is not None and entry["hash"] == digest:
+        # Touched but not changed
+        entry["stat"] = key
+        _stats["hits"] += 1
+        return entry
+    entry = {"stat": key, "hash": digest, "frame": pd.read_csv(path)}
+    _files[path] = entry
+    _stats["reads"] += 1
+    return entry
+
+
+def path(name):
+    """File path of a named table."""
+    return TABLES[name]
+
+
+def exists(name):
+    return TABLES[name].exists()
+
+
+def fingerprint(name):
+    """Content hash of a named table (changes only when the file content changes)."""
+    with _lock:
+        return _load(TABLES[name])["hash"]
+
+
+def table(name):
+    """A named table (see TABLES). Raises FileNotFoundError if the file is missing."""
+    with _lock:
+        return _copy(_load(TABLES[name])["frame"])
+
+
+def aq_vehicle():
+    """AQ annual averages merged with the vehicle data on Country and Year (left join)."""
+    with _lock:
+        aq = _load(TABLES["aq_annual"])
+        vehicle = _load(TABLES["vehicle"])
+        inputs = (aq["hash"], vehicle["hash"])
+        cached = _derived.get("aq_vehicle")
+        if cached is None or cached[0] != inputs:
+            merged = pd.merge(aq["frame"], vehicle["frame"], on=["Country", "Year"], how="left")
+            cached = _derived["aq_vehicle"] = (inputs, merged)
+        return _copy(cached[1])
+
+
+def cache_info():
+    """Number of file reads and cache hits since the process started."""
+    with _lock:
+        return dict(_stats, files=len(_files))
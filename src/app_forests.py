@@ -0,0 +1,111 @@
+import copy
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+import app_models
+
+# Incrementally grown Random Forests for the Regression Builder's "Number of trees" slider.
+# One forest is kept per data selection (pollutant, target, countries, features).
+# Asking for more trees than it has fits only the additional ones (warm start,
+# built in parallel on all cores); asking for fewer serves the first n trees of
+# the existing ensemble. Because a warm-started forest draws the seeds of its new
+# trees after those of the existing ones, the first n trees are exactly the
+# forest RandomForestRegressor(n_estimators=n, random_state=42) would fit from
+# scratch - the same model the registry would return. The out-of-bag
+# predictions of every tree are kept too, for the OOB R² as a function of tree count.
+
+MAX_FORESTS = 16
+RANDOM_STATE = 42
+
+_lock = threading.RLock()
+_forests = OrderedDict()  # selection key -> {"forest", "data", "oob_predictions", "oob_masks"}
+_stats = {"trees_fitted": 0, "trees_reused": 0}
+
+
+def _selection_key(pollutant, target, countries, features, fixed_effects):
+    return app_models.model_key(pollutant, target, "RandomForest", {"n_estimators": None}, countries, features,
+                                fixed_effects)
+
+
+def _entry(pollutant, target, countries, features, fixed_effects):
+    key = _selection_key(pollutant, target, countries, features, fixed_effects)
+    if key in _forests:
+        _forests.move_to_end(key)
+        return _forests[key]
+    forest = RandomForestRegressor(n_estimators=0, warm_start=True, n_jobs=-1, random_state=RANDOM_STATE)
+    data = app_models.training_data(pollutant, target, countries, features, fixed_effects)
+    entry = _forests[key] = {"forest": forest, "data": data, "oob_predictions": [], "oob_masks": []}
+    while len(_forests) > MAX_FORESTS:
+        _forests.popitem(last=False)
+    return entry
+
+
+def _grow(entry, n_estimators):
+    # Fit the trees beyond the current ones and record their out-of-bag predictions
+    forest = entry["forest"]
+    X, y = entry["data"][:2]
+    have = len(getattr(forest, "estimators_", []))
+    if n_estimators <= have:
+        return
+    forest.set_params(n_estimators=n_estimators)
+    forest.fit(X, y)
+    for tree, in_bag in zip(forest.estimators_[have:], forest.estimators_samples_[have:]):
+        mask = np.ones(len(y), dtype=bool)
+        mask[in_bag] = False
+        entry["oob_predictions"].append(tree.predict(X.astype(np.float32)))
+        entry["oob_masks"].append(mask)
+    _stats["trees_fitted"] += n_estimators - have
+
+
+def get_forest(pollutant, target, n_estimators, countries=None, features=("AF_fleet",), fixed_effects=False):
+    """A Random Forest with n_estimators trees for this selection, as an app_models.FittedModel."""
+    with _lock:
+        entry = _entry(pollutant, target, countries, features, fixed_effects)
+        X, y, feature_names, index = entry["data"]
+        if len(y) == 0:
+            return app_models.FittedModel(entry["forest"], feature_names, X, y, index, np.nan)
+        _stats["trees_reused"] += min(n_estimators, len(entry["oob_masks"]))
+        _grow(entry, n_estimators)
+        # Shallow copy sharing the fitted trees, cut to the first n_estimators
+        model = copy.copy(entry["forest"])
+        model.estimators_ = entry["forest"].estimators_[:n_estimators]
+        model.n_estimators = n_estimators
+        return app_models.FittedModel(model, feature_names, X, y, index, model.score(X, y))
+
+
+def oob_curve(pollutant, target, countries=None, features=("AF_fleet",), fixed_effects=False):
+    """
+    (tree counts, OOB R²) for 1 .. all trees grown so far for this selection.
+
+    The OOB R² at k trees uses the samples that are out of bag for at least one of the first k trees.
+    """
+    with _lock:
+        entry = _entry(pollutant, target, countries, features, fixed_effects)
+        if not entry["oob_masks"]:
+            return np.array([], dtype=int), np.array([])
+        y = entry["data"][1]
+        masks = np.array(entry["oob_masks"])
+        sums = np.cumsum(np.array(entry["oob_predictions"]) * masks, axis=0)
+        counts = np.cumsum(masks, axis=0)
+    scores = np.full(len(masks), np.nan)
+    for k in range(len(masks)):
+        covered = counts[k] > 0
+        if covered.sum() > 1:
+            predictions = sums[k, covered] / counts[k, covered]
+            observed = y[covered]
+            scores[k] = 1.0 - ((observed - predictions) ** 2).sum() / ((observed - observed.mean()) ** 2).sum()
+    return np.arange(1, len(masks) + 1), scores
+
+
+def forest_info():
+    """Trees fitted and trees reused from earlier requests since the process started, and forests held."""
+    with _lock:
+        return dict(_stats, forests=len(_forests), trees=sum(len(entry["oob_masks"]) for entry in _forests.values()))
+
+
+def clear():
+    with _lock:
+        _forests.clear()
@@ -0,0 +1,99 @@
+import hashlib
+import io
+import pathlib
+import threading
+
+from PIL import Image
+
+import app_data
+
+# Image renditions for the app's figure galleries.
+# The EDA and Analysis sections used to send the full-resolution PNGs from
+# figures/ on every rerun. Here each figure is converted once into smaller
+# renditions - a display width matching the centered page layout - as palette
+# (quantized) PNGs. st.image passes PNG bytes through as they are, whereas WebP
+# would be decoded and re-encoded on every rerun. Files are named after
+# the hash of the source image, so an updated figure gets new renditions and
+# stale ones are never served. Rendition bytes are kept in memory by the server
+# process; the original is only read when the full-resolution view is requested.
+# `python src/app_images.py` builds the renditions for all figures ahead of time.
+
+RENDITIONS_DIR = app_data.FIGURES_DIR / "renditions"
+WIDTHS = {"display": 800}  # pixels
+FORMAT = "PNG"
+
+_lock = threading.Lock()
+_bytes = {}  # (source path, size, mtime, width name) -> rendition bytes
+_hashes = {}  # (source path, size, mtime) -> source hash
+
+
+def _source_hash(path):
+    stat = path.stat()
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _hashes:
+        _hashes[key] = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+    return key, _hashes[key]
+
+
+def _encode(image, width):
+    if image.width > width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    out = io.BytesIO()
+    image = image.convert("RGBA").quantize(256) if image.mode in ("RGB", "RGBA") else image
+    image.save(out, FORMAT, optimize=True)
+    return out.getvalue()
+
+
+def rendition_path(path, width="display", renditions_dir=RENDITIONS_DIR):
+    """Path of the rendition of an image for a width in WIDTHS, created on first use."""
+    path = pathlib.Path(path)
+    _, digest = _source_hash(path)
+    target = renditions_dir / f"{path.stem}.{digest}.{WIDTHS[width]}.{FORMAT.lower()}"
+    if not target.exists():
+        renditions_dir.mkdir(parents=True, exist_ok=True)
+        with Image.open(path) as image:
+            data = _encode(image, WIDTHS[width])
+        tmp = target.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(target)
+    return target
+
+
+def rendition(path, width="display", renditions_dir=RENDITIONS_DIR):
+    """Bytes of the rendition of an image (see rendition_path), cached in memory."""
+    path = pathlib.Path(path)
+    with _lock:
+        key, _ = _source_hash(path)
+        key = (*key, width)
+        if key not in _bytes:
+            _bytes[key] = rendition_path(path, width, renditions_dir).read_bytes()
+        return _bytes[key]
+
+
+def original(path):
+    """Bytes of the full-resolution image."""
+    return pathlib.Path(path).read_bytes()
+
+
+def build_renditions(figures_dir=app_data.FIGURES_DIR, renditions_dir=RENDITIONS_DIR):
+    """Create all renditions of every PNG below figures_dir. Returns (source bytes, rendition bytes) per width."""
+    totals = {width: [0, 0] for width in WIDTHS}
+    for path in sorted(figures_dir.rglob("*.png")):
+        if renditions_dir in path.parents:
+            continue
+        for width in WIDTHS:
+            totals[width][0] += path.stat().st_size
+            totals[width][1] += rendition_path(path, width, renditions_dir).stat().st_size
+    return totals
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the display renditions of the app's figures.")
+    parser.add_argument("--figures", default=str(app_data.FIGURES_DIR), help="Folder with the source PNGs")
+    parser.add_argument("--output", default=str(RENDITIONS_DIR), help="Folder for the renditions")
+    args = parser.parse_args()
+
+    for width, (source, rendered) in build_renditions(pathlib.Path(args.figures), pathlib.Path(args.output)).items():
+        print(f"{width:<10} {WIDTHS[width]:>5}px  {source / 1e6:6.1f} MB -> {rendered / 1e6:6.2f} MB ({FORMAT})")
@@ -0,0 +1,83 @@
+import importlib
+import pathlib
+import subprocess
+import sys
+import threading
+import time
+
+# Lazy, timed imports for the Streamlit app.
+# app.py binds its heavy dependencies (matplotlib, the model registry and with it
+# sklearn) with lazy("module") instead of a top-level import, so the module is only
+# imported when a section first touches it and the text-only sections never pay
+# for it. Each import made through here is timed (including the modules it pulls
+# in); report() lists them for the running server, and `python src/app_imports.py`
+# measures the cold import time of every app dependency in a fresh interpreter.
+
+# Modules imported by app.py, in the order they are checked by the CLI report
+APP_MODULES = ["streamlit", "pandas", "numpy", "app_data", "matplotlib.pyplot", "app_models", "sklearn.ensemble"]
+
+SRC_DIR = pathlib.Path(__file__).parent  # DSML/src/
+
+_lock = threading.RLock()
+_timings = {}  # module name -> seconds
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = load(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._name in sys.modules else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def load(name):
+    """Import a module now, recording how long it took if this process had not imported it yet."""
+    with _lock:
+        if name in sys.modules:
+            return sys.modules[name]
+        t0 = time.perf_counter()
+        module = importlib.import_module(name)
+        _timings[name] = time.perf_counter() - t0
+        return module
+
+
+def lazy(name):
+    return LazyModule(name)
+
+
+def is_loaded(name):
+    return name in sys.modules
+
+
+def report():
+    """Imports made through this module in the running process: [(module, seconds)], slowest first."""
+    with _lock:
+        return sorted(_timings.items(), key=lambda item: -item[1])
+
+
+def cold_import_times(modules=APP_MODULES):
+    """Import time of each module in a fresh interpreter (includes everything it imports), in seconds."""
+    times = {}
+    for name in modules:
+        code = (f"import sys, time; sys.path.insert(0, {str(SRC_DIR)!r}); "
+                f"t = time.perf_counter(); import {name}; print(time.perf_counter() - t)")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        times[name] = float(result.stdout) if result.returncode == 0 else None
+    return times
+
+
+if __name__ == "__main__":
+    for name, seconds in cold_import_times().items():
+        print(f"{name:<20} {'import failed' if seconds is None else f'{seconds * 1000:8.1f} ms'}")
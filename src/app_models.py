@@ -0,0 +1,187 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+
+import app_artifacts
+import app_data
+
+# Model registry for the Streamlit app.
+# The Air Quality Predictor and the Custom Regression Builder both fit
+# per-pollutant regressions with country fixed effects. Fitted models are kept
+# here under a compact key - (pollutant, target, model type, hyperparameters,
+# country set, features, fixed effects, data fingerprint) - instead of letting
+# st.cache_resource hash the training DataFrame on every rerun. The registry is
+# shared by both sections and by all sessions of the server process, holds at
+# most MAX_MODELS models (least recently used are evicted) and counts hits/misses.
+# On a miss the pre-trained artifact for the key (app_artifacts) is loaded if
+# there is an up-to-date one; only otherwise is the model fitted here.
+# For the Predictor each model also gets a prediction surface: its predictions
+# over the whole AF_fleet range for every country, computed in one predict call,
+# so the slider is answered by a lookup instead of running the model.
+
+MAX_MODELS = 64
+SURFACE_STEP = 0.1  # AF_fleet grid spacing (%) of the prediction surfaces
+
+MODEL_TYPES = {
+    "LinearRegression": LinearRegression,
+    "Ridge": Ridge,
+    "Lasso": Lasso,
+    "RandomForest": RandomForestRegressor,
+}
+DEFAULT_PARAMS = {
+    "LinearRegression": {},
+    "Ridge": {"alpha": 1.0},
+    "Lasso": {"alpha": 0.1},
+    "RandomForest": {"n_estimators": 100, "random_state": 42},
+}
+
+# model: fitted estimator; features: column order of X; X, y: training data;
+# index: row labels (of app_data.aq_vehicle()) used for training; r2: training R²
+FittedModel = namedtuple("FittedModel", ["model", "features", "X", "y", "index", "r2"])
+# grid: AF_fleet values; dummies: country dummy columns; values: float32 array with
+# one row per country (row 0 the baseline, row i + 1 dummies[i]) and one column per grid point
+Surface = namedtuple("Surface", ["grid", "dummies", "values"])
+
+_lock = threading.RLock()
+_models = OrderedDict()
+_surfaces = {}
+_stats = {"hits": 0, "misses": 0, "loads": 0, "evictions": 0}
+
+
+def make_model(model_type, params=None):
+    """Unfitted estimator of the given type with the default hyperparameters updated by `params`."""
+    return MODEL_TYPES[model_type](**{**DEFAULT_PARAMS[model_type], **(params or {})})
+
+
+def data_fingerprint():
+    # Short content hashes of the two tables every model is trained on
+    return app_data.fingerprint("aq_annual")[:12], app_data.fingerprint("vehicle")[:12]
+
+
+def model_key(pollutant, target, model_type, params=None, countries=None, features=("AF_fleet",),
+              fixed_effects=True):
+    """Compact, hashable key identifying a fitted model."""
+    params = {**DEFAULT_PARAMS[model_type], **(params or {})}
+    return (
+        pollutant, target, model_type, tuple(sorted(params.items())),
+        tuple(sorted(countries)) if countries is not None else None,
+        tuple(features), fixed_effects, data_fingerprint(),
+    )
+
+
+def training_data(pollutant, target, countries=None, features=("AF_fleet",), fixed_effects=True):
+    """
+    X, y, feature names and row index for one pollutant.
+
+    Country dummies follow pd.get_dummies(drop_first=True) over the selected countries:
+    the first country alphabetically (AT when present) is the baseline. Rows with a
+    missing feature or target are left out.
+    """
+    data = app_data.aq_vehicle()
+    df = data[data["Pollutant"] == pollutant]
+    if countries is not None:
+        df = df[df["Country"].isin(countries)]
+    feature_names = list(features)
+    columns = [df[f].to_numpy(dtype=np.float64) for f in features]
+    if fixed_effects:
+        for country in sorted(df["Country"].dropna().unique())[1:]:
+            feature_names.append(f"Country_{country}")
+            columns.append((df["Country"] == country).to_numpy(dtype=np.float64))
+    X = np.column_stack(columns) if columns else np.empty((len(df), 0))
+    y = df[target].to_numpy(dtype=np.float64)
+    mask = ~np.isnan(X).any(axis=1) & ~np.isnan(y) & df["Country"].notna().to_numpy()
+    return X[mask], y[mask], feature_names, df.index[mask]
+
+
+def fit_model(pollutant, target, model_type, params=None, countries=None, features=("AF_fleet",),
+              fixed_effects=True):
+    """Fit a model for this configuration now, bypassing the registry. Returns a FittedModel."""
+    X, y, feature_names, index = training_data(pollutant, target, countries, features, fixed_effects)
+    model = make_model(model_type, params)
+    r2 = np.nan
+    if len(y) > 0:
+        model.fit(X, y)
+        r2 = model.score(X, y)
+    return FittedModel(model, feature_names, X, y, index, r2)
+
+
+def get_model(pollutant, target, model_type, params=None, countries=None, features=("AF_fleet",),
+              fixed_effects=True):
+    """The fitted model for this configuration, from the registry, an artifact or fitted now. Returns a FittedModel."""
+    key = model_key(pollutant, target, model_type, params, countries, features, fixed_effects)
+    with _lock:
+        if key in _models:
+            _stats["hits"] += 1
+            _models.move_to_end(key)
+            return _models[key]
+        _stats["misses"] += 1
+        artifact = app_artifacts.load_artifact(key)
+        if artifact is not None:
+            model, meta = artifact
+            X, y, feature_names, index = training_data(pollutant, target, countries, features, fixed_effects)
+            fitted = FittedModel(model, feature_names, X, y, index, meta["r2"])
+            _stats["loads"] += 1
+        else:
+            fitted = fit_model(pollutant, target, model_type, params, countries, features, fixed_effects)
+        _models[key] = fitted
+        while len(_models) > MAX_MODELS:
+            evicted, _ = _models.popitem(last=False)
+            _surfaces.pop(evicted, None)
+            _stats["evictions"] += 1
+        return fitted
+
+
+def surface_grid(step=SURFACE_STEP):
+    return np.linspace(0.0, 100.0, int(round(100.0 / step)) + 1)
+
+
+def prediction_surface(fitted, step=SURFACE_STEP):
+    """
+    Predictions of an AF_fleet (+ country dummies) model over AF_fleet 0-100% in steps of `step`
+    for the baseline country and each dummy, as a Surface. All rows go through a single predict call.
+    """
+    if fitted.features[:1] != ["AF_fleet"] or not all(f.startswith("Country_") for f in fitted.features[1:]):
+        raise ValueError(f"Prediction surfaces need AF_fleet and country dummies as features, got {fitted.features}")
+    grid = surface_grid(step)
+    n_rows = len(fitted.features)
+    X = np.zeros((n_rows * len(grid), n_rows))
+    X[:, 0] = np.tile(grid, n_rows)
+    for row in range(1, n_rows):
+        X[row * len(grid):(row + 1) * len(grid), row] = 1.0
+    values = fitted.model.predict(X).reshape(n_rows, len(grid)).astype(np.float32)
+    return Surface(grid, fitted.features[1:], values)
+
+
+def surface_predict(surface, af_fleet, dummy=None):
+    """Prediction(s) at AF_fleet value(s) for a country dummy (None: baseline), interpolated on the grid."""
+    row = surface.dummies.index(dummy) + 1 if dummy in surface.dummies else 0
+    return np.interp(af_fleet, surface.grid, surface.values[row])
+
+
+def get_surface(pollutant, target, model_type, params=None, countries=None, fixed_effects=True):
+    """Prediction surface of the registry model for this configuration (features: AF_fleet)."""
+    key = model_key(pollutant, target, model_type, params, countries, ("AF_fleet",), fixed_effects)
+    with _lock:
+        fitted = get_model(pollutant, target, model_type, params, countries, ("AF_fleet",), fixed_effects)
+        if key not in _surfaces:
+            values = app_artifacts.load_surface(key, SURFACE_STEP)
+            if values is not None:
+                _surfaces[key] = Surface(surface_grid(), fitted.features[1:], values)
+            else:
+                _surfaces[key] = prediction_surface(fitted)
+        return _surfaces[key]
+
+
+def registry_info():
+    """Hit / miss / artifact load / eviction counters and the number of models currently held."""
+    with _lock:
+        return dict(_stats, size=len(_models), max_size=MAX_MODELS)
+
+
+def clear():
+    with _lock:
+        _models.clear()
+        _surfaces.clear()
@@ -0,0 +1,222 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy import linalg, stats
+
+import app_data
+import app_models
+
+# Closed-form panel regressions with country fixed effects.
+# The Predictor and the Regression Builder fit OLS / Ridge on AF_fleet plus
+# country dummies (drop_first) one pollutant x target at a time. Here every
+# pollutant and all AnnualAvg targets are solved together: the normal equations
+# of each pollutant are built once for all targets that share the same rows, and
+# the systems of all pollutants go through one batched Cholesky factorization.
+# OLS absorbs the country effects by demeaning within country, so only the
+# features are solved for; Ridge keeps the country dummies in the system because
+# sklearn's Ridge penalizes them too (and it must give the same coefficients).
+# Coefficients and R² equal those of app_models.fit_model; OLS fits also get
+# standard errors, t statistics and p-values for the features.
+
+MAX_FITS = 16
+MAX_CONDITION = 1e10  # Gram matrices above this (estimated) condition number are solved with pinv
+
+# features: coefficient names (features, then the Country_ dummies); coef: one value per
+# feature; se, t, p_value: for the features (NaN for the dummies and for Ridge);
+# r2: training R²; df_resid: residual degrees of freedom (OLS)
+PanelFit = namedtuple("PanelFit", ["features", "coef", "intercept", "se", "t", "p_value", "r2", "n_samples",
+                                   "df_resid"])
+
+_lock = threading.RLock()
+_fits = OrderedDict()
+
+
+def targets():
+    return [col for col in app_data.aq_vehicle().columns if col.startswith("AnnualAvg_")]
+
+
+def _systems(pollutant, target_cols, countries, features, ridge):
+    # One least-squares system per set of targets with the same missing rows:
+    # (targets, design matrix, target matrix, country codes, country names)
+    data = app_data.aq_vehicle()
+    df = data[data["Pollutant"] == pollutant]
+    if countries is not None:
+        df = df[df["Country"].isin(countries)]
+    names = sorted(df["Country"].dropna().unique())
+    X = df[list(features)].to_numpy(dtype=np.float64)
+    Y = df[target_cols].to_numpy(dtype=np.float64)
+    rows = ~np.isnan(X).any(axis=1) & df["Country"].notna().to_numpy()
+    codes = df["Country"].map({name: i for i, name in enumerate(names)}).to_numpy()
+    groups = OrderedDict()
+    for j, target in enumerate(target_cols):
+        mask = rows & ~np.isnan(Y[:, j])
+        groups.setdefault(mask.tobytes(), (mask, []))[1].append(j)
+    systems = []
+    for mask, cols in groups.values():
+        if not mask.any():
+            continue
+        group_codes = codes[mask].astype(np.intp)
+        design = X[mask]
+        if ridge:
+            # sklearn's dummies: one column per country but the first (also if it has no rows here)
+            dummies = (group_codes[:, None] == np.arange(1, len(names))[None, :]).astype(np.float64)
+            design = np.hstack([design, dummies])
+        systems.append(([target_cols[j] for j in cols], design, Y[mask][:, cols], group_codes, names))
+    return systems
+
+
+def _demean(values, codes, n_groups):
+    counts = np.bincount(codes, minlength=n_groups)
+    means = np.zeros((n_groups, values.shape[1]))
+    np.add.at(means, codes, values)
+    means /= np.maximum(counts, 1)[:, None]
+    return values - means[codes], means
+
+
+def _batched_solve(grams, rhs):
+    """
+    Solve each G b = c of a stack of symmetric positive semidefinite systems with one Cholesky call.
+
+    Systems that are singular or worse conditioned than MAX_CONDITION get the pseudo-inverse instead.
+    Returns (solutions, inverses).
+    """
+    size = max(g.shape[0] for g in grams)
+    width = max(c.shape[1] for c in rhs)
+    G = np.tile(np.eye(size), (len(grams), 1, 1))
+    C = np.zeros((len(grams), size, width))
+    for i, (g, c) in enumerate(zip(grams, rhs)):
+        # Padding rows / columns are identity, so their solution is 0
+        G[i, :g.shape[0], :g.shape[0]] = g
+        C[i, :c.shape[0], :c.shape[1]] = c
+    try:
+        L = np.linalg.cholesky(G)
+    except np.linalg.LinAlgError:
+        # Factor one by one, so only the systems that are not positive definite fall back
+        L = np.zeros_like(G)
+        for i, g in enumerate(G):
+            try:
+                L[i] = np.linalg.cholesky(g)
+            except np.linalg.LinAlgError:
+                pass
+    # The squared pivots bound cond(G) from below: a nearly singular Gram matrix still factors,
+    # but its Cholesky solution would be mostly rounding error (failed factors have zero pivots)
+    pivots = np.diagonal(L, axis1=1, axis2=2) ** 2
+    ok = np.array([pivots[i, :g.shape[0]].min() > pivots[i, :g.shape[0]].max() / MAX_CONDITION
+                   for i, g in enumerate(grams)])
+    B = np.zeros_like(C)
+    G_inv = np.zeros_like(G)
+    if ok.any():
+        L_ok = L[ok]
+        B[ok] = np.linalg.solve(np.swapaxes(L_ok, 1, 2), np.linalg.solve(L_ok, C[ok]))
+        # The inverse (for the standard errors) from the same factor instead of a second factorization
+        G_inv[ok] = [linalg.cho_solve((factor, True), np.eye(size)) for factor in L_ok]
+    if not ok.all():
+        # Collinear features: minimum-norm solutions like sklearn's LinearRegression
+        G_inv[~ok] = np.linalg.pinv(G[~ok], hermitian=True)
+        B[~ok] = G_inv[~ok] @ C[~ok]
+    return ([B[i, :g.shape[0], :c.shape[1]] for i, (g, c) in enumerate(zip(grams, rhs))],
+            [G_inv[i, :g.shape[0], :g.shape[0]] for i, g in enumerate(grams)])
+
+
+def solve_panel(pollutants=None, target_cols=None, features=("AF_fleet",), countries=None,
+                model_type="LinearRegression", alpha=1.0):
+    """
+    Fixed-effects OLS (model_type "LinearRegression") or Ridge for every pollutant x target at once.
+
+    Country effects follow app_models.training_data (first country alphabetically as baseline).
+    Returns {(pollutant, target): PanelFit}, without the pairs that have no data.
+    """
+    if model_type not in ("LinearRegression", "Ridge"):
+        raise ValueError(f"Closed-form panel fits are OLS or Ridge, not {model_type}")
+    ridge = model_type == "Ridge"
+    data = app_data.aq_vehicle()
+    pollutants = sorted(data["Pollutant"].dropna().unique()) if pollutants is None else list(pollutants)
+    target_cols = targets() if target_cols is None else list(target_cols)
+    k = len(features)
+
+    systems, grams, rhs = [], [], []
+    for pollutant in pollutants:
+        for target_group, design, Y, codes, names in _systems(pollutant, target_cols, countries, features, ridge):
+            if ridge:
+                # Centered design with the penalty on every coefficient, as sklearn's Ridge
+                Xc, Yc = design - design.mean(axis=0), Y - Y.mean(axis=0)
+                x_means = y_means = None
+                gram = Xc.T @ Xc + alpha * np.eye(design.shape[1])
+            else:
+                Xc, x_means = _demean(design, codes, len(names))
+                Yc, y_means = _demean(Y, codes, len(names))
+                gram = Xc.T @ Xc
+            systems.append((pollutant, target_group, design, Y, Xc, Yc, x_means, y_means, codes, names))
+            grams.append(gram)
+            rhs.append(Xc.T @ Yc)
+    if not systems:
+        return {}
+    solutions, inverses = _batched_solve(grams, rhs)
+
+    fits = {}
+    for system, B, G_inv in zip(systems, solutions, inverses):
+        pollutant, target_group, design, Y, Xc, Yc, x_means, y_means, codes, names = system
+        n, n_countries = len(Y), len(np.unique(codes))
+        residuals = Yc - Xc @ B
+        ssr = (residuals ** 2).sum(axis=0)
+        sst = ((Y - Y.mean(axis=0)) ** 2).sum(axis=0)
+        if ridge:
+            intercepts = Y.mean(axis=0) - design.mean(axis=0) @ B
+            coefs = B
+            df_resid = np.nan
+        else:
+            # Country effects from the group means; the baseline's becomes the intercept
+            effects = y_means - x_means @ B  # (countries, targets)
+            base = codes.min()
+            dummies = np.zeros((len(names) - 1, len(target_group)))
+            present = np.unique(codes)
+            for code in present[present > 0]:
+                dummies[code - 1] = effects[code] - effects[base]
+            intercepts = effects[base]
+            coefs = np.vstack([B, dummies])
+            df_resid = n - k - n_countries
+        for j, target in enumerate(target_group):
+            se, t, p = (np.full(len(coefs), np.nan) for _ in range(3))
+            if not ridge and df_resid > 0:
+                se[:k] = np.sqrt(np.diag(G_inv) * ssr[j] / df_resid)
+                t[:k] = coefs[:k, j] / se[:k]
+                p[:k] = 2 * stats.t.sf(np.abs(t[:k]), df_resid)
+            r2 = 1.0 - ssr[j] / sst[j] if sst[j] > 0 else np.nan
+            feature_names = list(features) + [f"Country_{name}" for name in names[1:]]
+            fits[(pollutant, target)] = PanelFit(feature_names, coefs[:, j].copy(), float(intercepts[j]), se, t, p,
+                                                 float(r2), n, df_resid)
+    return {(pollutant, target): fits[(pollutant, target)]
+            for pollutant in pollutants for target in target_cols if (pollutant, target) in fits}
+
+
+def get_panel(pollutants=None, target_cols=None, features=("AF_fleet",), countries=None,
+              model_type="LinearRegression", alpha=1.0):
+    """solve_panel() for these arguments, kept in memory until the input tables change."""
+    key = (
+        tuple(pollutants) if pollutants is not None else None,
+        tuple(target_cols) if target_cols is not None else None,
+        tuple(features), tuple(sorted(countries)) if countries is not None else None,
+        model_type, float(alpha) if model_type == "Ridge" else None, app_models.data_fingerprint(),
+    )
+    with _lock:
+        if key in _fits:
+            _fits.move_to_end(key)
+            return _fits[key]
+        fits = _fits[key] = solve_panel(pollutants, target_cols, features, countries, model_type, alpha)
+        while len(_fits) > MAX_FITS:
+            _fits.popitem(last=False)
+        return fits
+
+
+def coefficient_table(fits, feature="AF_fleet"):
+    """One row per pollutant x target with the coefficient of `feature`, its SE, t, p-value, stars and R²."""
+    rows = []
+    for (pollutant, target), fit in fits.items():
+        i = fit.features.index(feature)
+        p = fit.p_value[i]
+        stars = "" if np.isnan(p) else "***" if p < 0.001 else "**" if p < 0.01 else "*" if p < 0.05 else ""
+        rows.append({"Pollutant": pollutant, "Target": target, "Coef": fit.coef[i], "SE": fit.se[i], "t": fit.t[i],
+                     "p_value": p, "stars": stars, "R2": fit.r2, "N": fit.n_samples})
+    return pd.DataFrame(rows)
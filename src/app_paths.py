@@ -0,0 +1,131 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+from sklearn.linear_model import lars_path
+from sklearn.model_selection import KFold
+
+import app_models
+
+# Regularization paths for the Ridge and Lasso alpha sliders of the Regression Builder.
+# Instead of refitting on every slider tick, the whole coefficient path is
+# computed once per (pollutant, target, countries, features) selection:
+# - Ridge from one SVD of the centered design; the coefficients at any alpha
+#   follow exactly from it, and so does the leave-one-out error (no refits).
+# - Lasso with LARS, whose knots describe the exact, piecewise linear path, so
+#   a slider position between two knots is answered by linear interpolation;
+#   the cross-validated error comes from one LARS path per fold.
+# Coefficients match sklearn's Ridge / Lasso (with intercept) on the same data
+# as app_models.training_data. Paths are kept for the MAX_PATHS most recent selections.
+
+MAX_PATHS = 32
+ALPHAS = np.logspace(-2, 1, 61)  # display / CV grid, the range of the Builder's sliders
+CV_FOLDS = 5
+
+# features: names of the coefficients; x_mean, y_mean: training means (for the intercept);
+# knots: what the path is evaluated from - (singular values, V', U'y) for Ridge,
+# the LARS knots (alphas, coefs) for Lasso; alphas, coefs: the path on ALPHAS (one column per alpha);
+# cv_mse: cross-validated mean squared error on ALPHAS (leave-one-out for Ridge, K-fold for Lasso);
+# X, y: training data
+RegularizationPath = namedtuple("RegularizationPath", ["model_type", "features", "x_mean", "y_mean", "knots",
+                                                       "alphas", "coefs", "cv_mse", "X", "y"])
+
+_lock = threading.RLock()
+_paths = OrderedDict()
+
+
+def _ridge_coefs(knots, alphas):
+    # b(alpha) = V diag(s / (s² + alpha)) U'y, for all alphas at once
+    s, Vt, Uty = knots
+    alphas = np.atleast_1d(alphas)
+    return Vt.T @ ((s / (s ** 2 + alphas[:, None])) * Uty).T
+
+
+def _lasso_coefs(knots, alphas):
+    # Linear interpolation between the LARS knots (alphas decreasing); zero above the first knot
+    knot_alphas, knot_coefs = knots
+    alphas = np.atleast_1d(alphas)
+    return np.vstack([np.interp(alphas, knot_alphas[::-1], row[::-1], right=0.0) for row in knot_coefs])
+
+
+def _lars_knots(Xc, yc):
+    knot_alphas, _, knot_coefs = lars_path(Xc, yc, method="lasso")
+    return knot_alphas, knot_coefs
+
+
+def _ridge_loo_mse(Xc, yc, s, U, alphas):
+    # Leave-one-out residuals of a linear smoother: e_i / (1 - H_ii), with the intercept in H
+    shrink = s ** 2 / (s ** 2 + alphas[:, None])  # (alphas, components)
+    Uty = U.T @ yc
+    fitted = (shrink * Uty) @ U.T  # (alphas, samples)
+    leverage = (U ** 2) @ shrink.T + 1.0 / len(yc)  # (samples, alphas)
+    loo = (yc - fitted) / (1.0 - leverage.T)
+    return (loo ** 2).mean(axis=1)
+
+
+def _lasso_cv_mse(X, y, alphas, folds=CV_FOLDS):
+    errors = np.zeros(len(alphas))
+    splitter = KFold(n_splits=min(folds, len(y)), shuffle=True, random_state=42)
+    for train, test in splitter.split(X):
+        x_mean, y_mean = X[train].mean(axis=0), y[train].mean()
+        coefs = _lasso_coefs(_lars_knots(X[train] - x_mean, y[train] - y_mean), alphas)
+        predictions = (X[test] - x_mean) @ coefs + y_mean  # (test samples, alphas)
+        errors += ((y[test][:, None] - predictions) ** 2).sum(axis=0)
+    return errors / len(y)
+
+
+def compute_path(X, y, model_type, features, alphas=ALPHAS):
+    """The RegularizationPath of Ridge or Lasso (with intercept) on X, y."""
+    x_mean, y_mean = X.mean(axis=0), y.mean()
+    Xc, yc = X - x_mean, y - y_mean
+    if model_type == "Ridge":
+        U, s, Vt = np.linalg.svd(Xc, full_matrices=False)
+        knots = (s, Vt, U.T @ yc)
+        coefs = _ridge_coefs(knots, alphas)
+        cv_mse = _ridge_loo_mse(Xc, yc, s, U, alphas)
+    elif model_type == "Lasso":
+        knots = _lars_knots(Xc, yc)
+        coefs = _lasso_coefs(knots, alphas)
+        cv_mse = _lasso_cv_mse(X, y, alphas)
+    else:
+        raise ValueError(f"Regularization paths are for Ridge and Lasso, not {model_type}")
+    return RegularizationPath(model_type, list(features), x_mean, y_mean, knots, alphas, coefs, cv_mse, X, y)
+
+
+def coef_at(path, alpha):
+    """(coefficients, intercept) at one alpha, as sklearn's Ridge / Lasso would fit them."""
+    if path.model_type == "Ridge":
+        coef = _ridge_coefs(path.knots, alpha)[:, 0]
+    else:
+        coef = _lasso_coefs(path.knots, alpha)[:, 0]
+    return coef, path.y_mean - path.x_mean @ coef
+
+
+def predict(path, X, alpha):
+    coef, intercept = coef_at(path, alpha)
+    return X @ coef + intercept
+
+
+def r2_at(path, alpha):
+    """Training R² at one alpha."""
+    residuals = path.y - predict(path, path.X, alpha)
+    return 1.0 - (residuals ** 2).sum() / ((path.y - path.y_mean) ** 2).sum()
+
+
+def best_alpha(path):
+    """Alpha on the path grid with the lowest cross-validated error."""
+    return float(path.alphas[np.argmin(path.cv_mse)])
+
+
+def get_path(pollutant, target, model_type, countries=None, features=("AF_fleet",)):
+    """The regularization path for this Builder selection (country fixed effects), computed once."""
+    key = app_models.model_key(pollutant, target, model_type, {"alpha": None}, countries, features, True)
+    with _lock:
+        if key in _paths:
+            _paths.move_to_end(key)
+            return _paths[key]
+        X, y, feature_names, _ = app_models.training_data(pollutant, target, countries, features)
+        path = _paths[key] = compute_path(X, y, model_type, feature_names)
+        while len(_paths) > MAX_PATHS:
+            _paths.popitem(last=False)
+        return path
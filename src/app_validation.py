@@ -0,0 +1,112 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.model_selection import RepeatedKFold
+
+import app_data
+import app_models
+
+# Out-of-sample validation for the Predictor and the Regression Builder.
+# With ~50-60 annual rows per model, a single random train/test split is noisy,
+# and it leaks information across years and countries. Three schemes are offered:
+# - "loco": leave one country out. A held-out country's fixed effect cannot be
+#   estimated, so this scheme fits the features without country dummies.
+# - "rolling": rolling origin, train on the years up to t and test on year t + 1.
+# - "kfold": repeated K-fold (5 folds, 3 repeats).
+# Fold indices are computed once per selection (pollutant, target, countries,
+# features) and data fingerprint, and are shared by every model type and
+# hyperparameter setting. The folds of a model are fitted in parallel threads,
+# and its results are cached like the models in app_models.
+
+SCHEMES = {
+    "loco": "Leave one country out",
+    "rolling": "Rolling origin (train ≤ year t, test t + 1)",
+    "kfold": "Repeated 5-fold",
+}
+K_FOLDS = 5
+K_REPEATS = 3
+MIN_TRAIN_YEARS = 3  # first rolling-origin fold trains on at least this many years
+MAX_RESULTS = 256
+
+# scheme: key of SCHEMES; r2, rmse, mae: over all held-out predictions pooled; fold_r2: R² of each
+# fold with at least two test rows; n_folds: folds evaluated; n_predictions: held-out predictions
+Validation = namedtuple("Validation", ["scheme", "r2", "rmse", "mae", "fold_r2", "n_folds", "n_predictions"])
+
+_lock = threading.RLock()
+_folds = {}  # (selection, scheme, data fingerprint) -> [(train positions, test positions)]
+_results = OrderedDict()  # (model key, scheme) -> Validation
+
+
+def _selection_key(pollutant, target, countries, features):
+    return (pollutant, target, tuple(sorted(countries)) if countries is not None else None, tuple(features))
+
+
+def make_folds(countries, years, scheme):
+    """[(train positions, test positions)] for rows with these country and year labels."""
+    positions = np.arange(len(years))
+    if scheme == "loco":
+        return [(positions[countries != c], positions[countries == c]) for c in np.unique(countries)
+                if (countries != c).any()]
+    if scheme == "rolling":
+        unique_years = np.unique(years)
+        return [(positions[years <= t], positions[years == next_year])
+                for t, next_year in zip(unique_years[MIN_TRAIN_YEARS - 1:-1], unique_years[MIN_TRAIN_YEARS:])]
+    if scheme == "kfold":
+        splitter = RepeatedKFold(n_splits=min(K_FOLDS, len(years)), n_repeats=K_REPEATS, random_state=42)
+        return list(splitter.split(positions))
+    raise ValueError(f"Unknown validation scheme {scheme!r}, expected one of {list(SCHEMES)}")
+
+
+def fold_indices(pollutant, target, scheme, countries=None, features=("AF_fleet",)):
+    """Folds (positions into the rows of app_models.training_data) for this selection, computed once per data."""
+    key = (_selection_key(pollutant, target, countries, features), scheme, app_models.data_fingerprint())
+    with _lock:
+        if key not in _folds:
+            _, y, _, index = app_models.training_data(pollutant, target, countries, features, fixed_effects=False)
+            rows = app_data.aq_vehicle().loc[index]
+            if len(y) < 2:
+                _folds[key] = []
+            else:
+                _folds[key] = make_folds(rows["Country"].to_numpy(), rows["Year"].to_numpy(), scheme)
+        return _folds[key]
+
+
+def _fit_fold(model_type, params, X, y, train, test):
+    model = app_models.make_model(model_type, params)
+    model.fit(X[train], y[train])
+    return model.predict(X[test])
+
+
+def _r2(observed, predicted):
+    total = ((observed - observed.mean()) ** 2).sum()
+    return 1.0 - ((observed - predicted) ** 2).sum() / total if total > 0 else np.nan
+
+
+def cross_validate(pollutant, target, model_type, params=None, countries=None, features=("AF_fleet",),
+                   fixed_effects=True, scheme="loco"):
+    """Out-of-sample metrics of a model configuration (as in app_models.get_model) under a scheme, or None."""
+    key = (app_models.model_key(pollutant, target, model_type, params, countries, features, fixed_effects), scheme)
+    with _lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key]
+    folds = fold_indices(pollutant, target, scheme, countries, features)
+    if not folds:
+        return None
+    X, y, _, _ = app_models.training_data(pollutant, target, countries, features,
+                                          fixed_effects=fixed_effects and scheme != "loco")
+    predictions = Parallel(n_jobs=-1, prefer="threads")(
+        delayed(_fit_fold)(model_type, params, X, y, train, test) for train, test in folds
+    )
+    observed = np.concatenate([y[test] for _, test in folds])
+    predicted = np.concatenate(predictions)
+    fold_r2 = [_r2(y[test], p) for (_, test), p in zip(folds, predictions) if len(test) > 1]
+    result = Validation(scheme, _r2(observed, predicted), float(np.sqrt(((observed - predicted) ** 2).mean())),
+                        float(np.abs(observed - predicted).mean()), fold_r2, len(folds), len(observed))
+    with _lock:
+        _results[key] = result
+        while len(_results) > MAX_RESULTS:
+            _results.popitem(last=False)
+    return result
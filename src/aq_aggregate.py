@@ -0,0 +1,154 @@
+import pathlib
+
+import pandas as pd
+
+import aq_calendar
+import aq_quantiles
+
+# Streaming builder for AQ_annual_averages.csv.
+# The hourly data is read in chunks and reduced to sum/count per
+# (Country, Pollutant, Year, Weekday, Hour). That state has at most a few
+# tens of thousands of rows no matter how large the input is, and every
+# AnnualAvg_{fullweek,weekday,weekend}_{Daytime,RushHour} column is derived
+# from it at the end, so the hourly data is only read once.
+
+BASE_DIR = pathlib.Path(__file__).parent.parent  # DSML/
+PROCESSED_DIR = BASE_DIR / "data" / "processed"
+CLEANED_CSV_PATH = PROCESSED_DIR / "AQ_merged_cleaned.csv"
+ANNUAL_AVG_PATH = PROCESSED_DIR / "AQ_annual_averages.csv"
+
+GROUP_KEYS = ["Country", "Pollutant", "Year"]
+CELL_KEYS = GROUP_KEYS + ["Weekday", "Hour"]
+
+# Windows from aq_calendar; the cells here are keyed on the end timestamp, so these
+# are the end hours (9:00 to 18:00, and 8-10 and 15-18) as in src/data_processing.ipynb
+DAYTIME_HOURS = aq_calendar.end_hours("daytime")
+RUSH_HOURS = aq_calendar.end_hours("rushhour")
+TIME_WINDOWS = {"Daytime": DAYTIME_HOURS, "RushHour": RUSH_HOURS}
+PERIODS = {
+    "fullweek": list(range(7)),
+    "weekday": [d for d in range(7) if d not in aq_calendar.WEEKEND_DAYS],
+    "weekend": aq_calendar.WEEKEND_DAYS,
+}
+
+
+def iter_hourly_chunks(path=CLEANED_CSV_PATH, chunksize=1_000_000):
+    """Yield the cleaned hourly CSV in chunks, reading only the columns needed for aggregation."""
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in ["Country", "Pollutant", "Notation", "Datetime", "End", "Value"] if c in header]
+    yield from pd.read_csv(path, usecols=usecols, chunksize=chunksize)
+
+
+def normalize_chunk(chunk):
+    """
+    Bring a chunk of hourly data into the (Country, Pollutant, Year, Weekday, Hour, Value) layout.
+
+    Works for the cleaned CSV (Pollutant/Datetime) as well as for frames from the raw
+    export or the Parquet store (Notation/End); the hour an observation belongs to is
+    taken from its end timestamp, as in the cleaned data.
+    """
+    # In the raw export "Pollutant" is the numeric EEA code and "Notation" the name
+    pollutant_col = "Notation" if "Notation" in chunk.columns else "Pollutant"
+    time_col = "Datetime" if "Datetime" in chunk.columns else "End"
+    ts = chunk[time_col]
+    if not pd.api.types.is_datetime64_any_dtype(ts):
+        ts = pd.to_datetime(ts, format="ISO8601", errors="coerce")
+    return pd.DataFrame({
+        "Country": chunk["Country"].to_numpy(),
+        "Pollutant": chunk[pollutant_col].to_numpy(),
+        "Year": ts.dt.year.to_numpy(),
+        "Weekday": ts.dt.weekday.to_numpy(),
+        "Hour": ts.dt.hour.to_numpy(),
+        "Value": chunk["Value"].to_numpy(),
+    }).dropna(subset=["Year"])
+
+
+def partial_sums(chunk):
+    """Sum and count of Value per (Country, Pollutant, Year, Weekday, Hour) for one chunk."""
+    return chunk.groupby(CELL_KEYS, sort=False)["Value"].agg(["sum", "count"])
+
+
+def accumulate(partials):
+    """Merge a stream of partial sum/count frames into one."""
+    total = None
+    for part in partials:
+        total = part if total is None else total.add(part, fill_value=0)
+    return total
+
+
+def cell_sums(cells, sketches=None):
+    """
+    Sum/count state of an iterable of normalized chunks (see normalize_chunk).
+
+    With a `sketches` dict, the same values also feed one aq_quantiles sketch per
+    (Country, Pollutant, Year), for IQR bounds without a second pass.
+    """
+    def partials():
+        for chunk in cells:
+            if sketches is not None:
+                aq_quantiles.sketch_by_group([chunk], keys=GROUP_KEYS, sketches=sketches)
+            yield partial_sums(chunk)
+
+    return accumulate(partials())
+
+
+def hourly_sums(chunks, sketches=None):
+    """Single pass over an iterable of hourly chunks; returns the sum/count state (and fills `sketches`)."""
+    return cell_sums((normalize_chunk(chunk) for chunk in chunks), sketches)
+
+
+def annual_averages_from_sums(sums):
+    """Turn the sum/count state into the AQ_annual_averages.csv table."""
+    cells = sums.reset_index()
+    results = []
+    for period, weekdays in PERIODS.items():
+        for window, hours in TIME_WINDOWS.items():
+            sel = cells[cells["Weekday"].isin(weekdays) & cells["Hour"].isin(hours)]
+            agg = sel.groupby(GROUP_KEYS)[["sum", "count"]].sum()
+            avg = (agg["sum"] / agg["count"].where(agg["count"] > 0)).rename(f"AnnualAvg_{period}").reset_index()
+            avg["Type"] = window
+            results.append(avg)
+
+    # Same reshaping as the notebook, so the output columns and rows line up exactly
+    annual_averages = pd.concat(results, ignore_index=True)
+    annual_averages["Year"] = annual_averages["Year"].astype(int)
+    annual_averages = annual_averages.pivot_table(
+        index=GROUP_KEYS,
+        columns=["Type"],
+        values=[f"AnnualAvg_{period}" for period in PERIODS],
+    ).reset_index()
+    annual_averages.columns = ["_".join([str(i) for i in col if i]) for col in annual_averages.columns.values]
+    return annual_averages
+
+
+def build_annual_averages(source=CLEANED_CSV_PATH, output_path=ANNUAL_AVG_PATH, chunksize=1_000_000,
+                          bounds_path=None):
+    """
+    Build AQ_annual_averages.csv from the hourly data in one streaming pass.
+
+    With a bounds_path, the per (Country, Pollutant) IQR bounds of the hourly values
+    are written there as well, from the same pass.
+    """
+    chunks = iter_hourly_chunks(source, chunksize) if isinstance(source, (str, pathlib.Path)) else source
+    sketches = {} if bounds_path is not None else None
+    annual_averages = annual_averages_from_sums(hourly_sums(chunks, sketches))
+    if output_path is not None:
+        annual_averages.to_csv(output_path, index=False)
+    if bounds_path is not None:
+        aq_quantiles.iqr_bounds(aq_quantiles.merge_sketches(sketches)).to_csv(bounds_path, index=False)
+    return annual_averages
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build AQ_annual_averages.csv from the hourly AQ data in one pass.")
+    parser.add_argument("--source", default=str(CLEANED_CSV_PATH), help="Cleaned hourly AQ CSV")
+    parser.add_argument("--output", default=str(ANNUAL_AVG_PATH), help="Output CSV path")
+    parser.add_argument("--chunksize", type=int, default=1_000_000, help="Rows read per chunk")
+    parser.add_argument("--bounds", default=None,
+                        help=f"Also write per Country/Pollutant IQR bounds here (e.g. {aq_quantiles.IQR_BOUNDS_PATH})")
+    args = parser.parse_args()
+
+    result = build_annual_averages(args.source, args.output, chunksize=args.chunksize, bounds_path=args.bounds)
+    print(f"Wrote {len(result)} rows to {args.output}")
@@ -0,0 +1,116 @@
+import json
+import pathlib
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import aq_load
+
+# Memory-mapped column cache for the hourly AQ data.
+# Each column of the compact frame from aq_load is written as a raw .npy file:
+# categorical columns as their integer codes (categories go in _meta.json),
+# timestamps as int64 ticks and numbers as they are. Opening the cache maps the
+# files with np.load(mmap_mode="r"), so nothing is parsed or copied, and every
+# process that opens it (Streamlit workers, the model sweep, notebooks) shares
+# the same pages in the OS page cache.
+
+CACHE_DIR = aq_load.PROCESSED_DIR / "AQ_hourly_npy"
+META_FILE = "_meta.json"
+
+
+def _fingerprint(path):
+    stat = pathlib.Path(path).stat()
+    return {"path": str(path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def write_cache(df, cache_dir=CACHE_DIR, source=None):
+    """Write every column of a (compact) hourly frame to cache_dir as a .npy file."""
+    cache_dir = pathlib.Path(cache_dir)
+    # Write to a temporary directory and swap it in, so readers never see a half-written cache
+    tmp_dir = cache_dir.with_name(cache_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        entry = {"name": col}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry["kind"] = "category"
+            entry["categories"] = series.cat.categories.tolist()
+            values = series.cat.codes.to_numpy()
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            entry["kind"] = "datetime"
+            entry["dtype"] = str(series.dtype)
+            values = series.to_numpy().view(np.int64)
+        elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            entry["kind"] = "numeric"
+            values = series.to_numpy()
+        else:
+            raise TypeError(f"Column {col!r} has dtype {series.dtype}; compact it first (aq_load.compact)")
+        np.save(tmp_dir / f"{col}.npy", values)
+        columns.append(entry)
+
+    meta = {"rows": len(df), "columns": columns, "source": _fingerprint(source) if source else None}
+    (tmp_dir / META_FILE).write_text(json.dumps(meta, indent=1))
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    tmp_dir.rename(cache_dir)
+    return cache_dir
+
+
+def open_cache(cache_dir=CACHE_DIR, columns=None):
+    """
+    Open the cache as a DataFrame whose columns are read-only views on the mapped files.
+
+    Only the requested columns are mapped. The frame must not be modified in place;
+    take a .copy() of the part you want to change.
+    """
+    cache_dir = pathlib.Path(cache_dir)
+    meta = json.loads((cache_dir / META_FILE).read_text())
+    data = {}
+    for entry in meta["columns"]:
+        col = entry["name"]
+        if columns is not None and col not in columns:
+            continue
+        # Plain read-only ndarray views on the mapping (the memmap stays alive as their base)
+        values = np.asarray(np.load(cache_dir / f"{col}.npy", mmap_mode="r"))
+        if entry["kind"] == "category":
+            dtype = pd.CategoricalDtype(entry["categories"])
+            data[col] = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+        elif entry["kind"] == "datetime":
+            data[col] = values.view(entry["dtype"])
+        else:
+            data[col] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def is_fresh(cache_dir=CACHE_DIR, source=aq_load.HOURLY_CSV_PATH):
+    """True if the cache exists and was built from the current version of `source`."""
+    meta_path = pathlib.Path(cache_dir) / META_FILE
+    if not meta_path.exists() or not pathlib.Path(source).exists():
+        return False
+    built_from = json.loads(meta_path.read_text())["source"]
+    return built_from == _fingerprint(source)
+
+
+def load_cached(source=aq_load.HOURLY_CSV_PATH, cache_dir=CACHE_DIR, columns=None):
+    """Open the cache for `source`, building it first (one CSV parse) if it is missing or stale."""
+    if not is_fresh(cache_dir, source):
+        write_cache(aq_load.load_hourly(source), cache_dir, source=source)
+    return open_cache(cache_dir, columns)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build the memory-mapped .npy column cache of the hourly AQ data.")
+    parser.add_argument("--csv", default=str(aq_load.HOURLY_CSV_PATH), help="Hourly AQ CSV")
+    parser.add_argument("--cache", default=str(CACHE_DIR), help="Cache directory")
+    args = parser.parse_args()
+
+    write_cache(aq_load.load_hourly(args.csv), args.cache, source=args.csv)
+    t0 = time.perf_counter()
+    aq_df = open_cache(args.cache)
+    print(f"Cache written to {args.cache}; reopened {len(aq_df)} rows in {time.perf_counter() - t0:.3f}s")
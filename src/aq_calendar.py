@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+# Calendar columns and time-window definitions for the hourly AQ data.
+# This is the one place the daytime / rush hour / weekend windows are defined.
+# All windows are hours of the *start* of the hourly measurement interval, so
+# "daytime" (8..17) covers the measurements from 08:00 to 18:00.
+#
+# At ingest every row gets an Hour, a DayOfWeek and a Calendar bitmask with one
+# bit per window; a window filter is then an integer AND instead of comparing
+# .dt.time objects over 18M rows.
+
+WINDOWS = {
+    # Used for AQ_annual_averages.csv and described in the app: measurements ending
+    # 9:00-18:00 (daytime) and 8:00-10:00 / 15:00-18:00 (rush hour)
+    "daytime": list(range(8, 18)),
+    "rushhour": list(range(7, 10)) + list(range(14, 18)),
+    # Used for the EDA figures in air_quality_data_V2.ipynb: 08:00 <= Start <= 20:00
+    # and 06:00-10:00 / 16:00-20:00
+    "daytime_eda": list(range(8, 21)),
+    "rushhour_eda": list(range(6, 11)) + list(range(16, 21)),
+}
+WEEKEND_DAYS = [5, 6]  # Saturday, Sunday
+
+# Bit 0 is the weekend flag, the windows follow in the order above
+WEEKEND = 1
+BITS = {"weekend": WEEKEND}
+BITS.update({name: 1 << (i + 1) for i, name in enumerate(WINDOWS)})
+# Rows without a Start timestamp (NaT) get only this bit, Hour and DayOfWeek -1,
+# and are left out by every window_mask
+NO_TIMESTAMP = 1 << 7
+
+CALENDAR_COLUMNS = ["Hour", "DayOfWeek", "Calendar"]
+
+
+def end_hours(window):
+    """Hours of the *end* timestamp covered by a window (for data keyed on End, e.g. the cleaned CSV)."""
+    return [(h + 1) % 24 for h in WINDOWS[window]]
+
+
+def _hour_table():
+    # Window bits for each of the 24 hours
+    table = np.zeros(24, dtype=np.uint8)
+    for name, hours in WINDOWS.items():
+        table[hours] |= BITS[name]
+    return table
+
+
+def calendar_columns(start):
+    """
+    Hour (int8), DayOfWeek (int8, Monday=0) and Calendar (uint8 bitmask) for a Start column.
+
+    A NaT Start gets Hour and DayOfWeek -1 and the NO_TIMESTAMP bit instead of hour 0 on a Monday.
+    """
+    start = pd.to_datetime(start)
+    missing = start.isna().to_numpy()
+    hour = start.dt.hour.fillna(-1).to_numpy().astype(np.int8)
+    dow = start.dt.dayofweek.fillna(-1).to_numpy().astype(np.int8)
+    calendar = _hour_table()[np.where(missing, 0, hour)]
+    calendar[np.isin(dow, WEEKEND_DAYS)] |= WEEKEND
+    calendar[missing] = NO_TIMESTAMP
+    return pd.DataFrame({"Hour": hour, "DayOfWeek": dow, "Calendar": calendar}, index=start.index)
+
+
+def add_calendar(df, start_col="Start"):
+    """Add the calendar columns to an hourly frame (in place) and return it."""
+    cols = calendar_columns(df[start_col])
+    for col in CALENDAR_COLUMNS:
+        df[col] = cols[col]
+    return df
+
+
+def window_mask(calendar, *windows, weekend=None):
+    """
+    Boolean mask of the rows inside all of the given windows.
+
+    weekend=True / False restricts to weekends / weekdays, e.g. weekday rush hour:
+        window_mask(df["Calendar"], "rushhour", weekend=False)
+    Rows without a Start timestamp are never inside a window.
+    """
+    calendar = np.asarray(calendar)
+    bits = 0
+    for name in windows:
+        bits |= BITS[name]
+    mask = ((calendar & bits) == bits) & ((calendar & NO_TIMESTAMP) == 0)
+    if weekend is not None:
+        mask &= ((calendar & WEEKEND) != 0) == weekend
+    return mask
@@ -0,0 +1,135 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+import aq_calendar
+import aq_store
+
+# Out-of-core pollutant correlation matrices per country.
+# The notebook pivots the whole cleaned hourly table to one column per pollutant
+# (index Start x Country, mean over stations) and calls .corr() per country. Here
+# the store is read one (Country, Year) at a time - all pollutants of a given
+# hour live in the same Start year - and only the pairwise-complete moments
+# (count, means, centred sums of squares and cross-products) are kept, so the
+# same Pearson matrices come out without ever building the wide pivot.
+
+
+class PairwiseMoments:
+    """Running pairwise-complete moments for the columns of a wide frame."""
+
+    def __init__(self):
+        # (a, b) -> [n, mean_a, mean_b, m2_a, m2_b, c_ab] over rows where both are present
+        self.pairs = {}
+
+    def _add(self, pair, stats):
+        old = self.pairs.get(pair)
+        if old is None:
+            self.pairs[pair] = stats
+            return
+        # Chan et al. parallel update of the centred moments
+        n1, mx1, my1, m2x1, m2y1, c1 = old
+        n2, mx2, my2, m2x2, m2y2, c2 = stats
+        n = n1 + n2
+        dx, dy = mx2 - mx1, my2 - my1
+        f = n1 * n2 / n
+        self.pairs[pair] = np.array([
+            n, mx1 + dx * n2 / n, my1 + dy * n2 / n,
+            m2x1 + m2x2 + dx * dx * f, m2y1 + m2y2 + dy * dy * f, c1 + c2 + dx * dy * f,
+        ])
+
+    def update(self, wide):
+        """Add the rows of a wide frame (one column per pollutant, NaN where missing)."""
+        columns = list(wide.columns)
+        values = {col: wide[col].to_numpy(dtype=np.float64) for col in columns}
+        for a, b in itertools.combinations_with_replacement(columns, 2):
+            x, y = values[a], values[b]
+            both = ~np.isnan(x) & ~np.isnan(y)
+            n = both.sum()
+            if n == 0:
+                continue
+            dx = x[both] - x[both].mean()
+            dy = y[both] - y[both].mean()
+            self._add(tuple(sorted((a, b))), np.array([
+                n, x[both].mean(), y[both].mean(), dx @ dx, dy @ dy, dx @ dy,
+            ]))
+        return self
+
+    def merge(self, other):
+        for pair, stats in other.pairs.items():
+            self._add(pair, stats.copy())
+        return self
+
+    def corr(self, min_periods=1):
+        """Pearson correlation matrix (pairwise complete, like DataFrame.corr())."""
+        columns = sorted({col for pair in self.pairs for col in pair})
+        out = pd.DataFrame(np.nan, index=pd.Index(columns, name="Notation"), columns=pd.Index(columns, name="Notation"))
+        for (a, b), (n, _, _, m2x, m2y, c) in self.pairs.items():
+            if n < max(min_periods, 2) or m2x <= 0 or m2y <= 0:
+                continue
+            r = c / np.sqrt(m2x * m2y)
+            out.loc[a, b] = out.loc[b, a] = float(np.clip(r, -1.0, 1.0))
+        return out
+
+
+def hourly_wide(hourly):
+    """Mean Value per (Start, Notation) as a wide frame, the per-country slice of the notebook pivot."""
+    return hourly.groupby(["Start", "Notation"], observed=True)["Value"].mean().unstack("Notation")
+
+
+def _country_years(store_dir, countries):
+    # (Country, Year) -> partition keys of all pollutants in that year
+    groups = {}
+    for fragment in aq_store.open_store(store_dir).get_fragments():
+        keys = aq_store.partition_keys(fragment)
+        if countries is not None and keys["Country"] not in countries:
+            continue
+        key = (keys["Country"], keys["Notation"], int(keys["Year"]))
+        groups.setdefault((key[0], key[2]), []).append(key)
+    return dict(sorted(groups.items()))
+
+
+def correlation_matrices(windows=(), weekend=None, countries=None, prepare=None, store_dir=aq_store.STORE_DIR):
+    """
+    Per-country pollutant correlation matrices, {country: DataFrame}, from the Parquet store.
+
+    `windows` / `weekend` restrict the hours used (see aq_calendar.window_mask), e.g.
+    windows=["rushhour"], weekend=False for weekday rush hours. `prepare` is applied
+    to the hourly rows first (e.g. the notebook cleaning, aq_rebuild.clean).
+    """
+    columns = ["Country", "Notation", "Start", "Value", "Calendar"]
+    moments = {}
+    for (country, _), keys in _country_years(store_dir, aq_store._as_list(countries)).items():
+        hourly = pd.concat([frame for _, frame in aq_store.iter_partitions(keys, columns, store_dir)],
+                           ignore_index=True)
+        if prepare is not None:
+            hourly = prepare(hourly)
+        if windows or weekend is not None:
+            hourly = hourly[aq_calendar.window_mask(hourly["Calendar"], *windows, weekend=weekend)]
+        moments.setdefault(country, PairwiseMoments()).update(hourly_wide(hourly))
+    return {country: m.corr() for country, m in moments.items()}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-country pollutant correlation matrices from the Parquet store.")
+    parser.add_argument("--store", default=str(aq_store.STORE_DIR), help="Partitioned Parquet store")
+    parser.add_argument("--window", action="append", default=[], choices=list(aq_calendar.WINDOWS),
+                        help="Only use hours inside this window (can be repeated)")
+    days = parser.add_mutually_exclusive_group()
+    days.add_argument("--weekend", dest="weekend", action="store_true", default=None, help="Weekends only")
+    days.add_argument("--weekday", dest="weekend", action="store_false", help="Weekdays only")
+    parser.add_argument("--clean", action="store_true", help="Apply the notebook cleaning rules first")
+    args = parser.parse_args()
+
+    prepare = None
+    if args.clean:
+        import aq_rebuild
+
+        prepare = aq_rebuild.clean
+    matrices = correlation_matrices(args.window, args.weekend, prepare=prepare, store_dir=args.store)
+    for country, corr_matrix in matrices.items():
+        print(f"Correlation Matrix for {country}:")
+        print(corr_matrix.round(3))
+        print("\n")
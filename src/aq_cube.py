@@ -0,0 +1,131 @@
+import pathlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import aq_store
+
+# Pre-aggregated hourly AQ cube for interactive EDA.
+# Sum and count of the hourly Value per Country x Notation x Year x Month x
+# DayOfWeek x Hour (at most ~1.5M cells instead of ~18M rows), built once from the
+# Parquet store. Every hourly, seasonal, weekday x hour or annual view of the
+# notebooks is a mean over some of these keys with filters on the others, and is
+# computed as sum(Sum) / sum(Count) - the same mean as over the raw hourly rows.
+# view() keeps the results of recent queries, so repeated views are free.
+
+CUBE_PATH = aq_store.PROCESSED_DIR / "AQ_hourly_cube.parquet"
+CUBE_KEYS = ["Country", "Notation", "Year", "Month", "DayOfWeek", "Hour"]
+MAX_VIEWS = 128
+
+_lock = threading.RLock()
+_cube = {}  # path -> ((size, mtime), DataFrame)
+_views = OrderedDict()  # (path, stat, query) -> DataFrame
+
+
+def cube_partition(hourly):
+    """Sum / Count cells of one hourly frame (Country, Notation, Start, Value, Hour, DayOfWeek)."""
+    start = pd.to_datetime(hourly["Start"])
+    keys = pd.DataFrame({
+        "Country": hourly["Country"].astype(str),
+        "Notation": hourly["Notation"].astype(str),
+        "Year": start.dt.year.astype(np.int16),
+        "Month": start.dt.month.astype(np.int8),
+        "DayOfWeek": hourly["DayOfWeek"].astype(np.int8),
+        "Hour": hourly["Hour"].astype(np.int8),
+    })
+    values = hourly["Value"].astype(np.float64)
+    keys["Sum"] = values.fillna(0.0)
+    keys["Count"] = values.notna().astype(np.int32)
+    return keys.groupby(CUBE_KEYS, sort=False)[["Sum", "Count"]].sum().reset_index()
+
+
+def build_cube(store_dir=aq_store.STORE_DIR, output_path=CUBE_PATH, prepare=None):
+    """
+    Aggregate the whole store into the cube and write it as Parquet.
+
+    `prepare` is applied to each partition first (e.g. the notebook cleaning, aq_rebuild.clean).
+    The store partitions by Start year, so the cells of different partitions never overlap.
+    """
+    columns = ["Country", "Notation", "Start", "Value", "Hour", "DayOfWeek"]
+    parts = []
+    for _, hourly in aq_store.iter_partitions(columns=columns, store_dir=store_dir):
+        if prepare is not None:
+            hourly = prepare(hourly)
+        parts.append(cube_partition(hourly))
+    cube = pd.concat(parts, ignore_index=True).sort_values(CUBE_KEYS, ignore_index=True)
+    cube["Country"] = cube["Country"].astype("category")
+    cube["Notation"] = cube["Notation"].astype("category")
+    cube.to_parquet(output_path, index=False)
+    return cube
+
+
+def load_cube(path=CUBE_PATH):
+    """The cube, read once per process and again only when the file changes."""
+    path = pathlib.Path(path)
+    with _lock:
+        stat = path.stat()
+        key = (stat.st_size, stat.st_mtime_ns)
+        cached = _cube.get(path)
+        if cached is None or cached[0] != key:
+            cached = _cube[path] = (key, pd.read_parquet(path))
+        return cached[1]
+
+
+def cube_view(cube, by, countries=None, pollutants=None, years=None, months=None, days=None, hours=None):
+    """
+    Mean Value per combination of the `by` keys, over the cells matching the filters.
+
+    Each filter is a list of allowed values (None: all), e.g. the weekend NO2 hourly
+    pattern in Sweden since 2020:
+        cube_view(cube, ["Hour"], countries=["SE"], pollutants=["NO2"], years=range(2020, 2024), days=[5, 6])
+    Returns a frame with the `by` columns, Value (the mean) and Count (hourly values behind it).
+    """
+    mask = np.ones(len(cube), dtype=bool)
+    for col, values in zip(CUBE_KEYS, (countries, pollutants, years, months, days, hours)):
+        if values is not None:
+            mask &= cube[col].isin(list(values)).to_numpy()
+    sums = cube.loc[mask].groupby(list(by), observed=True)[["Sum", "Count"]].sum()
+    sums = sums[sums["Count"] > 0]
+    return pd.DataFrame({"Value": sums["Sum"] / sums["Count"], "Count": sums["Count"]}).reset_index()
+
+
+def view(by, countries=None, pollutants=None, years=None, months=None, days=None, hours=None, path=CUBE_PATH):
+    """
+    cube_view() on the cube at `path`, with the MAX_VIEWS most recent results kept in memory.
+
+    Returns a copy, so callers may modify it without changing the cached result.
+    """
+    path = pathlib.Path(path)
+    filters = tuple(None if values is None else tuple(sorted(values))
+                    for values in (countries, pollutants, years, months, days, hours))
+    with _lock:
+        cube = load_cube(path)
+        key = (path, _cube[path][0], tuple(by), filters)
+        if key in _views:
+            _views.move_to_end(key)
+            return _views[key].copy()
+        result = cube_view(cube, by, *filters)
+        _views[key] = result
+        while len(_views) > MAX_VIEWS:
+            _views.popitem(last=False)
+        return result.copy()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the pre-aggregated hourly AQ cube for interactive EDA.")
+    parser.add_argument("--store", default=str(aq_store.STORE_DIR), help="Partitioned Parquet store")
+    parser.add_argument("--output", default=str(CUBE_PATH), help="Output Parquet file")
+    parser.add_argument("--clean", action="store_true", help="Apply the notebook cleaning rules first")
+    args = parser.parse_args()
+
+    prepare = None
+    if args.clean:
+        import aq_rebuild
+
+        prepare = aq_rebuild.clean
+    cube = build_cube(args.store, pathlib.Path(args.output), prepare)
+    print(f"{len(cube):,} cells, {cube['Count'].sum():,} hourly values -> {args.output}")
@@ -0,0 +1,125 @@
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+import aq_calendar
+
+# Memory-compact loader for the hourly AQ data.
+# Read as-is, the 18M-row export takes several GB: every string column is a
+# Python object per row and Start/End stay strings until each notebook cell calls
+# pd.to_datetime on them again. Here the string dimensions become categoricals
+# (1-2 byte codes), Value becomes float32 and the timestamps are parsed once.
+
+BASE_DIR = pathlib.Path(__file__).parent.parent  # DSML/
+PROCESSED_DIR = BASE_DIR / "data" / "processed"
+HOURLY_CSV_PATH = PROCESSED_DIR / "AQ_merged_data_export_2.csv"
+
+CATEGORY_COLUMNS = ["Country", "Samplingpoint", "Pollutant", "Notation", "Unit", "AggType"]
+TIMESTAMP_COLUMNS = ["Start", "End", "Datetime", "Date"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_timestamps(values, format=TIMESTAMP_FORMAT):
+    """
+    Parse a column of fixed-format timestamp strings to datetime64.
+
+    The same hour shows up once per station and pollutant, so only the distinct
+    strings are parsed and the result is broadcast back with their codes.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    codes, uniques = pd.factorize(values)
+    try:
+        parsed = pd.to_datetime(uniques, format=format)
+    except ValueError:
+        # e.g. the Date column of the cleaned CSV has no time part
+        parsed = pd.to_datetime(uniques, format="ISO8601")
+    out = parsed.take(codes)
+    # factorize gives NaN the code -1, which take() would map to the last value
+    out = out.where(codes >= 0)
+    return pd.Series(out, index=values.index, name=values.name)
+
+
+def compact(df):
+    """Convert an hourly AQ frame to the compact dtypes (in place where possible) and return it."""
+    for col in df.columns:
+        if col in TIMESTAMP_COLUMNS:
+            df[col] = parse_timestamps(df[col])
+        elif col == "Value":
+            # float32 (24-bit mantissa) changes values by up to a relative 2**-24 = 6e-8,
+            # i.e. in the 7th-8th significant digit, far below the measurement precision
+            df[col] = df[col].astype(np.float32)
+        elif col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype("category")
+        elif col in ("Year", "Hour") and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = df[col].astype(np.int16)
+    return df
+
+
+def _concat_categorical(chunks):
+    # Chunks have different category sets; align them before concatenating, otherwise
+    # pandas falls back to object columns
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            categories = pd.Index(sorted(set().union(*(c[col].cat.categories for c in chunks))))
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _load_chunk(chunk, calendar):
+    chunk = compact(chunk)
+    if calendar and "Start" in chunk.columns:
+        aq_calendar.add_calendar(chunk)
+    return chunk
+
+
+def load_hourly(path=HOURLY_CSV_PATH, columns=None, chunksize=2_000_000, calendar=True):
+    """
+    Load an hourly AQ CSV (the raw export or the cleaned file) into a compact frame.
+
+    The file is read in chunks and every chunk is compacted before the next one is
+    read, so peak memory stays close to the size of the result. If the data has a
+    Start column, the calendar columns (Hour, DayOfWeek, Calendar) are added.
+    """
+    chunks = [_load_chunk(chunk, calendar) for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize)]
+    return _concat_categorical(chunks)
+
+
+def memory_report(df, baseline=None):
+    """
+    Memory use per column in MB (deep, i.e. including string payloads), with a total row.
+
+    With a `baseline` frame (e.g. the same rows from a plain pd.read_csv) its memory
+    use is listed next to it, with the reduction factor per column.
+    """
+    usage = df.memory_usage(deep=True, index=True) / 1e6
+    report = pd.DataFrame({"dtype": df.dtypes.astype(str).reindex(usage.index, fill_value=""), "MB": usage})
+    report.loc["Total"] = ["", usage.sum()]
+    if baseline is not None:
+        baseline_usage = baseline.memory_usage(deep=True, index=True) / 1e6
+        baseline_usage["Total"] = baseline_usage.sum()
+        report["baseline MB"] = baseline_usage.reindex(report.index)
+        report["reduction"] = report["baseline MB"] / report["MB"]
+    return report.round(1)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Load the hourly AQ data with compact dtypes and report its memory use.")
+    parser.add_argument("--csv", default=str(HOURLY_CSV_PATH), help="Hourly AQ CSV")
+    parser.add_argument("--baseline-rows", type=int, default=None,
+                        help="Compare with a plain pd.read_csv of the first N rows")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    aq_df = load_hourly(args.csv)
+    print(f"Loaded {len(aq_df)} rows in {time.perf_counter() - t0:.1f}s")
+    if args.baseline_rows:
+        baseline = pd.read_csv(args.csv, nrows=args.baseline_rows)
+        print(memory_report(compact(baseline.copy()), baseline).to_string())
+    else:
+        print(memory_report(aq_df).to_string())
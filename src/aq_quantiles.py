@@ -0,0 +1,157 @@
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+import aq_store
+
+# Streaming quantile sketches for IQR outlier removal.
+# The notebook computes Q1/Q3 with .quantile() over the whole concatenated
+# DailyAverageValue column, mixing CO2 (hundreds of ppm) with PM2.5, and needs
+# the full frame in memory to do so. Here a small mergeable sketch (KLL style)
+# is kept per (Country, Notation) and fed chunk by chunk, so IQR bounds can be
+# computed per group at any level, up to the raw hourly data, in bounded memory.
+
+DEFAULT_K = 400  # rank error of roughly 1 / k, memory of about 3 * k values per group
+GROUP_KEYS = ["Country", "Notation"]
+IQR_BOUNDS_PATH = aq_store.PROCESSED_DIR / "AQ_iqr_bounds.csv"
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with bounded memory.
+
+    Values enter level 0; whenever a level grows beyond its capacity it is sorted and
+    every other value (random offset) moves up one level with twice the weight. Until
+    the first compaction all values are kept and quantiles are exact.
+    """
+
+    def __init__(self, k=DEFAULT_K, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        # Lower levels get geometrically smaller buffers than the top one
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 8)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # With an odd count the largest value stays behind so the weight is preserved
+                keep = items[len(items) - len(items) % 2:]
+                promoted = items[: len(items) - len(keep)][self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        """Add an array of values (NaN is ignored)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """Approximate quantile(s) q in [0, 1]; linear interpolation like pandas while exact."""
+        if self.n == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        if len(self.levels) == 1:
+            return np.quantile(self.levels[0], q)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, weights = items[order], weights[order]
+        # Each value sits at the middle of its weight in the cumulative distribution
+        positions = (np.cumsum(weights) - weights / 2) / weights.sum()
+        return np.interp(q, positions, items)
+
+
+def sketch_by_group(frames, value_col="Value", keys=GROUP_KEYS, k=DEFAULT_K, sketches=None):
+    """
+    Feed an iterable of frames (chunks, partitions) into one sketch per group.
+
+    Pass `sketches` to keep adding to an existing dict; returns {group key: sketch}.
+    """
+    sketches = {} if sketches is None else sketches
+    for frame in frames:
+        for key, values in frame.groupby(keys, observed=True, sort=False)[value_col]:
+            if key not in sketches:
+                sketches[key] = QuantileSketch(k)
+            sketches[key].update(values.to_numpy())
+    return sketches
+
+
+def merge_sketches(sketches, depth=len(GROUP_KEYS)):
+    """Merge sketches keyed on longer tuples (e.g. per year) into one per leading `depth` key values."""
+    merged = {}
+    for key, sketch in sorted(sketches.items()):
+        prefix = key[:depth]
+        if prefix not in merged:
+            merged[prefix] = QuantileSketch(sketch.k)
+        merged[prefix].merge(sketch)
+    return merged
+
+
+def iqr_bounds(sketches, keys=GROUP_KEYS, whisker=1.5):
+    """Per-group Q1, Q3, IQR and the lower/upper bounds Q1 - whisker * IQR, Q3 + whisker * IQR."""
+    rows = []
+    for key, sketch in sorted(sketches.items()):
+        q1, q3 = sketch.quantile([0.25, 0.75])
+        rows.append((*key, sketch.n, q1, q3))
+    bounds = pd.DataFrame(rows, columns=list(keys) + ["n", "Q1", "Q3"])
+    bounds["IQR"] = bounds["Q3"] - bounds["Q1"]
+    bounds["lower_bound"] = bounds["Q1"] - whisker * bounds["IQR"]
+    bounds["upper_bound"] = bounds["Q3"] + whisker * bounds["IQR"]
+    return bounds
+
+
+def remove_outliers(df, bounds, value_col="Value", keys=GROUP_KEYS):
+    """Keep the rows within their group's [lower_bound, upper_bound]; groups without bounds are kept."""
+    limits = df[keys].merge(bounds[keys + ["lower_bound", "upper_bound"]], on=keys, how="left")
+    value = df[value_col].to_numpy()
+    lower = limits["lower_bound"].fillna(-np.inf).to_numpy()
+    upper = limits["upper_bound"].fillna(np.inf).to_numpy()
+    return df[(value >= lower) & (value <= upper)]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per (Country, Notation) IQR bounds from streaming quantile sketches.")
+    parser.add_argument("--store", default=str(aq_store.STORE_DIR), help="Hourly Parquet store (hourly Value)")
+    parser.add_argument("--daily", default=None, help="Use a daily average CSV (DailyAverageValue) instead of the store")
+    parser.add_argument("--output", default=str(IQR_BOUNDS_PATH), help="Output CSV for the bounds")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="Sketch size (accuracy vs. memory)")
+    args = parser.parse_args()
+
+    if args.daily:
+        value_col = "DailyAverageValue"
+        frames = pd.read_csv(args.daily, usecols=GROUP_KEYS + [value_col], chunksize=1_000_000)
+    else:
+        value_col = "Value"
+        frames = (frame for _, frame in aq_store.iter_partitions(columns=GROUP_KEYS + [value_col],
+                                                                  store_dir=args.store))
+    result = iqr_bounds(sketch_by_group(frames, value_col, k=args.k))
+    result.to_csv(pathlib.Path(args.output), index=False)
+    print(result.to_string(index=False))
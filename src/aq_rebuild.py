@@ -0,0 +1,295 @@
+import hashlib
+import json
+import os
+import pathlib
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import aq_aggregate
+import aq_quantiles
+import aq_store
+
+# Incremental rebuild of the processed AQ aggregates.
+# A manifest next to the Parquet store records, for every partition file, a
+# content hash and the (Country, Pollutant, Year) it covers. A rebuild compares
+# the store against the manifest and only recomputes the groups of
+# AQ_daily_avg_per_country.csv and AQ_annual_averages.csv that the changed
+# partitions feed into; all other rows are kept from the existing outputs.
+# The same pass keeps a quantile sketch per (Country, Pollutant, Year) in the
+# store, from which the per (Country, Pollutant) IQR bounds are written.
+
+MANIFEST_FILE = "_manifest.json"
+SKETCHES_FILE = "_sketches.pkl"
+DAILY_AVG_PATH = aq_store.PROCESSED_DIR / "AQ_daily_avg_per_country.csv"
+ANNUAL_AVG_PATH = aq_aggregate.ANNUAL_AVG_PATH
+
+
+def file_hash(path, block_size=1 << 20):
+    """sha256 of a file's content, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(store_dir=aq_store.STORE_DIR):
+    path = pathlib.Path(store_dir) / MANIFEST_FILE
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_manifest(manifest, store_dir=aq_store.STORE_DIR):
+    path = pathlib.Path(store_dir) / MANIFEST_FILE
+    path.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+
+
+def load_sketches(store_dir=aq_store.STORE_DIR):
+    """{(Country, Pollutant, Year): QuantileSketch} from the last rebuild, or None."""
+    path = pathlib.Path(store_dir) / SKETCHES_FILE
+    if not path.exists():
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def save_sketches(sketches, store_dir=aq_store.STORE_DIR):
+    with open(pathlib.Path(store_dir) / SKETCHES_FILE, "wb") as f:
+        pickle.dump(sketches, f)
+
+
+def scan_store(store_dir=aq_store.STORE_DIR, previous=None):
+    """
+    Build a manifest of the store: relative path -> hash, size, mtime and coverage.
+
+    Files whose size and mtime match the previous manifest keep their old hash,
+    so only new or rewritten partitions are read from disk.
+    """
+    store_dir = pathlib.Path(store_dir)
+    previous = previous or {}
+    manifest = {}
+    for fragment in aq_store.open_store(store_dir).get_fragments():
+        path = pathlib.Path(fragment.path)
+        rel = path.relative_to(store_dir).as_posix()
+        stat = path.stat()
+        old = previous.get(rel)
+        if old and old["size"] == stat.st_size and old["mtime"] == stat.st_mtime:
+            digest = old["hash"]
+        else:
+            digest = file_hash(path)
+        keys = aq_store.partition_keys(fragment)
+        manifest[rel] = {
+            "hash": digest,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "Country": keys["Country"],
+            "Pollutant": keys["Notation"],
+            "Year": int(keys["Year"]),
+        }
+    return manifest
+
+
+def _coverage(entry):
+    return (entry["Country"], entry["Pollutant"], entry["Year"])
+
+
+def changed_coverage(old, new):
+    """(Country, Pollutant, Year) partitions that were added, removed or rewritten."""
+    changed = set()
+    for rel in set(old) | set(new):
+        if rel not in old or rel not in new or old[rel]["hash"] != new[rel]["hash"]:
+            changed.add(_coverage(new.get(rel) or old[rel]))
+    return changed
+
+
+def _splice(existing, fresh, keys, affected, sort_cols):
+    # Drop every row belonging to an affected group and put the recomputed ones in its place
+    if existing is None or existing.empty:
+        out = fresh
+    else:
+        group = pd.MultiIndex.from_frame(existing[keys])
+        keep = ~group.isin(list(affected))
+        out = pd.concat([existing[keep], fresh], ignore_index=True)
+    return out.sort_values(sort_cols, kind="mergesort").reset_index(drop=True)
+
+
+def daily_averages(hourly):
+    """Same aggregation as the daily average cell in notebooks/air_quality_data_V2.ipynb."""
+    return (
+        hourly.groupby(["Country", "Notation", "Start"])["Value"]
+        .mean()
+        .reset_index()
+        .rename(columns={"Value": "DailyAverageValue"})
+    )
+
+
+def _task_groups(keys, per_pollutant=True):
+    # One task per (Country, Pollutant) or per Country, each with all of its years, so
+    # every annual group and its Y - 1 partition end up in the same task
+    groups = {}
+    for key in sorted(keys):
+        groups.setdefault(key[:2] if per_pollutant else key[:1], []).append(key)
+    return list(groups.values())
+
+
+def _map(func, tasks, workers):
+    # Results come back in task order whatever the number of workers, so merging them
+    # gives the same output as a serial run
+    # No more processes than tasks, so a small incremental rebuild runs without a pool
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        return [func(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, *zip(*tasks)))
+
+
+def _daily_task(keys, store_dir, prepare):
+    parts = []
+    for _, hourly in aq_store.iter_partitions(keys, columns=["Country", "Notation", "Start", "Value"],
+                                              store_dir=store_dir):
+        if prepare is not None:
+            hourly = prepare(hourly)
+        parts.append(daily_averages(hourly.dropna(subset=["Value"])))
+    return pd.concat(parts, ignore_index=True) if parts else None
+
+
+def _annual_task(keys, affected, store_dir, prepare):
+    # Sum/count state and the quantile sketches per (Country, Pollutant, Year) of the
+    # affected groups, from the same chunks
+    def cells():
+        for _, hourly in aq_store.iter_partitions(keys, columns=["Country", "Notation", "End", "Value"],
+                                                  store_dir=store_dir):
+            if prepare is not None:
+                hourly = prepare(hourly)
+            cells = aq_aggregate.normalize_chunk(hourly)
+            in_scope = pd.MultiIndex.from_frame(cells[aq_aggregate.GROUP_KEYS]).isin(list(affected))
+            yield cells[in_scope]
+
+    sketches = {}
+    return aq_aggregate.cell_sums(cells(), sketches), sketches
+
+
+def rebuild_daily(coverage, store_dir, output_path, prepare=None, workers=1, per_pollutant=True):
+    """Recompute the daily averages for the given (Country, Pollutant, Year) partitions."""
+    # A daily group never spans two partitions, so they can be computed independently
+    tasks = [(keys, store_dir, prepare) for keys in _task_groups(coverage, per_pollutant)]
+    parts = [part for part in _map(_daily_task, tasks, workers) if part is not None]
+    fresh = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+        {"Country": [], "Notation": [], "Start": pd.to_datetime([]), "DailyAverageValue": []})
+
+    existing = None
+    if pathlib.Path(output_path).exists():
+        existing = pd.read_csv(output_path, parse_dates=["Start"])
+        existing["_Year"] = existing["Start"].dt.year
+    fresh["_Year"] = fresh["Start"].dt.year
+    out = _splice(existing, fresh, ["Country", "Notation", "_Year"], coverage,
+                  ["Country", "Notation", "Start"])
+    out.drop(columns="_Year").to_csv(output_path, index=False)
+    return len(fresh)
+
+
+def rebuild_annual(coverage, store_dir, output_path, prepare=None, workers=1, per_pollutant=True, sketches=None):
+    """
+    Recompute the annual averages touched by the given (Country, Pollutant, Year) partitions.
+
+    With a `sketches` dict ((Country, Pollutant, Year) -> QuantileSketch), the sketches
+    of the recomputed groups are replaced by those of the same pass.
+    """
+    # Annual groups are keyed on the year of the *end* timestamp, so the last hour of a
+    # Start-year partition counts towards the next year: a changed partition Y affects
+    # the annual groups Y and Y + 1, and group Y is fed by partitions Y - 1 and Y.
+    affected = set()
+    for country, pollutant, year in coverage:
+        affected.update({(country, pollutant, year), (country, pollutant, year + 1)})
+    needed = {(c, p, y) for c, p, year in affected for y in (year - 1, year)}
+
+    tasks = [(keys, affected, store_dir, prepare) for keys in _task_groups(needed, per_pollutant)]
+    results = _map(_annual_task, tasks, workers)
+    sums = aq_aggregate.accumulate(part for part, _ in results if part is not None)
+    if sketches is not None:
+        for key in [key for key in sketches if key in affected]:
+            del sketches[key]
+        for _, task_sketches in results:
+            for (country, pollutant, year), sketch in task_sketches.items():
+                key = (country, pollutant, int(year))
+                sketches[key] = sketches[key].merge(sketch) if key in sketches else sketch
+    existing = pd.read_csv(output_path) if pathlib.Path(output_path).exists() else None
+    if sums is None or sums.empty:
+        fresh = pd.DataFrame(columns=existing.columns if existing is not None else aq_aggregate.GROUP_KEYS)
+    else:
+        fresh = aq_aggregate.annual_averages_from_sums(sums)
+    out = _splice(existing, fresh, aq_aggregate.GROUP_KEYS, affected, aq_aggregate.GROUP_KEYS)
+    out.to_csv(output_path, index=False)
+    return len(fresh)
+
+
+def rebuild(store_dir=aq_store.STORE_DIR, daily_path=DAILY_AVG_PATH, annual_path=ANNUAL_AVG_PATH,
+            prepare=None, full=False, workers=1, per_pollutant=True, bounds_path=aq_quantiles.IQR_BOUNDS_PATH):
+    """
+    Bring the processed AQ aggregates up to date with the Parquet store.
+
+    Only partitions whose content hash changed since the last rebuild are read. With
+    full=True (or when there is no manifest / no outputs yet) everything is rebuilt.
+    `prepare` is an optional function applied to the hourly frame before aggregating
+    (e.g. the cleaning step); with workers > 1 it must be picklable (a module-level
+    function). The partitions are processed per (Country, Pollutant), or per Country
+    with per_pollutant=False, on `workers` processes. The per (Country, Pollutant)
+    IQR bounds of the hourly values (aq_quantiles.iqr_bounds) are written to
+    bounds_path, unless it is None. Returns the set of (Country, Pollutant, Year)
+    partitions that were recomputed.
+    """
+    old = load_manifest(store_dir)
+    new = scan_store(store_dir, previous=old)
+    sketches = load_sketches(store_dir) if bounds_path is not None else None
+    outputs_exist = pathlib.Path(daily_path).exists() and pathlib.Path(annual_path).exists()
+    if full or not old or not outputs_exist or (bounds_path is not None and sketches is None):
+        coverage = {_coverage(entry) for entry in new.values()}
+        for path in (daily_path, annual_path):
+            pathlib.Path(path).unlink(missing_ok=True)
+        sketches = {} if bounds_path is not None else None
+    else:
+        coverage = changed_coverage(old, new)
+
+    if coverage:
+        options = {"prepare": prepare, "workers": workers, "per_pollutant": per_pollutant}
+        rebuild_daily(coverage, store_dir, daily_path, **options)
+        rebuild_annual(coverage, store_dir, annual_path, sketches=sketches, **options)
+    if bounds_path is not None and (coverage or not pathlib.Path(bounds_path).exists()):
+        save_sketches(sketches, store_dir)
+        aq_quantiles.iqr_bounds(aq_quantiles.merge_sketches(sketches)).to_csv(bounds_path, index=False)
+    save_manifest(new, store_dir)
+    return coverage
+
+
+def clean(hourly):
+    """`prepare` step applying the notebook cleaning rules (aq_cleaning)."""
+    import aq_cleaning
+
+    return aq_cleaning.clean_aq(hourly)[0]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Incrementally rebuild the processed AQ aggregates from the Parquet store.")
+    parser.add_argument("--store", default=str(aq_store.STORE_DIR), help="Partitioned Parquet store")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and rebuild everything")
+    parser.add_argument("--clean", action="store_true", help="Apply the notebook cleaning rules (aq_cleaning) first")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"Number of worker processes (this machine has {os.cpu_count()} cores)")
+    parser.add_argument("--per-country", action="store_true",
+                        help="One task per country instead of per (country, pollutant)")
+
+    parser.add_argument("--bounds", default=str(aq_quantiles.IQR_BOUNDS_PATH),
+                        help="Output CSV for the per Country/Pollutant IQR bounds")
+    args = parser.parse_args()
+
+    rebuilt = rebuild(args.store, prepare=clean if args.clean else None, full=args.full,
+                      workers=args.workers, per_pollutant=not args.per_country, bounds_path=args.bounds)
+    if rebuilt:
+        print(f"Rebuilt {len(rebuilt)} (Country, Pollutant, Year) partitions")
+    else:
+        print("Processed AQ aggregates are up to date")
@@ -0,0 +1,173 @@
+import os
+import pathlib
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+import aq_rebuild
+import aq_store
+
+# Station (Samplingpoint) index for the partitioned Parquet store.
+# Building the index sorts the rows of every partition file by
+# (Samplingpoint, Start), so each station occupies one contiguous row range per
+# file, and records per station: country, pollutants, first/last timestamp,
+# row count, invalid-value rate and those row ranges. Station coverage questions
+# (e.g. unique stations per country for the station density map) are then
+# answered from the index and station reads only touch the matching row groups.
+
+STATIONS_FILE = "_stations.parquet"
+RANGES_FILE = "_station_ranges.parquet"
+SORT_KEYS = [("Samplingpoint", "ascending"), ("Start", "ascending")]
+ROWS_PER_GROUP = 32_000
+
+# Same definition as the invalid value rate in air_quality_data_V2.ipynb
+INVALID_BELOW = -1000
+
+
+def _sorted_table(path, rows_per_group):
+    # Sort a partition file; files that are already sorted are left untouched.
+    # The sorted rows go to a hidden temporary file next to it (ignored by the
+    # dataset) that replaces the original, so readers never see a half-written file.
+    # Returns (table, whether the file was rewritten)
+    path = pathlib.Path(path)
+    table = pq.ParquetFile(path).read()
+    order = pc.sort_indices(table, sort_keys=SORT_KEYS)
+    if np.array_equal(order.to_numpy(), np.arange(len(table))):
+        return table, False
+    table = table.take(order)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    pq.write_table(table, tmp_path, row_group_size=rows_per_group)
+    os.replace(tmp_path, path)
+    return table, True
+
+
+def _in_manifest(entry, path):
+    # Whether the rebuild manifest entry describes the file as it is on disk now
+    if entry is None:
+        return False
+    stat = path.stat()
+    if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+        return True
+    return entry["hash"] == aq_rebuild.file_hash(path)
+
+
+def build_station_index(store_dir=aq_store.STORE_DIR, rows_per_group=ROWS_PER_GROUP):
+    """
+    Sort the store by station and write the station index next to it. Returns the station table.
+
+    Sorting only reorders rows, so a partition that the last aq_rebuild already used
+    keeps counting as unchanged: its manifest entry is updated to the rewritten file.
+    """
+    store_dir = pathlib.Path(store_dir)
+    manifest = aq_rebuild.load_manifest(store_dir)
+    manifest_changed = False
+    stats = []
+    for fragment in aq_store.open_store(store_dir).get_fragments():
+        keys = aq_store.partition_keys(fragment)
+        path = pathlib.Path(fragment.path)
+        rel = path.relative_to(store_dir).as_posix()
+        in_manifest = _in_manifest(manifest.get(rel), path)
+        table, rewritten = _sorted_table(path, rows_per_group)
+        if rewritten and in_manifest:
+            stat = path.stat()
+            manifest[rel].update(hash=aq_rebuild.file_hash(path), size=stat.st_size, mtime=stat.st_mtime)
+            manifest_changed = True
+        frame = table.select(["Samplingpoint", "Start", "End", "Value"]).to_pandas()
+        frame["Invalid"] = frame["Value"] < INVALID_BELOW
+        frame["Row"] = np.arange(len(frame))
+        per_station = frame.groupby("Samplingpoint", sort=False).agg(
+            FirstStart=("Start", "min"),
+            LastEnd=("End", "max"),
+            Rows=("Row", "size"),
+            Invalid=("Invalid", "sum"),
+            Offset=("Row", "min"),
+        ).reset_index()
+        per_station["Country"] = keys["Country"]
+        per_station["Notation"] = keys["Notation"]
+        per_station["Year"] = int(keys["Year"])
+        per_station["File"] = rel
+        stats.append(per_station)
+    if manifest_changed:
+        aq_rebuild.save_manifest(manifest, store_dir)
+
+    per_file = pd.concat(stats, ignore_index=True)
+    countries = per_file.groupby("Samplingpoint")["Country"].nunique()
+    if (countries > 1).any():
+        raise ValueError(f"Stations reported under several countries: {list(countries.index[countries > 1])}")
+    ranges = per_file[["Samplingpoint", "Country", "Notation", "Year", "File", "Offset", "Rows"]]
+    ranges = ranges.sort_values(["Samplingpoint", "Notation", "Year"])
+    stations = per_file.groupby("Samplingpoint").agg(
+        Country=("Country", "first"),
+        Pollutants=("Notation", lambda s: ";".join(sorted(set(s)))),
+        FirstStart=("FirstStart", "min"),
+        LastEnd=("LastEnd", "max"),
+        Rows=("Rows", "sum"),
+        Invalid=("Invalid", "sum"),
+    ).reset_index()
+    stations["InvalidValueRate"] = stations.pop("Invalid") / stations["Rows"]
+
+    pq.write_table(pa.Table.from_pandas(stations, preserve_index=False), store_dir / STATIONS_FILE)
+    pq.write_table(pa.Table.from_pandas(ranges, preserve_index=False), store_dir / RANGES_FILE)
+    return stations
+
+
+def station_index(store_dir=aq_store.STORE_DIR):
+    """One row per Samplingpoint: Country, Pollutants, FirstStart, LastEnd, Rows, InvalidValueRate."""
+    return pd.read_parquet(pathlib.Path(store_dir) / STATIONS_FILE)
+
+
+def stations_per_country(store_dir=aq_store.STORE_DIR):
+    """Number of unique stations per country (same as groupby('Country')['Samplingpoint'].nunique())."""
+    counts = station_index(store_dir).groupby("Country").size()
+    return counts.rename("UniqueStations").reset_index()
+
+
+def _read_range(path, offset, length, columns):
+    # Read only the row groups overlapping [offset, offset + length) and slice them
+    parquet = pq.ParquetFile(path)
+    starts = np.cumsum([0] + [parquet.metadata.row_group(i).num_rows for i in range(parquet.num_row_groups)])
+    groups = [i for i in range(parquet.num_row_groups) if starts[i] < offset + length and starts[i + 1] > offset]
+    table = parquet.read_row_groups(groups, columns=columns)
+    return table.slice(offset - starts[groups[0]], length)
+
+
+def read_station(samplingpoints, columns=None, store_dir=aq_store.STORE_DIR):
+    """
+    Read the hourly rows of one or more stations using the index.
+
+    Returns the same layout as aq_store.read_aq, sorted by station and Start.
+    """
+    store_dir = pathlib.Path(store_dir)
+    wanted = aq_store._as_list(samplingpoints)
+    if columns is None:
+        columns = aq_store._default_columns(store_dir)
+    ranges = pd.read_parquet(store_dir / RANGES_FILE, filters=[("Samplingpoint", "in", wanted)])
+
+    partition_cols = [c for c in columns if c in aq_store.PARTITION_SCHEMA.names]
+    file_cols = [c for c in columns if c not in partition_cols]
+    parts = []
+    for row in ranges.itertuples(index=False):
+        frame = _read_range(store_dir / row.File, row.Offset, row.Rows, file_cols).to_pandas()
+        for col in partition_cols:
+            frame[col] = getattr(row, col)
+        parts.append(frame)
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    out = pd.concat(parts, ignore_index=True)[columns]
+    sort_cols = [c for c in ("Samplingpoint", "Start") if c in out.columns]
+    return out.sort_values(sort_cols, kind="mergesort", ignore_index=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sort the Parquet store by station and build the station index.")
+    parser.add_argument("--store", default=str(aq_store.STORE_DIR), help="Partitioned Parquet store")
+    args = parser.parse_args()
+
+    stations = build_station_index(args.store)
+    print(f"Indexed {len(stations)} stations")
+    print(stations_per_country(args.store).to_string(index=False))
@@ -0,0 +1,204 @@
+import json
+import numbers
+import pathlib
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+import aq_calendar
+
+# Partitioned Parquet store for the hourly air quality (AQ) data.
+# The store lives next to the processed CSVs and is laid out as
+#   AQ_hourly_store/Country=NO/Notation=NO2/Year=2019/part-0.parquet
+# so that a question about one country / pollutant / year range only touches
+# the matching directories instead of parsing the full 1.7 GB CSV export.
+
+BASE_DIR = pathlib.Path(__file__).parent.parent  # DSML/
+PROCESSED_DIR = BASE_DIR / "data" / "processed"
+HOURLY_CSV_PATH = PROCESSED_DIR / "AQ_merged_data_export_2.csv"
+STORE_DIR = PROCESSED_DIR / "AQ_hourly_store"
+
+PARTITION_SCHEMA = pa.schema([
+    ("Country", pa.string()),
+    ("Notation", pa.string()),
+    ("Year", pa.int16()),
+])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+# Sidecar file recording the column order of the source CSV (plus the calendar
+# columns added at ingest), so the reader can hand back frames with the same
+# layout the notebooks are used to
+COLUMNS_FILE = "_columns.json"
+# Conversion report: rows written and rows dropped because their Start could not be parsed
+REPORT_FILE = "_conversion.json"
+
+
+def _prepare_chunk(chunk):
+    # Parse the timestamps once at ingest time; readers get datetime64 columns.
+    # Rows without a parseable Start have no partition (Year) and are dropped;
+    # an unparseable End is kept as NaT
+    for col in ("Start", "End"):
+        if col in chunk.columns:
+            chunk[col] = pd.to_datetime(chunk[col], format="ISO8601", errors="coerce")
+    chunk = chunk[chunk["Start"].notna()].copy()
+    chunk["Year"] = chunk["Start"].dt.year.astype("int16")
+    # Hour / DayOfWeek / Calendar window bitmask, see aq_calendar
+    return aq_calendar.add_calendar(chunk)
+
+
+def _iter_batches(csv_path, chunksize, schema_holder):
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        rows = len(chunk)
+        chunk = _prepare_chunk(chunk)
+        schema_holder["rows"] += len(chunk)
+        schema_holder["dropped_start"] += rows - len(chunk)
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if schema_holder["schema"] is None:
+            schema_holder["schema"] = table.schema
+        # Cast every chunk to the schema of the first one so that e.g. an
+        # all-NaN Unit column in a later chunk does not change the file schema
+        yield from table.cast(schema_holder["schema"]).to_batches()
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def convert_csv_to_store(csv_path=HOURLY_CSV_PATH, store_dir=STORE_DIR, chunksize=1_000_000,
+                         rows_per_group=256_000):
+    """
+    Convert the hourly AQ CSV export into a Country/Notation/Year partitioned Parquet store.
+
+    Rows whose Start timestamp cannot be parsed are left out and counted in the
+    conversion report (see conversion_report).
+    """
+    csv_path = pathlib.Path(csv_path)
+    store_dir = pathlib.Path(store_dir)
+    columns = pd.read_csv(csv_path, nrows=0).columns.tolist() + aq_calendar.CALENDAR_COLUMNS
+
+    schema_holder = {"schema": None, "rows": 0, "dropped_start": 0}
+    batches = _iter_batches(csv_path, chunksize, schema_holder)
+    # Pull the first batch so the schema is known before handing over the stream
+    first = next(batches)
+    reader = pa.RecordBatchReader.from_batches(schema_holder["schema"], _chain(first, batches))
+
+    ds.write_dataset(
+        reader,
+        store_dir,
+        format="parquet",
+        partitioning=PARTITIONING,
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=rows_per_group,
+        min_rows_per_group=min(rows_per_group, 64_000),
+    )
+    (store_dir / COLUMNS_FILE).write_text(json.dumps(columns))
+    report = {"rows": schema_holder["rows"], "dropped_unparseable_start": schema_holder["dropped_start"]}
+    (store_dir / REPORT_FILE).write_text(json.dumps(report))
+    return store_dir
+
+
+def conversion_report(store_dir=STORE_DIR):
+    """{"rows": rows written, "dropped_unparseable_start": rows left out} of the last conversion."""
+    return json.loads((pathlib.Path(store_dir) / REPORT_FILE).read_text())
+
+
+def open_store(store_dir=STORE_DIR):
+    """Open the partitioned store as a pyarrow dataset (no data is read yet)."""
+    return ds.dataset(store_dir, format="parquet", partitioning=PARTITIONING)
+
+
+def _as_list(values):
+    if values is None:
+        return None
+    # numbers.Integral also covers numpy integers, e.g. a year taken from a DataFrame
+    if isinstance(values, (str, numbers.Integral)):
+        return [values]
+    return list(values)
+
+
+def build_filter(countries=None, pollutants=None, years=None):
+    """Build a partition filter expression; any argument left as None is not filtered on."""
+    expr = None
+    for field, values in (("Country", _as_list(countries)),
+                          ("Notation", _as_list(pollutants)),
+                          ("Year", _as_list(years))):
+        if values is None:
+            continue
+        cond = ds.field(field).isin(values)
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def partition_keys(fragment):
+    """Country / Notation / Year of a fragment (file) in the store."""
+    return ds.get_partition_keys(fragment.partition_expression)
+
+
+def _default_columns(store_dir):
+    columns_path = pathlib.Path(store_dir) / COLUMNS_FILE
+    if columns_path.exists():
+        return json.loads(columns_path.read_text())
+    return None
+
+
+def _key_filter(country, notation, year):
+    return ((ds.field("Country") == country) & (ds.field("Notation") == notation)
+            & (ds.field("Year") == int(year)))
+
+
+def iter_partitions(keys=None, columns=None, store_dir=STORE_DIR):
+    """
+    Yield ((Country, Notation, Year), frame) one partition at a time.
+
+    Only the partitions in `keys` are read if given, so memory use is bounded by the
+    largest single partition rather than the whole dataset.
+    """
+    dataset = open_store(store_dir)
+    if columns is None:
+        columns = _default_columns(store_dir)
+    present = set()
+    for fragment in dataset.get_fragments():
+        k = partition_keys(fragment)
+        present.add((k["Country"], k["Notation"], int(k["Year"])))
+    wanted = present if keys is None else present & set(keys)
+    for key in sorted(wanted):
+        yield key, dataset.to_table(columns=columns, filter=_key_filter(*key)).to_pandas()
+
+
+def read_aq(countries=None, pollutants=None, years=None, columns=None, store_dir=STORE_DIR):
+    """
+    Read hourly AQ data from the partitioned store.
+
+    Filters on Country / Notation (pollutant) / Year prune whole partitions, and
+    `columns` limits which columns are decoded. E.g. NO2 in Norway for 2019-2023:
+        read_aq(countries="NO", pollutants="NO2", years=range(2019, 2024))
+    By default the frame has the same columns, in the same order, as the CSV export.
+    """
+    if columns is None:
+        columns = _default_columns(store_dir)
+    dataset = open_store(store_dir)
+    table = dataset.to_table(columns=columns, filter=build_filter(countries, pollutants, years))
+    return table.to_pandas()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert the hourly AQ CSV export into a partitioned Parquet store.")
+    parser.add_argument("--csv", default=str(HOURLY_CSV_PATH), help="Hourly AQ CSV export")
+    parser.add_argument("--store", default=str(STORE_DIR), help="Output directory for the Parquet store")
+    parser.add_argument("--chunksize", type=int, default=1_000_000, help="Rows parsed per CSV chunk")
+    parser.add_argument("--no-station-index", action="store_true", help="Skip building the station index")
+    args = parser.parse_args()
+
+    out = convert_csv_to_store(args.csv, args.store, chunksize=args.chunksize)
+    report = conversion_report(out)
+    print(f"Parquet store written to {out}: {report['rows']} rows, "
+          f"{report['dropped_unparseable_start']} rows dropped for an unparseable Start")
+    if not args.no_station_index:
+        import aq_stations
+
+        stations = aq_stations.build_station_index(out)
+        print(f"Station index built for {len(stations)} stations")
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Lasso, Ridge
+from sklearn.model_selection import GridSearchCV, train_test_split
+
+import app_data
+import app_models
+
+# Model selection sweep behind results/model_results_summary.csv and the best /
+# worst model per pollutant x target tables (README, "Model Selection and
+# Hyperparameter Tuning"), as run in analysis.ipynb: for every pollutant x
+# AnnualAvg target, OLS plus GridSearchCV over Ridge, Lasso and Random Forest on
+# AF_fleet and country fixed effects, with an 80/20 train/test split.
+# Each (pollutant, target, model) cell is an independent task run on a process
+# pool, largest grids first. A finished task is written to CHECKPOINT_DIR right
+# away, so `python src/model_sweep.py` resumes an interrupted sweep where it
+# stopped; checkpoints of other data or other grids are ignored. The wall time
+# of every task goes to model_sweep_timings.csv.
+
+RESULTS_DIR = app_data.RESULTS_DIR
+CHECKPOINT_DIR = RESULTS_DIR / "sweep_checkpoints"
+TIMINGS_NAME = "model_sweep_timings.csv"
+
+POLLUTANTS = ["CO2", "NO2", "PM10", "PM2.5", "NOx", "SO2"]
+MODELS = ["LinearRegression", "Ridge", "Lasso", "RandomForest"]
+PARAM_GRIDS = {
+    "Ridge": {"alpha": np.logspace(-3, 2, 5).tolist(), "fit_intercept": [True, False]},
+    "Lasso": {"alpha": np.logspace(-3, 1, 5).tolist(), "fit_intercept": [True, False]},
+    "RandomForest": {
+        "n_estimators": [50, 100, 200],
+        "max_depth": [None, 5, 10],
+        "min_samples_split": [2, 5],
+        "min_samples_leaf": [1, 2],
+        "max_features": ["sqrt", "log2"],
+    },
+}
+ESTIMATORS = {
+    "Ridge": lambda: Ridge(max_iter=10000),
+    "Lasso": lambda: Lasso(max_iter=10000),
+    "RandomForest": lambda: RandomForestRegressor(random_state=42),
+}
+MIN_SAMPLES = 6
+COLUMNS = ["Pollutant", "Target", "Model", "R2_test", "R2_train", "Overfit_gap", "p_value", "stars", "Best_params"]
+
+
+def significance_stars(p):
+    if p < 0.001:
+        return "***"
+    if p < 0.01:
+        return "**"
+    if p < 0.05:
+        return "*"
+    return ""
+
+
+def _grid_size(model):
+    grid = PARAM_GRIDS.get(model, {})
+    return int(np.prod([len(values) for values in grid.values()])) if grid else 1
+
+
+def task_list(pollutants=POLLUTANTS, models=MODELS):
+    """Every (pollutant, target, model) of the sweep with enough data, in the order of the result tables."""
+    data = app_data.aq_vehicle()
+    targets = [col for col in data.columns if col.startswith("AnnualAvg_")]
+    tasks = []
+    for pollutant in pollutants:
+        for target in targets:
+            X, y, _, _ = app_models.training_data(pollutant, target)
+            if len(y) < MIN_SAMPLES:
+                continue
+            tasks.extend((pollutant, target, model) for model in models)
+    return tasks
+
+
+def run_task(pollutant, target, model, X, y, n_jobs=-1):
+    """One result row (dict with COLUMNS) for a model on the data of one pollutant x target."""
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    row = dict.fromkeys(COLUMNS)
+    row.update(Pollutant=pollutant, Target=target, Model=model)
+    if model == "LinearRegression":
+        # As in the notebook: OLS on the training split, its R² reported as R2_test
+        ols = sm.OLS(y_train, sm.add_constant(X_train)).fit()
+        p = float(ols.pvalues[1])
+        row.update(R2_test=float(ols.rsquared), p_value=p, stars=significance_stars(p))
+        return row
+    search = GridSearchCV(ESTIMATORS[model](), PARAM_GRIDS[model], cv=3, scoring="r2", n_jobs=n_jobs)
+    search.fit(X_train, y_train)
+    best = search.best_estimator_
+    r2_test = best.score(X_test, y_test)
+    r2_train = best.score(X_train, y_train)
+    row.update(R2_test=r2_test, R2_train=r2_train, Overfit_gap=r2_train - r2_test,
+               Best_params=str(search.best_params_))
+    return row
+
+
+def _task_name(task):
+    return "__".join(task).replace("/", "_")
+
+
+def _signature(task):
+    # Identifies the data and grid a checkpoint was computed with
+    grid = repr(sorted(PARAM_GRIDS.get(task[2], {}).items()))
+    return {"data": list(app_models.data_fingerprint()), "grid": hashlib.sha1(grid.encode()).hexdigest()[:12]}
+
+
+def load_checkpoint(task, checkpoint_dir=CHECKPOINT_DIR):
+    """The saved {"row", "seconds", ...} of a finished task, or None if missing, unreadable or from other data / grids."""
+    path = checkpoint_dir / f"{_task_name(task)}.json"
+    if not path.exists():
+        return None
+    try:
+        saved = json.loads(path.read_text())
+        signature = _signature(task)
+        if saved["data"] != signature["data"] or saved["grid"] != signature["grid"]:
+            return None
+        if set(saved["row"]) != set(COLUMNS) or not isinstance(saved["seconds"], (int, float)):
+            return None
+    except (ValueError, KeyError, TypeError):
+        # Truncated or hand-edited file: the task is simply run again
+        return None
+    return saved
+
+
+def save_checkpoint(task, row, seconds, n_samples, checkpoint_dir=CHECKPOINT_DIR):
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    path = checkpoint_dir / f"{_task_name(task)}.json"
+    saved = {**_signature(task), "row": row, "seconds": seconds, "n_samples": n_samples}
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(saved, indent=1))
+    tmp.replace(path)
+    return saved
+
+
+def _timed_task(task, X, y, n_jobs):
+    t0 = time.perf_counter()
+    row = run_task(*task, X, y, n_jobs=n_jobs)
+    return row, round(time.perf_counter() - t0, 3)
+
+
+def run_sweep(checkpoint_dir=CHECKPOINT_DIR, workers=1, pollutants=POLLUTANTS, models=MODELS, progress=None):
+    """
+    Run every task without an up-to-date checkpoint on `workers` processes.
+
+    Returns {task: checkpoint} for all tasks. `progress(task, checkpoint)` is called as each
+    task finishes.
+    """
+    done = {}
+    pending = []
+    for task in task_list(pollutants, models):
+        saved = load_checkpoint(task, checkpoint_dir)
+        if saved is not None:
+            done[task] = saved
+        else:
+            pending.append(task)
+    # Largest grids first so the pool is not left waiting on one long task at the end
+    pending.sort(key=lambda task: -_grid_size(task[2]))
+    data = {task: app_models.training_data(*task[:2])[:2] for task in pending}
+
+    def finish(task, result):
+        row, seconds = result
+        done[task] = save_checkpoint(task, row, seconds, len(data[task][1]), checkpoint_dir)
+        if progress is not None:
+            progress(task, done[task])
+
+    if workers <= 1:
+        for task in pending:
+            finish(task, _timed_task(task, *data[task], n_jobs=-1))
+    else:
+        # One process per task, so each grid search runs on a single core
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_timed_task, task, *data[task], 1): task for task in pending}
+            for future in as_completed(futures):
+                finish(futures[future], future.result())
+    return done
+
+
+def result_tables(done, pollutants=POLLUTANTS, models=MODELS):
+    """(all results, best and worst model per pollutant x target) in the schema of the results CSVs."""
+    rows = [done[task]["row"] for task in task_list(pollutants, models) if task in done]
+    results = pd.DataFrame(rows, columns=COLUMNS)
+    best = results.loc[results.groupby(["Pollutant", "Target"])["R2_test"].idxmax()]
+    best = best.sort_values("R2_test", ascending=False)
+    worst = results.loc[results.groupby(["Pollutant", "Target"])["R2_test"].idxmin()]
+    worst = worst.sort_values("R2_test", ascending=True)
+    return results, best, worst
+
+
+def timing_table(done):
+    """Wall time of every task, slowest first."""
+    timings = pd.DataFrame([
+        {"Pollutant": task[0], "Target": task[1], "Model": task[2], "Seconds": saved["seconds"],
+         "Samples": saved["n_samples"], "Candidates": _grid_size(task[2])}
+        for task, saved in done.items()
+    ])
+    return timings.sort_values("Seconds", ascending=False, ignore_index=True)
+
+
+def write_results(done, output_dir=RESULTS_DIR):
+    results, best, worst = result_tables(done)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    results.to_csv(output_dir / app_data.path("model_results").name, index=False)
+    best.to_csv(output_dir / app_data.path("best_results").name, index=False)
+    worst.to_csv(output_dir / app_data.path("worst_results").name, index=False)
+    timing_table(done).to_csv(output_dir / TIMINGS_NAME, index=False)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import pathlib
+    import shutil
+
+    parser = argparse.ArgumentParser(description="Run the model selection sweep and write the results tables.")
+    parser.add_argument("--output", default=str(RESULTS_DIR), help="Folder for the results CSVs")
+    parser.add_argument("--checkpoints", default=str(CHECKPOINT_DIR), help="Folder for per-task checkpoints")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--restart", action="store_true", help="Discard existing checkpoints first")
+    args = parser.parse_args()
+
+    checkpoint_dir = pathlib.Path(args.checkpoints)
+    if args.restart and checkpoint_dir.exists():
+        shutil.rmtree(checkpoint_dir)
+
+    def report(task, saved):
+        print(f"{' x '.join(task):<45} {saved['seconds']:8.2f} s", flush=True)
+
+    done = run_sweep(checkpoint_dir, workers=args.workers, progress=report)
+    results = write_results(done, pathlib.Path(args.output))
+    total = sum(saved["seconds"] for saved in done.values())
+    print(f"{len(results)} results ({total:.0f} s of task time) -> {args.output}")
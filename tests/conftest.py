@@ -0,0 +1,100 @@
+import pathlib
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The modules live as flat files in src/ (the app runs with src/ on sys.path)
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "src"))
+
+import aq_store  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    # Partitioned store of synthetic hourly data: 2 countries x 2 pollutants x 2020-2021 (and Nov/Dec 2019)
+    rng = np.random.default_rng(1)
+    n = 6_000
+    start = pd.Timestamp("2019-11-01") + pd.to_timedelta(rng.integers(0, 24 * 500, n), unit="h")
+    country = rng.choice(["AT", "NO"], n)
+    hourly = pd.DataFrame({
+        "Samplingpoint": np.char.add(country.astype(str), rng.choice(["/SP1", "/SP2", "/SP3"], n)),
+        "Country": country,
+        "Notation": rng.choice(["NO2", "PM10"], n),
+        "Start": start.strftime("%Y-%m-%d %H:%M:%S"),
+        "End": (start + pd.Timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S"),
+        "Value": rng.gamma(2.0, 10.0, n),
+    })
+    csv_path = tmp_path / "hourly.csv"
+    hourly.to_csv(csv_path, index=False)
+    return aq_store.convert_csv_to_store(csv_path, tmp_path / "store", chunksize=2_000)
+
+
+@pytest.fixture
+def annual_tables(tmp_path, monkeypatch):
+    # Synthetic AQ_annual_averages.csv and combined_vehicle_data.csv for the app's model code
+    rng = np.random.default_rng(0)
+    countries = ["AT", "BE", "DE", "SE"]
+    vehicle = pd.DataFrame([
+        {"Country": c, "Year": y, "AF_fleet": rng.uniform(0, 30), "EV_share": rng.uniform(0, 10)}
+        for c in countries for y in range(2013, 2024)
+    ])
+    aq = []
+    for pollutant in ["NO2", "PM10"]:
+        for row in vehicle.itertuples():
+            level = 20 + 3 * countries.index(row.Country) - 0.2 * row.AF_fleet
+            aq.append({"Country": row.Country, "Pollutant": pollutant, "Year": row.Year,
+                       **{f"AnnualAvg_{w}": level + rng.normal(0, 2) for w in ["all", "daytime", "rushhour"]}})
+    aq = pd.DataFrame(aq)
+    # A target with missing years, so the targets of a pollutant do not all share the same rows
+    aq.loc[aq.index % 7 == 0, "AnnualAvg_rushhour"] = np.nan
+    aq.to_csv(tmp_path / "aq_annual.csv", index=False)
+    vehicle.to_csv(tmp_path / "vehicle.csv", index=False)
+    import app_data
+
+    monkeypatch.setitem(app_data.TABLES, "aq_annual", tmp_path / "aq_annual.csv")
+    monkeypatch.setitem(app_data.TABLES, "vehicle", tmp_path / "vehicle.csv")
+    return aq, vehicle
+
+
+@pytest.fixture
+def hourly_csv(tmp_path):
+    # Small CSV with the columns and formats of the hourly AQ export
+    rng = np.random.default_rng(6)
+    n = 20_000
+    start = pd.Timestamp("2021-01-01") + pd.to_timedelta(rng.integers(0, 24 * 60, n), unit="h")
+    df = pd.DataFrame({
+        "Samplingpoint": rng.choice([f"SP{i}" for i in range(40)], n),
+        "Pollutant": rng.choice([7, 8, 5], n),
+        "Start": start.strftime("%Y-%m-%d %H:%M:%S"),
+        "End": (start + pd.Timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S"),
+        "Value": np.where(rng.random(n) < 0.05, np.nan, rng.gamma(2.0, 10.0, n).round(6)),
+        "Unit": "ug.m-3",
+        "AggType": "hour",
+        "Validity": rng.integers(-1, 4, n),
+        "Country": rng.choice(["NO", "NL", "SE"], n),
+        "Notation": rng.choice(["NO2", "PM10", "O3"], n),
+    })
+    path = tmp_path / "hourly.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    # Empty model registry that loads artifacts from tmp_path/models instead of models/
+    import functools
+
+    import app_artifacts
+    import app_models
+
+    artifact_dir = tmp_path / "models"
+    monkeypatch.setattr(app_artifacts, "load_artifact",
+                        functools.partial(app_artifacts.load_artifact, artifact_dir=artifact_dir))
+    monkeypatch.setattr(app_artifacts, "load_surface",
+                        functools.partial(app_artifacts.load_surface, artifact_dir=artifact_dir))
+    monkeypatch.setattr(app_models, "_stats", dict.fromkeys(app_models._stats, 0))
+    app_models.clear()
+    yield artifact_dir
+    app_models.clear()
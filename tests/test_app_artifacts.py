@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pytest
+
+import app_artifacts
+import app_models
+
+CONFIG = ("NO2", "AnnualAvg_all", "Ridge", {"alpha": 3.0})
+
+
+def _save(artifact_dir, model_type="Ridge"):
+    pollutant, target, _, params = CONFIG
+    key = app_models.model_key(pollutant, target, model_type, params)
+    fitted = app_models.fit_model(pollutant, target, model_type, params)
+    app_artifacts.save_artifact(key, fitted, artifact_dir, app_models.prediction_surface(fitted))
+    return key, fitted
+
+
+def test_saved_model_predicts_identically(annual_tables, tmp_path):
+    key, fitted = _save(tmp_path)
+    model, meta = app_artifacts.load_artifact(key, tmp_path)
+    np.testing.assert_array_equal(model.predict(fitted.X), fitted.model.predict(fitted.X))
+    assert meta["features"] == fitted.features
+    assert meta["r2"] == fitted.r2
+    assert meta["params"] == {"alpha": 3.0}
+
+
+def test_get_model_loads_a_valid_artifact(annual_tables, registry):
+    _, fitted = _save(registry)
+    loaded = app_models.get_model(*CONFIG)
+    info = app_models.registry_info()
+    assert (info["misses"], info["loads"]) == (1, 1)
+    np.testing.assert_array_equal(loaded.X, fitted.X)
+    np.testing.assert_array_equal(loaded.model.predict(loaded.X), fitted.model.predict(fitted.X))
+
+
+@pytest.mark.parametrize("field, value", [("data", ["000000000000", "000000000000"]), ("sklearn", "0.0.1")])
+def test_stale_artifact_is_refit(annual_tables, registry, field, value):
+    key, fitted = _save(registry)
+    # Replace the stored model with a different one, so serving it would show
+    lasso_key, _ = _save(registry, "Lasso")
+    name = app_artifacts.artifact_name(key)
+    lasso = registry / f"{app_artifacts.artifact_name(lasso_key)}.joblib"
+    (registry / f"{name}.joblib").write_bytes(lasso.read_bytes())
+    meta_path = registry / f"{name}.json"
+    meta = json.loads(meta_path.read_text())
+    meta[field] = value
+    meta_path.write_text(json.dumps(meta))
+
+    # (the registry fixture points both loaders at this directory)
+    assert app_artifacts.load_artifact(key) is None
+    assert app_artifacts.load_surface(key, app_models.SURFACE_STEP) is None
+    refit = app_models.get_model(*CONFIG)
+    info = app_models.registry_info()
+    assert (info["misses"], info["loads"]) == (1, 0)
+    np.testing.assert_array_equal(refit.model.coef_, fitted.model.coef_)
@@ -0,0 +1,29 @@
+import pytest
+
+import app_assets
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def noisy_gif(tmp_path):
+    # Random pixels barely compress, so the size only drops with width and frame count
+    frames = [Image.effect_noise((400, 300), 64 + i).convert("RGB") for i in range(8)]
+    path = tmp_path / "noise.gif"
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=50, loop=0)
+    return path
+
+
+def test_cap_gif_meets_the_cap(noisy_gif, tmp_path):
+    target = tmp_path / "capped.gif"
+    size = app_assets.cap_gif(noisy_gif, target, max_width=240, max_bytes=noisy_gif.stat().st_size // 2)
+    assert size == target.stat().st_size <= noisy_gif.stat().st_size // 2
+    with Image.open(target) as capped:
+        assert capped.width <= 240
+
+
+def test_cap_gif_raises_when_the_cap_cannot_be_met(noisy_gif, tmp_path):
+    target = tmp_path / "capped.gif"
+    with pytest.raises(ValueError, match="cap"):
+        app_assets.cap_gif(noisy_gif, target, max_bytes=1_000)
+    assert not target.exists()
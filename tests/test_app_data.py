@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app_data
+
+
+@pytest.fixture(params=[True, False], ids=["copy-on-write", "no copy-on-write"])
+def copy_mode(request, monkeypatch):
+    # Also run the pandas 2.x path (shallow copies would share the cached arrays)
+    monkeypatch.setattr(app_data, "_copy_on_write", lambda: request.param)
+    return request.param
+
+
+def _touch_later(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_edits_do_not_reach_the_cache(annual_tables, copy_mode):
+    aq, _ = annual_tables
+    df = app_data.table("aq_annual")
+    df.loc[df.index[:5], "AnnualAvg_all"] = -1.0
+    df["AnnualAvg_rushhour"] = df["AnnualAvg_rushhour"].fillna(0.0)
+    df.drop(columns="Year", inplace=True)
+    pd.testing.assert_frame_equal(app_data.table("aq_annual"), aq)
+
+    merged = app_data.aq_vehicle()
+    expected = merged.copy(deep=True)
+    merged.loc[merged.index[0], "AF_fleet"] = np.nan
+    merged["EV_share"] = merged["EV_share"].fillna(0.0).mul(0)
+    pd.testing.assert_frame_equal(app_data.aq_vehicle(), expected)
+
+
+def test_changed_file_is_reloaded(annual_tables):
+    aq, _ = annual_tables
+    path = app_data.path("aq_annual")
+    app_data.table("aq_annual")
+    reads = app_data.cache_info()["reads"]
+
+    # Touched but not changed: hashed again, not re-read
+    _touch_later(path)
+    pd.testing.assert_frame_equal(app_data.table("aq_annual"), aq)
+    assert app_data.cache_info()["reads"] == reads
+
+    changed = aq.assign(AnnualAvg_all=aq["AnnualAvg_all"] + 1)
+    changed.to_csv(path, index=False)
+    _touch_later(path)
+    pd.testing.assert_frame_equal(app_data.table("aq_annual"), changed)
+    assert app_data.cache_info()["reads"] == reads + 1
+
+
+@pytest.mark.parametrize("name", ["aq_annual", "vehicle"])
+def test_merge_follows_either_input(annual_tables, name):
+    aq, vehicle = annual_tables
+    before = app_data.aq_vehicle()
+    assert app_data.aq_vehicle() is not before  # callers get their own copy
+    frames = {"aq_annual": aq, "vehicle": vehicle}
+    col = "AnnualAvg_all" if name == "aq_annual" else "AF_fleet"
+    frames[name] = frames[name].assign(**{col: frames[name][col] * 2})
+    frames[name].to_csv(app_data.path(name), index=False)
+    _touch_later(app_data.path(name))
+
+    after = app_data.aq_vehicle()
+    expected = pd.merge(frames["aq_annual"], frames["vehicle"], on=["Country", "Year"], how="left")
+    pd.testing.assert_frame_equal(after, expected)
+    np.testing.assert_allclose(after[col], before[col] * 2)
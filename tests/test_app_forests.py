@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+import app_forests
+import app_models
+
+
+@pytest.fixture(autouse=True)
+def fresh_forests():
+    app_forests.clear()
+    yield
+    app_forests.clear()
+
+
+def test_first_trees_are_the_fresh_forest(annual_tables):
+    # Grow past 12 trees first, so 12 is served by cutting the warm-started forest
+    app_forests.get_forest("NO2", "AnnualAvg_all", 30)
+    fitted = app_forests.get_forest("NO2", "AnnualAvg_all", 12)
+    fresh = RandomForestRegressor(n_estimators=12, random_state=app_forests.RANDOM_STATE).fit(fitted.X, fitted.y)
+    np.testing.assert_array_equal(fitted.model.predict(fitted.X), fresh.predict(fitted.X))
+    assert fitted.r2 == fresh.score(fitted.X, fitted.y)
+    # The registry's RandomForest with the same number of trees is the same model
+    registry = app_models.fit_model("NO2", "AnnualAvg_all", "RandomForest", {"n_estimators": 12}, fixed_effects=False)
+    np.testing.assert_array_equal(registry.model.predict(registry.X), fresh.predict(fitted.X))
+
+
+def test_growing_only_fits_the_new_trees(annual_tables):
+    fitted_before = app_forests.forest_info()["trees_fitted"]
+    app_forests.get_forest("PM10", "AnnualAvg_daytime", 10)
+    app_forests.get_forest("PM10", "AnnualAvg_daytime", 25)
+    app_forests.get_forest("PM10", "AnnualAvg_daytime", 5)
+    info = app_forests.forest_info()
+    assert info["trees_fitted"] - fitted_before == 25
+    assert info["trees"] == 25
+
+
+def test_oob_curve_ends_at_the_oob_score(annual_tables):
+    fitted = app_forests.get_forest("NO2", "AnnualAvg_rushhour", 40)
+    counts, scores = app_forests.oob_curve("NO2", "AnnualAvg_rushhour")
+    assert counts.tolist() == list(range(1, 41))
+    fresh = RandomForestRegressor(n_estimators=40, random_state=app_forests.RANDOM_STATE, oob_score=True)
+    fresh.fit(fitted.X, fitted.y)
+    assert scores[-1] == pytest.approx(fresh.oob_score_, abs=1e-12)
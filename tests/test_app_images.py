@@ -0,0 +1,65 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+import app_images  # noqa: E402
+
+
+def _figure(path, width, height, seed=0):
+    # Noisy RGBA figure, so renditions of different sources differ
+    pixels = np.random.default_rng(seed).integers(0, 256, (height, width, 4), dtype=np.uint8)
+    Image.fromarray(pixels, "RGBA").save(path)
+    return path
+
+
+def _size(data):
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+
+def test_renditions_are_at_most_display_width(tmp_path):
+    wide = _figure(tmp_path / "wide.png", 2000, 1000)
+    narrow = _figure(tmp_path / "narrow.png", 300, 200)
+    renditions = tmp_path / "renditions"
+    assert _size(app_images.rendition(wide, renditions_dir=renditions)) == (800, 400)
+    # Smaller figures are not scaled up
+    assert _size(app_images.rendition(narrow, renditions_dir=renditions)) == (300, 200)
+    totals = app_images.build_renditions(tmp_path, renditions)
+    assert totals["display"][0] == wide.stat().st_size + narrow.stat().st_size
+    for path in renditions.iterdir():
+        with Image.open(path) as image:
+            assert image.width <= app_images.WIDTHS["display"]
+
+
+def test_edited_figure_gets_a_new_rendition(tmp_path):
+    figure = _figure(tmp_path / "figure.png", 1200, 600, seed=1)
+    renditions = tmp_path / "renditions"
+    first_path = app_images.rendition_path(figure, renditions_dir=renditions)
+    first = app_images.rendition(figure, renditions_dir=renditions)
+    digest = first_path.name.split(".")[1]
+    assert first_path.name == f"figure.{digest}.800.png"
+
+    _figure(figure, 1200, 600, seed=2)
+    stat = figure.stat()
+    os.utime(figure, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    second_path = app_images.rendition_path(figure, renditions_dir=renditions)
+    assert second_path != first_path
+    assert app_images.rendition(figure, renditions_dir=renditions) != first
+    assert second_path.read_bytes() == app_images.rendition(figure, renditions_dir=renditions)
+    # The same content again maps back to the first rendition
+    _figure(figure, 1200, 600, seed=1)
+    os.utime(figure, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    assert app_images.rendition_path(figure, renditions_dir=renditions) == first_path
+
+
+def test_original_is_untouched(tmp_path):
+    figure = _figure(tmp_path / "figure.png", 1600, 900, seed=3)
+    source = figure.read_bytes()
+    app_images.rendition(figure, renditions_dir=tmp_path / "renditions")
+    assert app_images.original(figure) == source
+    assert figure.read_bytes() == source
+    assert _size(app_images.original(figure)) == (1600, 900)
@@ -0,0 +1,64 @@
+import importlib
+import sys
+
+import pytest
+
+import app_imports
+
+
+@pytest.fixture
+def make_module(tmp_path, monkeypatch):
+    # Writes an importable module that appends a line to imports.log each time it is executed
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(app_imports, "_timings", {})
+    log = tmp_path / "imports.log"
+    log.touch()
+    names = []
+
+    def make(name):
+        (tmp_path / f"{name}.py").write_text(
+            f"with open({str(log)!r}, 'a') as f:\n    f.write('{name}\\n')\nVALUE = 42\n")
+        importlib.invalidate_caches()
+        names.append(name)
+        return name
+
+    yield make, lambda: log.read_text().splitlines()
+    for name in names:
+        sys.modules.pop(name, None)
+
+
+def test_first_attribute_access_imports_once(make_module):
+    make, imported = make_module
+    module = app_imports.lazy(make("lazy_target_once"))
+    assert imported() == []
+    assert not app_imports.is_loaded("lazy_target_once")
+    assert "not loaded" in repr(module)
+    assert module.VALUE == 42
+    assert module.VALUE == 42
+    assert app_imports.lazy("lazy_target_once").VALUE == 42
+    assert app_imports.load("lazy_target_once").VALUE == 42
+    assert imported() == ["lazy_target_once"]
+    assert "(loaded)" in repr(module)
+
+
+def test_report_records_the_import(make_module):
+    make, _ = make_module
+    app_imports.lazy(make("lazy_target_slow")).VALUE
+    app_imports.lazy(make("lazy_target_fast")).VALUE
+    report = app_imports.report()
+    assert sorted(name for name, _ in report) == ["lazy_target_fast", "lazy_target_slow"]
+    assert all(seconds > 0 for _, seconds in report)
+    assert report[0][1] >= report[1][1]
+    # Modules the process already had are returned without a new timing
+    app_imports.load("json")
+    assert "json" not in dict(app_imports.report())
+
+
+def test_missing_module_raises_on_first_use(make_module):
+    module = app_imports.lazy("lazy_target_that_does_not_exist")
+    with pytest.raises(ModuleNotFoundError):
+        module.anything
+    # Still not cached as loaded: the next access tries (and fails) again
+    with pytest.raises(ModuleNotFoundError):
+        module.anything
+    assert app_imports.report() == []
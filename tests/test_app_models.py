@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+import app_artifacts
+import app_data
+import app_models
+
+
+def test_model_key_ignores_param_and_country_order(annual_tables):
+    key = app_models.model_key("NO2", "AnnualAvg_all", "RandomForest",
+                               {"n_estimators": 50, "max_depth": 3}, ["SE", "AT"])
+    same = app_models.model_key("NO2", "AnnualAvg_all", "RandomForest",
+                                {"max_depth": 3, "n_estimators": 50}, ["AT", "SE"])
+    assert key == same
+    assert hash(key) == hash(same)
+    # Spelling out a default is the same model as leaving it out
+    assert (app_models.model_key("NO2", "AnnualAvg_all", "Ridge", {"alpha": 1.0})
+            == app_models.model_key("NO2", "AnnualAvg_all", "Ridge"))
+    assert key != app_models.model_key("NO2", "AnnualAvg_all", "RandomForest", {"n_estimators": 51, "max_depth": 3},
+                                       ["AT", "SE"])
+
+
+def test_hits_and_misses_are_counted(annual_tables, registry):
+    first = app_models.get_model("NO2", "AnnualAvg_all", "Ridge", {"alpha": 2.0})
+    again = app_models.get_model("NO2", "AnnualAvg_all", "Ridge", {"alpha": 2.0})
+    app_models.get_model("NO2", "AnnualAvg_all", "Lasso")
+    assert again is first
+    info = app_models.registry_info()
+    assert (info["hits"], info["misses"], info["loads"], info["evictions"]) == (1, 2, 0, 0)
+    assert info["size"] == 2
+
+
+def test_least_recently_used_model_is_evicted(annual_tables, registry, monkeypatch):
+    monkeypatch.setattr(app_models, "MAX_MODELS", 2)
+    ridge = app_models.get_model("NO2", "AnnualAvg_all", "Ridge")
+    app_models.get_model("NO2", "AnnualAvg_all", "Lasso")
+    app_models.get_model("NO2", "AnnualAvg_all", "Ridge")  # Lasso is now the least recently used
+    app_models.get_model("PM10", "AnnualAvg_all", "Ridge")
+    info = app_models.registry_info()
+    assert (info["size"], info["max_size"], info["evictions"]) == (2, 2, 1)
+    assert app_models.get_model("NO2", "AnnualAvg_all", "Ridge") is ridge
+    misses = app_models.registry_info()["misses"]
+    app_models.get_model("NO2", "AnnualAvg_all", "Lasso")
+    assert app_models.registry_info()["misses"] == misses + 1
+
+
+@pytest.mark.parametrize("countries", [None, ["SE", "DE", "BE"]])
+def test_fit_model_matches_linear_regression(annual_tables, countries):
+    fitted = app_models.fit_model("PM10", "AnnualAvg_daytime", "LinearRegression", countries=countries)
+    X, y, features, index = app_models.training_data("PM10", "AnnualAvg_daytime", countries=countries)
+    baseline, *others = sorted(countries or ["AT", "BE", "DE", "SE"])
+    # The first country alphabetically is the baseline and gets no dummy
+    assert features == ["AF_fleet"] + [f"Country_{c}" for c in others]
+    countries_of_rows = app_data.aq_vehicle().loc[index, "Country"].to_numpy()
+    for column, country in enumerate(others, start=1):
+        np.testing.assert_array_equal(X[:, column], countries_of_rows == country)
+    assert baseline not in {f.removeprefix("Country_") for f in features}
+    direct = LinearRegression().fit(X, y)
+    np.testing.assert_allclose(fitted.model.coef_, direct.coef_, rtol=1e-10)
+    assert fitted.model.intercept_ == pytest.approx(direct.intercept_, rel=1e-10)
+    assert fitted.r2 == pytest.approx(direct.score(X, y), rel=1e-12)
+
+
+@pytest.mark.parametrize("model_type", ["LinearRegression", "Ridge"])
+@pytest.mark.parametrize("fixed_effects", [True, False])
+def test_surface_matches_predict(annual_tables, model_type, fixed_effects):
+    fitted = app_models.fit_model("NO2", "AnnualAvg_all", model_type, fixed_effects=fixed_effects)
+    surface = app_models.prediction_surface(fitted)
+    assert surface.dummies == fitted.features[1:]
+    assert len(surface.dummies) == (3 if fixed_effects else 0)
+    # Grid points and points between them (linear models, so interpolation is exact up to float32)
+    af_fleet = np.concatenate([surface.grid[::37], np.random.default_rng(2).uniform(0, 100, 50)])
+    for row, dummy in enumerate([None] + surface.dummies):
+        X = np.zeros((len(af_fleet), len(fitted.features)))
+        X[:, 0] = af_fleet
+        if dummy is not None:
+            X[:, row] = 1.0
+        np.testing.assert_allclose(app_models.surface_predict(surface, af_fleet, dummy),
+                                   fitted.model.predict(X), rtol=1e-6)
+
+
+def test_saved_surface_is_memory_mapped(annual_tables, registry):
+    key = app_models.model_key("PM10", "AnnualAvg_daytime", "LinearRegression")
+    fitted = app_models.fit_model("PM10", "AnnualAvg_daytime", "LinearRegression")
+    computed = app_models.prediction_surface(fitted)
+    app_artifacts.save_artifact(key, fitted, registry, computed)
+    surface = app_models.get_surface("PM10", "AnnualAvg_daytime", "LinearRegression")
+    assert app_models.registry_info()["loads"] == 1
+    assert isinstance(surface.values, np.memmap)
+    assert not surface.values.flags.writeable
+    assert surface.dummies == computed.dummies
+    np.testing.assert_array_equal(surface.grid, computed.grid)
+    np.testing.assert_array_equal(surface.values, computed.values)
+    # Served from the registry afterwards, not read again
+    assert app_models.get_surface("PM10", "AnnualAvg_daytime", "LinearRegression") is surface
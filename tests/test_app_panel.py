@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import app_models
+import app_panel
+
+FEATURES = ("AF_fleet", "EV_share")
+
+
+@pytest.mark.parametrize("model_type, params", [("LinearRegression", None), ("Ridge", {"alpha": 2.0})])
+def test_matches_sklearn(annual_tables, model_type, params):
+    fits = app_panel.solve_panel(features=FEATURES, model_type=model_type, alpha=(params or {}).get("alpha", 1.0))
+    assert len(fits) == 2 * 3
+    for (pollutant, target), fit in fits.items():
+        fitted = app_models.fit_model(pollutant, target, model_type, params, features=FEATURES)
+        assert fit.features == fitted.features
+        np.testing.assert_allclose(fit.coef, fitted.model.coef_, atol=1e-10)
+        assert fit.intercept == pytest.approx(fitted.model.intercept_, abs=1e-10)
+        assert fit.r2 == pytest.approx(fitted.r2, abs=1e-12)
+        assert fit.n_samples == len(fitted.y)
+
+
+def test_standard_errors_match_statsmodels(annual_tables):
+    sm = pytest.importorskip("statsmodels.api")
+    fits = app_panel.solve_panel(features=FEATURES)
+    for (pollutant, target), fit in fits.items():
+        X, y, _, _ = app_models.training_data(pollutant, target, features=FEATURES)
+        ols = sm.OLS(y, sm.add_constant(X)).fit()
+        k = len(FEATURES)
+        np.testing.assert_allclose(fit.se[:k], ols.bse[1:k + 1], rtol=1e-8)
+        np.testing.assert_allclose(fit.t[:k], ols.tvalues[1:k + 1], rtol=1e-8)
+        np.testing.assert_allclose(fit.p_value[:k], ols.pvalues[1:k + 1], rtol=1e-6)
+        assert fit.df_resid == ols.df_resid
+        assert np.isnan(fit.se[k:]).all()
+
+
+def test_batched_solve_pads_systems_of_different_sizes():
+    rng = np.random.default_rng(5)
+    grams, rhs = [], []
+    for size, width in [(2, 1), (4, 3), (3, 2)]:
+        A = rng.normal(size=(10, size))
+        grams.append(A.T @ A)
+        rhs.append(rng.normal(size=(size, width)))
+    solutions, inverses = app_panel._batched_solve(grams, rhs)
+    for g, c, b, g_inv in zip(grams, rhs, solutions, inverses):
+        np.testing.assert_allclose(b, np.linalg.solve(g, c))
+        np.testing.assert_allclose(g_inv, np.linalg.inv(g))
+
+
+def test_only_singular_systems_fall_back_to_pinv(monkeypatch):
+    rng = np.random.default_rng(6)
+    A = rng.normal(size=(10, 3))
+    collinear = np.column_stack([A[:, 0], A[:, 1], A[:, 0] + A[:, 1]])
+    nearly_collinear = np.column_stack([A[:, :2], A[:, 0] + A[:, 1] + 1e-7 * A[:, 2]])
+    grams = [A.T @ A, collinear.T @ collinear, A[:, :2].T @ A[:, :2], nearly_collinear.T @ nearly_collinear]
+    rhs = [rng.normal(size=(g.shape[0], 2)) for g in grams]
+    # The nearly singular one factors, but its pivots give it away
+    np.linalg.cholesky(grams[3])
+    pinv_calls = []
+    pinv = np.linalg.pinv
+
+    def counting_pinv(a, *args, **kwargs):
+        pinv_calls.append(a.shape[0])
+        return pinv(a, *args, **kwargs)
+
+    monkeypatch.setattr(np.linalg, "pinv", counting_pinv)
+    solutions, inverses = app_panel._batched_solve(grams, rhs)
+    assert pinv_calls == [2]
+    for i in (0, 2):
+        np.testing.assert_allclose(solutions[i], np.linalg.solve(grams[i], rhs[i]), rtol=1e-10)
+        np.testing.assert_allclose(inverses[i], np.linalg.inv(grams[i]), rtol=1e-10)
+    for i in (1, 3):
+        g_inv = pinv(grams[i], hermitian=True)
+        np.testing.assert_allclose(inverses[i], g_inv)
+        np.testing.assert_allclose(solutions[i], g_inv @ rhs[i])
+        assert np.isfinite(solutions[i]).all()
+
+
+def test_coefficient_table_has_one_row_per_fit(annual_tables):
+    fits = app_panel.solve_panel()
+    table = app_panel.coefficient_table(fits)
+    assert list(table.columns) == ["Pollutant", "Target", "Coef", "SE", "t", "p_value", "stars", "R2", "N"]
+    assert len(table) == len(fits)
+    assert table["Coef"].tolist() == [fit.coef[0] for fit in fits.values()]
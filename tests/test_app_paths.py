@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import Lasso, Ridge
+from sklearn.model_selection import LeaveOneOut, cross_val_predict
+
+import app_models
+import app_paths
+
+
+@pytest.fixture
+def design(annual_tables):
+    X, y, features, _ = app_models.training_data("NO2", "AnnualAvg_all", features=("AF_fleet", "EV_share"))
+    return X, y, features
+
+
+@pytest.mark.parametrize("model_type, estimator", [("Ridge", Ridge), ("Lasso", Lasso)])
+@pytest.mark.parametrize("alpha", [0.01, 0.3, 1.0, 7.5])
+def test_coefficients_match_sklearn(design, model_type, estimator, alpha):
+    X, y, features = design
+    path = app_paths.compute_path(X, y, model_type, features)
+    coef, intercept = app_paths.coef_at(path, alpha)
+    model = estimator(alpha=alpha, tol=1e-12, max_iter=100_000) if model_type == "Lasso" else estimator(alpha=alpha)
+    model.fit(X, y)
+    np.testing.assert_allclose(coef, model.coef_, atol=1e-7)
+    assert intercept == pytest.approx(model.intercept_, abs=1e-6)
+    assert app_paths.r2_at(path, alpha) == pytest.approx(model.score(X, y), abs=1e-9)
+
+
+def test_ridge_loo_error_matches_refits(design):
+    X, y, features = design
+    path = app_paths.compute_path(X, y, "Ridge", features, alphas=np.array([0.1, 2.0]))
+    for alpha, mse in zip(path.alphas, path.cv_mse):
+        predictions = cross_val_predict(Ridge(alpha=alpha), X, y, cv=LeaveOneOut())
+        assert mse == pytest.approx(((y - predictions) ** 2).mean(), rel=1e-9)
+
+
+def test_get_path_is_cached_per_selection(annual_tables):
+    first = app_paths.get_path("PM10", "AnnualAvg_daytime", "Lasso")
+    assert app_paths.get_path("PM10", "AnnualAvg_daytime", "Lasso") is first
+    assert app_paths.get_path("PM10", "AnnualAvg_daytime", "Ridge") is not first
+    assert app_paths.best_alpha(first) in first.alphas
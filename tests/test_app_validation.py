@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import r2_score
+from sklearn.model_selection import LeaveOneGroupOut, cross_val_predict
+
+import app_data
+import app_models
+import app_validation
+
+
+def test_loco_folds_match_leave_one_group_out():
+    countries = np.array(["SE", "AT", "DE", "AT", "SE", "BE", "DE"])
+    folds = app_validation.make_folds(countries, np.arange(len(countries)), "loco")
+    expected = list(LeaveOneGroupOut().split(countries, groups=countries))
+    assert len(folds) == len(expected)
+    for (train, test), (expected_train, expected_test) in zip(folds, expected):
+        np.testing.assert_array_equal(train, expected_train)
+        np.testing.assert_array_equal(test, expected_test)
+
+
+def test_rolling_folds_train_on_the_past():
+    years = np.repeat(np.arange(2013, 2019), 2)
+    folds = app_validation.make_folds(np.zeros(len(years)), years, "rolling")
+    assert len(folds) == 6 - app_validation.MIN_TRAIN_YEARS
+    for train, test in folds:
+        assert len(set(years[test])) == 1
+        assert years[train].max() == years[test][0] - 1
+
+
+def test_loco_cross_validation_matches_sklearn(annual_tables):
+    result = app_validation.cross_validate("NO2", "AnnualAvg_all", "LinearRegression", scheme="loco")
+    X, y, _, index = app_models.training_data("NO2", "AnnualAvg_all", fixed_effects=False)
+    groups = app_data.aq_vehicle().loc[index, "Country"].to_numpy()
+    predictions = cross_val_predict(LinearRegression(), X, y, groups=groups, cv=LeaveOneGroupOut())
+    assert result.r2 == pytest.approx(r2_score(y, predictions), abs=1e-12)
+    assert result.rmse == pytest.approx(np.sqrt(((y - predictions) ** 2).mean()), abs=1e-12)
+    assert result.n_folds == 4
+    assert result.n_predictions == len(y)
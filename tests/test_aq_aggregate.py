@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import aq_aggregate
+
+
+@pytest.fixture
+def hourly():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    times = pd.Timestamp("2018-12-20") + pd.to_timedelta(rng.integers(0, 24 * 800, n), unit="h")
+    return pd.DataFrame({
+        "Country": rng.choice(["AT", "NO", "SE"], n),
+        "Pollutant": rng.choice(["NO2", "PM10"], n),
+        "Datetime": times,
+        "Value": np.where(rng.random(n) < 0.02, np.nan, rng.gamma(2.0, 10.0, n)),
+    })
+
+
+def test_streaming_matches_direct_groupby(hourly):
+    chunks = [hourly.iloc[i:i + 3_000] for i in range(0, len(hourly), 3_000)]
+    result = aq_aggregate.build_annual_averages(chunks, output_path=None)
+
+    ts = hourly["Datetime"]
+    for period, weekdays in aq_aggregate.PERIODS.items():
+        for window, hours in aq_aggregate.TIME_WINDOWS.items():
+            sel = hourly[ts.dt.weekday.isin(weekdays) & ts.dt.hour.isin(hours)]
+            expected = sel.groupby([sel["Country"], sel["Pollutant"], ts.dt.year.astype(int).rename("Year")])["Value"].mean()
+            got = result.set_index(aq_aggregate.GROUP_KEYS)[f"AnnualAvg_{period}_{window}"]
+            pd.testing.assert_series_equal(got.reindex(expected.index), expected, 
+                                           check_names=False, check_index_type=False)
+
+
+def test_chunking_does_not_change_the_result(hourly):
+    whole = aq_aggregate.build_annual_averages([hourly], output_path=None)
+    chunked = aq_aggregate.build_annual_averages([hourly.iloc[:7_777], hourly.iloc[7_777:]], output_path=None)
+    pd.testing.assert_frame_equal(whole, chunked)
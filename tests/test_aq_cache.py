@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import aq_cache
+import aq_load
+
+
+def test_round_trip_keeps_values_and_dtypes(hourly_csv, tmp_path):
+    compact = aq_load.load_hourly(hourly_csv)
+    cache_dir = aq_cache.write_cache(compact, tmp_path / "cache", source=hourly_csv)
+    assert not (tmp_path / "cache.tmp").exists()
+    pd.testing.assert_frame_equal(aq_cache.open_cache(cache_dir), compact)
+
+    subset = aq_cache.open_cache(cache_dir, columns=["Country", "Start"])
+    assert list(subset.columns) == ["Start", "Country"]  # in the order of the cache
+    assert subset["Country"].cat.categories.tolist() == compact["Country"].cat.categories.tolist()
+
+
+def test_mapped_columns_are_read_only(hourly_csv, tmp_path):
+    cache_dir = aq_cache.write_cache(aq_load.load_hourly(hourly_csv), tmp_path / "cache")
+    df = aq_cache.open_cache(cache_dir)
+    values = np.load(cache_dir / "Value.npy", mmap_mode="r")
+    assert not values.flags.writeable
+    with pytest.raises(ValueError):
+        values[0] = 1.0
+    try:
+        # Copy-on-write pandas copies the column instead of writing; otherwise the write fails
+        df.loc[0, "Value"] = -1.0
+    except ValueError:
+        pass
+    assert aq_cache.open_cache(cache_dir)["Value"].iloc[0] != -1.0
+
+
+def test_cache_is_rebuilt_when_the_source_changes(hourly_csv, tmp_path):
+    cache_dir = tmp_path / "cache"
+    first = aq_cache.load_cached(hourly_csv, cache_dir)
+    meta = json.loads((cache_dir / aq_cache.META_FILE).read_text())
+    assert aq_cache.is_fresh(cache_dir, hourly_csv)
+    aq_cache.load_cached(hourly_csv, cache_dir)
+    assert json.loads((cache_dir / aq_cache.META_FILE).read_text()) == meta
+
+    changed = pd.read_csv(hourly_csv).iloc[:100]
+    changed.to_csv(hourly_csv, index=False)
+    assert not aq_cache.is_fresh(cache_dir, hourly_csv)
+    second = aq_cache.load_cached(hourly_csv, cache_dir)
+    assert len(first) != len(second) == 100
+    assert aq_cache.is_fresh(cache_dir, hourly_csv)
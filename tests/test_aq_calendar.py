@@ -0,0 +1,69 @@
+import datetime
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import aq_calendar
+
+
+@pytest.fixture
+def start():
+    # Every hour of four weeks, plus the odd minute
+    hours = pd.Series(pd.date_range("2021-03-01", periods=24 * 28, freq="h"))
+    return pd.concat([hours, hours.iloc[::5] + pd.Timedelta(minutes=30)], ignore_index=True)
+
+
+def _time_between(start, lo, hi):
+    # air_quality_data_V2.ipynb: (Start.dt.time >= lo) & (Start.dt.time <= hi)
+    return ((start.dt.time >= datetime.time(lo)) & (start.dt.time <= datetime.time(hi))).to_numpy()
+
+
+def _notebook_filters(start):
+    # The filters each window replaces, on whole-hour measurements
+    end_hour = (start + pd.Timedelta(hours=1)).dt.hour  # data_processing.ipynb keys on the end
+    return {
+        "daytime": end_hour.between(9, 18).to_numpy(),
+        "rushhour": (end_hour.between(8, 10) | end_hour.between(15, 18)).to_numpy(),
+        "daytime_eda": _time_between(start, 8, 20),
+        "rushhour_eda": _time_between(start, 6, 10) | _time_between(start, 16, 20),
+    }
+
+
+def test_windows_match_the_notebook_filters(start):
+    on_the_hour = start[start.dt.minute == 0]
+    calendar = aq_calendar.calendar_columns(on_the_hour)["Calendar"]
+    expected = _notebook_filters(on_the_hour)
+    assert set(expected) == set(aq_calendar.WINDOWS)
+    for name, mask in expected.items():
+        np.testing.assert_array_equal(aq_calendar.window_mask(calendar, name), mask, err_msg=name)
+
+
+def test_weekend_and_combined_windows(start):
+    calendar = aq_calendar.calendar_columns(start)["Calendar"]
+    weekend = start.dt.dayofweek.isin([5, 6]).to_numpy()
+    rush = aq_calendar.window_mask(calendar, "rushhour")
+    np.testing.assert_array_equal(aq_calendar.window_mask(calendar, weekend=True), weekend)
+    np.testing.assert_array_equal(aq_calendar.window_mask(calendar, "rushhour", weekend=False), rush & ~weekend)
+    np.testing.assert_array_equal(aq_calendar.window_mask(calendar, "daytime", "rushhour"),
+                                  aq_calendar.window_mask(calendar, "daytime") & rush)
+    assert aq_calendar.window_mask(calendar).all()
+
+
+def test_end_hours():
+    assert aq_calendar.end_hours("daytime") == list(range(9, 19))
+    assert aq_calendar.end_hours("rushhour") == [8, 9, 10, 15, 16, 17, 18]
+
+
+def test_missing_start_is_in_no_window():
+    start = pd.Series(pd.to_datetime(["2021-03-01 00:00:00", None, "2021-03-06 08:00:00"]))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        cols = aq_calendar.calendar_columns(start)
+    assert cols["Hour"].tolist() == [0, -1, 8]
+    assert cols["DayOfWeek"].tolist() == [0, -1, 5]
+    calendar = cols["Calendar"]
+    assert aq_calendar.window_mask(calendar).tolist() == [True, False, True]
+    assert aq_calendar.window_mask(calendar, weekend=False).tolist() == [True, False, False]
+    assert aq_calendar.window_mask(calendar, "daytime", weekend=True).tolist() == [False, False, True]
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import aq_cleaning
+
+
+def _hourly(n, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(60.0, 120.0, n)
+    # Placeholders, missing values, negative zeros and values on the thresholds
+    special = rng.choice([-888.0, -999.0, np.nan, -0.0, 0.0, 223.0, 500.0, 1000.0], n)
+    values = np.where(rng.random(n) < 0.1, special, values)
+    return pd.DataFrame({
+        "Country": rng.choice(["NO", "NL", "DE", "SE"], n),
+        "Notation": rng.choice(list(aq_cleaning.THRESHOLDS) + ["SO2"], n),
+        "Value": values,
+    })
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_clean_aq_is_bit_identical_to_the_notebook(seed):
+    df = _hourly(5_000, seed)
+    expected = aq_cleaning.notebook_clean(df)
+    cleaned, _ = aq_cleaning.clean_aq(df)
+    pd.testing.assert_frame_equal(cleaned, expected)
+    assert np.array_equal(cleaned["Value"].to_numpy().view(np.int64), expected["Value"].to_numpy().view(np.int64))
+
+
+def test_hit_counts():
+    df = pd.DataFrame({"Country": ["NO", "NO", "DE", "NL"], "Notation": ["NO", "NO2", "NO", "NO"],
+                       "Value": [300.0, -5.0, 300.0, np.nan]})
+    cleaned, hits = aq_cleaning.clean_aq(df)
+    assert cleaned["Value"].tolist() == [0.0, 300.0]
+    hits = hits.set_index("rule")
+    assert hits.loc["NO / NO", "dropped_above"] == 1
+    assert hits.loc["NO / NO2", "clipped_below"] == 1
+    assert hits.loc["* / *", "dropped_above"] == 0
+    assert hits.attrs["missing"] == 1
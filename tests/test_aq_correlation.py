@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import aq_calendar
+import aq_correlation
+import aq_store
+
+
+@pytest.fixture
+def dense_store(tmp_path):
+    # Two stations per country measuring three related pollutants over two years, with gaps
+    rng = np.random.default_rng(3)
+    start = pd.date_range("2020-12-01", "2022-01-31", freq="h")
+    parts = []
+    for country in ["AT", "SE"]:
+        traffic = rng.gamma(2.0, 10.0, len(start))
+        for station in ["A", "B"]:
+            for pollutant, scale in [("NO2", 1.0), ("NO", 0.5), ("PM10", -0.2)]:
+                parts.append(pd.DataFrame({
+                    "Samplingpoint": f"{country}/{station}",
+                    "Country": country,
+                    "Notation": pollutant,
+                    "Start": start,
+                    "Value": scale * traffic + rng.normal(0.0, 5.0, len(start)),
+                }).sample(frac=0.8, random_state=len(parts)))
+    hourly = pd.concat(parts, ignore_index=True)
+    hourly["End"] = hourly["Start"] + pd.Timedelta(hours=1)
+    for col in ["Start", "End"]:
+        hourly[col] = hourly[col].dt.strftime("%Y-%m-%d %H:%M:%S")
+    csv_path = tmp_path / "hourly.csv"
+    hourly.to_csv(csv_path, index=False)
+    return aq_store.convert_csv_to_store(csv_path, tmp_path / "store", chunksize=50_000)
+
+
+def _notebook_corr(hourly):
+    # The per-country pivot and .corr() of air_quality_data_V2.ipynb
+    wide = hourly.pivot_table(index=["Start", "Country"], columns="Notation", values="Value",
+                              aggfunc="mean", observed=True)
+    return {country: wide.xs(country, level="Country").corr() for country in sorted(hourly["Country"].unique())}
+
+
+@pytest.mark.parametrize("windows, weekend", [((), None), (("rushhour",), False)])
+def test_matches_the_pivot_table_corr(dense_store, windows, weekend):
+    hourly = aq_store.read_aq(columns=["Country", "Notation", "Start", "Value", "Calendar"], store_dir=dense_store)
+    if windows or weekend is not None:
+        hourly = hourly[aq_calendar.window_mask(hourly["Calendar"], *windows, weekend=weekend)]
+    expected = _notebook_corr(hourly)
+    result = aq_correlation.correlation_matrices(windows, weekend, store_dir=dense_store)
+    assert list(result) == list(expected)
+    for country, matrix in result.items():
+        pd.testing.assert_frame_equal(matrix, expected[country], check_names=False, check_index_type=False,
+                                      check_column_type=False, rtol=1e-10)
+
+
+def test_merged_moments_match_one_pass():
+    rng = np.random.default_rng(4)
+    wide = pd.DataFrame(rng.normal(size=(1_000, 3)), columns=["NO", "NO2", "PM10"])
+    wide["NO2"] += wide["NO"]
+    wide = wide.mask(rng.random(wide.shape) < 0.2)
+    merged = aq_correlation.PairwiseMoments()
+    for chunk in [wide.iloc[:300], wide.iloc[300:650], wide.iloc[650:]]:
+        merged.merge(aq_correlation.PairwiseMoments().update(chunk))
+    pd.testing.assert_frame_equal(merged.corr(), wide.corr(), check_names=False, rtol=1e-12)
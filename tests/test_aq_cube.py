@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+import aq_cube
+import aq_store
+
+
+def test_views_match_the_hourly_rows(store, tmp_path):
+    path = tmp_path / "cube.parquet"
+    aq_cube.build_cube(store, path)
+    hourly = aq_store.read_aq(columns=["Country", "Notation", "Start", "Value", "Hour", "DayOfWeek"],
+                              store_dir=store)
+    weekend = hourly[hourly["DayOfWeek"].isin([5, 6]) & (hourly["Notation"] == "NO2")]
+    expected = weekend.groupby(["Country", "Hour"], observed=True)["Value"].mean()
+
+    # A str path works as well as a pathlib.Path
+    result = aq_cube.view(["Country", "Hour"], pollutants=["NO2"], days=[5, 6], path=str(path))
+    np.testing.assert_allclose(result["Value"].to_numpy(), expected.to_numpy())
+    assert result["Count"].sum() == weekend["Value"].notna().sum()
+
+
+def test_view_returns_a_copy(store, tmp_path):
+    path = tmp_path / "cube.parquet"
+    aq_cube.build_cube(store, path)
+    first = aq_cube.view(["Year"], path=path)
+    expected = first.copy()
+    first["Value"] = 0.0
+    pd.testing.assert_frame_equal(aq_cube.view(["Year"], path=path), expected)
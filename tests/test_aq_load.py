@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+import aq_load
+
+
+def test_compact_frame_equals_the_plain_read(hourly_csv):
+    baseline = pd.read_csv(hourly_csv)
+    loaded = aq_load.load_hourly(hourly_csv, chunksize=7_000)
+    assert list(loaded.columns) == list(baseline.columns) + ["Hour", "DayOfWeek", "Calendar"]
+
+    for col in ["Samplingpoint", "Unit", "AggType", "Country", "Notation"]:
+        assert isinstance(loaded[col].dtype, pd.CategoricalDtype)
+        assert loaded[col].astype(str).tolist() == baseline[col].astype(str).tolist()
+    for col in ["Start", "End"]:
+        pd.testing.assert_series_equal(loaded[col], pd.to_datetime(baseline[col]), check_dtype=False)
+    assert loaded["Value"].dtype == np.float32
+    # float32 is within a relative 2**-24 of the CSV value
+    np.testing.assert_allclose(loaded["Value"].astype(np.float64), baseline["Value"], rtol=2 ** -24)
+    assert loaded["Value"].isna().equals(baseline["Value"].isna())
+    pd.testing.assert_series_equal(loaded["Validity"], baseline["Validity"])
+    assert (loaded["Hour"] == pd.to_datetime(baseline["Start"]).dt.hour).all()
+
+
+def test_memory_report_shows_the_reduction(hourly_csv):
+    baseline = pd.read_csv(hourly_csv)
+    report = aq_load.memory_report(aq_load.load_hourly(hourly_csv, calendar=False), baseline)
+    assert report.loc["Total", "MB"] < report.loc["Total", "baseline MB"]
+    assert report.loc["Total", "reduction"] > 3
+    assert report.loc["Value", "dtype"] == "float32"
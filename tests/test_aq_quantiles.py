@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+import aq_aggregate
+import aq_quantiles
+
+
+def _rank_error(sketch, values, qs):
+    values = np.sort(values)
+    ranks = np.searchsorted(values, sketch.quantile(qs)) / len(values)
+    return np.abs(ranks - qs).max()
+
+
+def test_rank_error_is_about_one_over_k():
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(3.0, 1.0, 200_000)
+    sketch = aq_quantiles.QuantileSketch(k=200)
+    for chunk in np.array_split(values, 37):
+        sketch.update(chunk)
+    assert sketch.n == len(values)
+    assert _rank_error(sketch, values, np.linspace(0.01, 0.99, 99)) < 2 / 200
+
+
+def test_merged_sketches_keep_the_rank_error():
+    rng = np.random.default_rng(1)
+    parts = [rng.normal(loc, 10.0, 30_000) for loc in (0.0, 5.0, 50.0, 100.0)]
+    merged = aq_quantiles.QuantileSketch(k=200)
+    for i, part in enumerate(parts):
+        merged.merge(aq_quantiles.QuantileSketch(k=200, seed=i).update(part))
+    assert _rank_error(merged, np.concatenate(parts), np.linspace(0.01, 0.99, 99)) < 2 / 200
+
+
+def test_small_groups_are_exact():
+    values = np.array([3.0, 1.0, np.nan, 7.0, 5.0])
+    sketch = aq_quantiles.QuantileSketch().update(values)
+    assert sketch.n == 4
+    np.testing.assert_allclose(sketch.quantile([0.25, 0.5, 0.75]),
+                               pd.Series(values).quantile([0.25, 0.5, 0.75]).to_numpy())
+
+
+def test_bounds_from_the_aggregation_pass():
+    rng = np.random.default_rng(2)
+    n = 50_000
+    hourly = pd.DataFrame({
+        "Country": rng.choice(["AT", "SE"], n),
+        "Pollutant": rng.choice(["NO2", "PM10"], n),
+        "Datetime": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 24 * 730, n), unit="h"),
+        "Value": rng.gamma(2.0, 10.0, n),
+    })
+    sketches = {}
+    aq_aggregate.hourly_sums((hourly.iloc[i:i + 8_000] for i in range(0, n, 8_000)), sketches)
+    assert {key[:2] for key in sketches} == {(c, p) for c in ["AT", "SE"] for p in ["NO2", "PM10"]}
+    bounds = aq_quantiles.iqr_bounds(aq_quantiles.merge_sketches(sketches)).set_index(["Country", "Notation"])
+    for (country, pollutant), values in hourly.groupby(["Country", "Pollutant"])["Value"]:
+        values = np.sort(values.to_numpy())
+        row = bounds.loc[(country, pollutant)]
+        assert row["n"] == len(values)
+        for q, col in [(0.25, "Q1"), (0.75, "Q3")]:
+            assert abs(np.searchsorted(values, row[col]) / len(values) - q) < 2 / aq_quantiles.DEFAULT_K
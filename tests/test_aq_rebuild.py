@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import aq_quantiles
+import aq_rebuild
+import aq_store
+
+
+def _rebuild(store, out_dir, **options):
+    out_dir.mkdir(exist_ok=True)
+    daily, annual, bounds = out_dir / "daily.csv", out_dir / "annual.csv", out_dir / "bounds.csv"
+    coverage = aq_rebuild.rebuild(store, daily, annual, bounds_path=bounds, **options)
+    return coverage, pd.read_csv(daily), pd.read_csv(annual), pd.read_csv(bounds)
+
+
+def test_incremental_rebuild_matches_full_rebuild(store, tmp_path):
+    _rebuild(store, tmp_path / "incremental")
+
+    # Rewrite one partition with different values
+    path = next(store.glob("Country=AT/Notation=NO2/Year=2020/*.parquet"))
+    table = pq.read_table(path).to_pandas()
+    table["Value"] *= 1.5
+    pq.write_table(pa.Table.from_pandas(table, preserve_index=False), path)
+
+    coverage, daily, annual, bounds = _rebuild(store, tmp_path / "incremental")
+    assert coverage == {("AT", "NO2", 2020)}
+    _, daily_full, annual_full, bounds_full = _rebuild(store, tmp_path / "full", full=True)
+    pd.testing.assert_frame_equal(daily, daily_full)
+    pd.testing.assert_frame_equal(annual, annual_full)
+    pd.testing.assert_frame_equal(bounds, bounds_full)
+
+
+def test_unchanged_store_rebuilds_nothing(store, tmp_path):
+    _rebuild(store, tmp_path / "out")
+    coverage, _, _, _ = _rebuild(store, tmp_path / "out")
+    assert coverage == set()
+
+
+def test_output_does_not_depend_on_workers(store, tmp_path):
+    _, daily_serial, annual_serial, bounds_serial = _rebuild(store, tmp_path / "serial", full=True)
+    _, daily_pool, annual_pool, bounds_pool = _rebuild(store, tmp_path / "pool", full=True, workers=2)
+    pd.testing.assert_frame_equal(daily_serial, daily_pool)
+    pd.testing.assert_frame_equal(annual_serial, annual_pool)
+    pd.testing.assert_frame_equal(bounds_serial, bounds_pool)
+
+
+def test_bounds_come_from_the_aggregated_values(store, tmp_path):
+    _, _, _, bounds = _rebuild(store, tmp_path / "out")
+    hourly = aq_store.read_aq(columns=["Country", "Notation", "Value"], store_dir=store)
+    bounds = bounds.set_index(["Country", "Notation"])
+    for (country, pollutant), values in hourly.groupby(["Country", "Notation"], observed=True)["Value"]:
+        values = np.sort(values.to_numpy())
+        row = bounds.loc[(country, pollutant)]
+        assert row["n"] == len(values)
+        for q, col in [(0.25, "Q1"), (0.75, "Q3")]:
+            assert abs(np.searchsorted(values, row[col]) / len(values) - q) < 2 / aq_quantiles.DEFAULT_K
@@ -0,0 +1,49 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import aq_rebuild
+import aq_stations
+import aq_store
+
+
+def _shuffle_partition(path):
+    table = pq.read_table(path)
+    pq.write_table(table.take(list(range(len(table)))[::-1]), path)
+
+
+def test_station_index_matches_the_rows(store):
+    aq_stations.build_station_index(store)
+    hourly = aq_store.read_aq(store_dir=store)
+    expected = hourly.groupby("Country")["Samplingpoint"].nunique()
+    counts = aq_stations.stations_per_country(store).set_index("Country")["UniqueStations"]
+    pd.testing.assert_series_equal(counts, expected, check_names=False)
+
+    station = aq_stations.read_station("NO/SP2", columns=["Samplingpoint", "Start", "Value"], store_dir=store)
+    direct = hourly.loc[hourly["Samplingpoint"] == "NO/SP2", ["Samplingpoint", "Start", "Value"]]
+    direct = direct.sort_values(["Samplingpoint", "Start"], kind="mergesort", ignore_index=True)
+    pd.testing.assert_frame_equal(station, direct, check_dtype=False, check_categorical=False)
+
+
+def test_sorting_keeps_the_rebuild_manifest_current(store, tmp_path):
+    outputs = (tmp_path / "daily.csv", tmp_path / "annual.csv", tmp_path / "bounds.csv")
+    aq_stations.build_station_index(store)
+    aq_rebuild.rebuild(store, *outputs[:2], bounds_path=outputs[2])
+
+    # An unsorted partition that the rebuild has already aggregated is then sorted by the index
+    _shuffle_partition(next(store.glob("Country=AT/Notation=NO2/Year=2020/*.parquet")))
+    aq_rebuild.rebuild(store, *outputs[:2], bounds_path=outputs[2])
+    aq_stations.build_station_index(store)
+    assert aq_rebuild.rebuild(store, *outputs[:2], bounds_path=outputs[2]) == set()
+    assert not list(store.rglob(".*.tmp"))
+
+
+def test_station_in_two_countries_is_rejected(store):
+    path = next(store.glob("Country=AT/Notation=PM10/Year=2021/*.parquet"))
+    table = pq.read_table(path)
+    samplingpoints = pa.array(["NO/SP1"] * len(table))
+    pq.write_table(table.set_column(table.schema.get_field_index("Samplingpoint"), "Samplingpoint",
+                                    samplingpoints), path)
+    with pytest.raises(ValueError, match="NO/SP1"):
+        aq_stations.build_station_index(store)
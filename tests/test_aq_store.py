@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+import aq_store
+
+
+def test_unparseable_start_rows_are_dropped_and_reported(tmp_path):
+    hourly = pd.DataFrame({
+        "Samplingpoint": ["SP1"] * 5,
+        "Country": ["NO"] * 5,
+        "Notation": ["NO2"] * 5,
+        "Start": ["2020-01-01 00:00:00", "garbage", "2020-01-01 02:00:00", "", "2021-06-01 05:00:00"],
+        "End": ["2020-01-01 01:00:00", "2020-01-01 02:00:00", "not a date", "2020-01-01 04:00:00",
+                "2021-06-01 06:00:00"],
+        "Value": [1.0, 2.0, 3.0, 4.0, 5.0],
+    })
+    csv_path = tmp_path / "hourly.csv"
+    hourly.to_csv(csv_path, index=False)
+    store = aq_store.convert_csv_to_store(csv_path, tmp_path / "store", chunksize=2)
+
+    assert aq_store.conversion_report(store) == {"rows": 3, "dropped_unparseable_start": 2}
+    result = aq_store.read_aq(store_dir=store).sort_values("Start", ignore_index=True)
+    assert result["Value"].tolist() == [1.0, 3.0, 5.0]
+    # An unparseable End is kept as NaT
+    assert result["End"].isna().tolist() == [False, True, False]
+    assert sorted(result["Start"].dt.year.unique()) == [2020, 2021]
+
+
+def test_filters_accept_numpy_integers(store):
+    year = np.int64(2020)
+    result = aq_store.read_aq(countries="AT", pollutants=["NO2"], years=year, columns=["Country", "Year"],
+                              store_dir=store)
+    assert len(result) > 0
+    assert set(result["Year"]) == {2020}
+    assert set(result["Country"]) == {"AT"}
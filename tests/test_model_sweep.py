@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+
+import model_sweep
+
+MODELS = ["LinearRegression", "Ridge"]
+
+
+@pytest.fixture
+def sweep(annual_tables, tmp_path, monkeypatch):
+    # Tiny sweep (NO2 x 3 targets x OLS / Ridge over 2 alphas) that counts the tasks it runs
+    monkeypatch.setitem(model_sweep.PARAM_GRIDS, "Ridge", {"alpha": [0.1, 1.0]})
+    ran = []
+    run_task = model_sweep.run_task
+
+    def counting_run_task(*args, **kwargs):
+        ran.append(args[:3])
+        return run_task(*args, **kwargs)
+
+    monkeypatch.setattr(model_sweep, "run_task", counting_run_task)
+
+    def run():
+        ran.clear()
+        done = model_sweep.run_sweep(tmp_path / "checkpoints", pollutants=["NO2"], models=MODELS)
+        return done, list(ran)
+
+    return run
+
+
+def test_second_run_reuses_every_checkpoint(sweep):
+    first, ran = sweep()
+    assert len(first) == len(ran) == 6
+    second, ran = sweep()
+    assert ran == []
+    assert second == first
+
+
+def test_other_data_or_grid_invalidates_checkpoints(sweep, annual_tables, monkeypatch):
+    sweep()
+    monkeypatch.setitem(model_sweep.PARAM_GRIDS, "Ridge", {"alpha": [0.1, 1.0, 10.0]})
+    _, ran = sweep()
+    assert sorted(ran) == sorted(model_sweep.task_list(["NO2"], ["Ridge"]))
+    # Changed training data: every task is run again
+    aq, _ = annual_tables
+    aq["AnnualAvg_all"] += 1.0
+    aq.to_csv(model_sweep.app_data.TABLES["aq_annual"], index=False)
+    _, ran = sweep()
+    assert len(ran) == 6
+
+
+@pytest.mark.parametrize("content", ["", '{"data": ["', "[1, 2]", '{"data": 1}', "\x00\x01"])
+def test_corrupt_checkpoint_is_recomputed(sweep, tmp_path, content):
+    first, _ = sweep()
+    task = next(iter(first))
+    (tmp_path / "checkpoints" / f"{model_sweep._task_name(task)}.json").write_text(content)
+    second, ran = sweep()
+    assert ran == [task]
+    assert second[task]["row"] == first[task]["row"]
+
+
+def test_results_and_timings_are_written(sweep, tmp_path):
+    done, _ = sweep()
+    for saved in done.values():
+        assert list(saved["row"]) == model_sweep.COLUMNS
+        assert saved["n_samples"] > 0
+    results = model_sweep.write_results(done, tmp_path / "results")
+    assert list(results.columns) == model_sweep.COLUMNS
+    assert len(results) == 6
+    timings = pd.read_csv(tmp_path / "results" / model_sweep.TIMINGS_NAME)
+    assert list(timings.columns) == ["Pollutant", "Target", "Model", "Seconds", "Samples", "Candidates"]
+    assert len(timings) == 6
+    assert timings["Seconds"].is_monotonic_decreasing
+    assert set(timings.loc[timings["Model"] == "Ridge", "Candidates"]) == {2}
+    for name in ["model_results", "best_results", "worst_results"]:
+        written = pd.read_csv(tmp_path / "results" / model_sweep.app_data.path(name).name)
+        assert list(written.columns) == model_sweep.COLUMNS